@@ -1,17 +1,28 @@
 from __future__ import annotations
 
-from typing import Any, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Mapping, Sequence, TypeVar
 import json
 import re
+import threading
 
 from app.core.config import get_settings
-from app.services.runtime.column_value_store import load_column_value_rows
+from app.services.runtime.column_value_store import column_value_rows_mtime, load_column_value_rows
 from app.services.runtime.diagnosis_map_store import match_diagnosis_mappings
-from app.services.runtime.label_intent_store import load_label_intent_profiles, match_label_intent_profiles
+from app.services.runtime.label_intent_store import (
+    label_intent_profiles_mtime,
+    load_label_intent_profiles,
+    match_label_intent_profiles,
+)
 from app.services.runtime.procedure_map_store import match_procedure_mappings
 from app.services.runtime.sql_error_repair_store import find_learned_sql_fix, mark_learned_sql_fix_used
-from app.services.runtime.sql_postprocess_rules_store import load_sql_postprocess_rules
-from app.services.runtime.sql_schema_hints_store import load_sql_schema_hints
+from app.services.runtime.sql_postprocess_rules_store import load_sql_postprocess_rules, sql_postprocess_rules_mtime
+from app.services.runtime.sql_schema_hints_store import load_sql_schema_hints, sql_schema_hints_mtime
+
+# Shared "no rewrite fired" result so no-op helper exits skip a list allocation.
+_NO_RULES: tuple[str, ...] = ()
 
 _COUNT_RE = re.compile(r"^Count rows in ([A-Za-z0-9_]+) \(sampled\)$", re.IGNORECASE)
 _SAMPLE_RE = re.compile(r"^Show sample ([A-Za-z0-9_]+) rows with (.+)$", re.IGNORECASE)
@@ -30,6 +41,10 @@ _AND_TRUE_RE = re.compile(r"\band\s+true\b", re.IGNORECASE)
 _INTERVAL_YEAR_RE = re.compile(r"interval\s+'(\d+)\s*year[s]?'", re.IGNORECASE)
 _INTERVAL_MONTH_RE = re.compile(r"interval\s+'(\d+)\s*month[s]?'", re.IGNORECASE)
 _INTERVAL_DAY_RE = re.compile(r"interval\s+'(\d+)\s*day[s]?'", re.IGNORECASE)
+_ONE_EQ_ONE_RE = re.compile(r"\b1=1\b")
+_JOIN_BEFORE_WHERE_ONE_EQ_ONE_RE = re.compile(r"\bJOIN\b\s+(.*)\s+WHERE\s+1=1", re.IGNORECASE)
+# Every rewrite in _rewrite_oracle_syntax needs one of these in the upper-cased SQL.
+_ORACLE_SYNTAX_HINT_RE = re.compile(r"TRUE|1=1|INTERVAL|LIMIT|FETCH|TOP")
 _TO_DATE_RE = re.compile(r"TO_DATE\s*\(\s*([A-Za-z0-9_\\.]+)\s*,\s*'[^']+'\s*\)", re.IGNORECASE)
 _HAVING_WHERE_RE = re.compile(r"\bHAVING\s+WHERE\b", re.IGNORECASE)
 _HAVING_TRUE_RE = re.compile(r"\bHAVING\s+1\s*=\s*1\b", re.IGNORECASE)
@@ -40,15 +55,17 @@ _COUNT_ALIAS_RE = re.compile(
     re.IGNORECASE,
 )
 _HOSPITAL_EXPIRE_RE = re.compile(r"\bHOSPITAL_EXPIRE_FLAG\s+IS\s+NOT\s+NULL\b", re.IGNORECASE)
-_AGE_FROM_ANCHOR_RE = re.compile(
-    r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*([A-Za-z0-9_\\.]*ANCHOR_YEAR)",
-    re.IGNORECASE,
-)
 _AGE_FROM_BIRTHDATE_RE = re.compile(
-    r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Za-z0-9_\\.]*"
+    r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*EXTRACT\s*\(\s*YEAR\s+FROM\s+(?P<birth>[A-Za-z0-9_\\.]*"
     r"(?:BIRTHDATE|DOB))\s*\)",
     re.IGNORECASE,
 )
+_AGE_FROM_CURRENT_YEAR_RE = re.compile(
+    r"EXTRACT\s*\(\s*YEAR\s+FROM\s+(?:CURRENT_DATE|SYSDATE)\s*\)\s*-\s*"
+    r"(?:(?P<anchor>[A-Za-z0-9_\\.]*ANCHOR_YEAR)"
+    r"|EXTRACT\s*\(\s*YEAR\s+FROM\s+(?P<birth>[A-Za-z0-9_\\.]*(?:BIRTHDATE|DOB))\s*\))",
+    re.IGNORECASE,
+)
 _ANCHOR_MINUS_BIRTH_EXTRACT_RE = re.compile(
     r"(?P<anchor>[A-Za-z0-9_\\.]*ANCHOR_YEAR)\s*-\s*EXTRACT\s*\(\s*YEAR\s+FROM\s+"
     r"(?P<birth>[A-Za-z0-9_\\.]*(?:BIRTHDATE|DOB))\s*\)",
@@ -166,6 +183,33 @@ _COUNTLIKE_ALIAS_RE = re.compile(
     r"^(CNT|COUNT|N_|NUM_|.*_CNT|.*_COUNT|TOTAL_.*|.*_TOTAL)$",
     re.IGNORECASE,
 )
+_AS_ALIAS_RE = re.compile(r"\bAS\s+([A-Za-z_][A-Za-z0-9_$#]*)\b", re.IGNORECASE)
+_AGG_ALIAS_REF_RE = re.compile(
+    r"\b(?P<fn>AVG|STDDEV)\s*\(\s*(?P<alias>[A-Za-z_][A-Za-z0-9_$#]*)\s*\)",
+    re.IGNORECASE,
+)
+_AVG_COUNT_ALIAS_RE = re.compile(
+    r"\bAVG\s*\(\s*(diagnosis_count|procedure_count|num_diagnoses|num_procedures|[A-Za-z0-9_]*_count)\s*\)",
+    re.IGNORECASE,
+)
+_AVG_ALIAS_RULES = tuple(
+    (
+        col,
+        alias,
+        re.compile(rf"AVG\(\s*([A-Za-z0-9_\.]*{col})\s*\)\s+AS\s+[A-Za-z0-9_]+", re.IGNORECASE),
+    )
+    for col, alias in (
+        ("DOSES_PER_24_HRS", "avg_doses"),
+        ("AMOUNT", "avg_amount"),
+        ("VALUE", "avg_value"),
+        ("ANCHOR_AGE", "avg_age"),
+        ("LOS", "avg_los"),
+        ("DIAGNOSIS_COUNT", "avg_diag"),
+        ("DIAG_CNT", "avg_diag"),
+        ("PROCEDURE_COUNT", "avg_proc"),
+        ("PROC_CNT", "avg_proc"),
+    )
+)
 _RAW_LABEL_LIKE_RE = re.compile(
     r"(?P<ref>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL)\s+"
     r"(?P<op>LIKE|NOT\s+LIKE)\s+"
@@ -187,34 +231,42 @@ def _column_aliases() -> dict[str, str]:
     return value if isinstance(value, dict) else {}
 
 
-def _patients_only_cols() -> set[str]:
-    value = _schema_hints().get("patients_only_cols")
-    return value if isinstance(value, set) else set()
+_SCHEMA_HINT_SETS: dict[str, tuple[Any, frozenset[str]]] = {}
+
+
+def _schema_hint_set(key: str) -> frozenset[str]:
+    # The hints store hands back the same set objects until the file changes.
+    value = _schema_hints().get(key)
+    cached = _SCHEMA_HINT_SETS.get(key)
+    if cached is not None and cached[0] is value:
+        return cached[1]
+    result = frozenset(value) if isinstance(value, set) else frozenset()
+    _SCHEMA_HINT_SETS[key] = (value, result)
+    return result
+
 
+def _patients_only_cols() -> frozenset[str]:
+    return _schema_hint_set("patients_only_cols")
 
-def _admissions_only_cols() -> set[str]:
-    value = _schema_hints().get("admissions_only_cols")
-    return value if isinstance(value, set) else set()
 
+def _admissions_only_cols() -> frozenset[str]:
+    return _schema_hint_set("admissions_only_cols")
 
-def _tables_with_subject_id() -> set[str]:
-    value = _schema_hints().get("tables_with_subject_id")
-    return value if isinstance(value, set) else set()
 
+def _tables_with_subject_id() -> frozenset[str]:
+    return _schema_hint_set("tables_with_subject_id")
 
-def _tables_with_hadm_id() -> set[str]:
-    value = _schema_hints().get("tables_with_hadm_id")
-    return value if isinstance(value, set) else set()
 
+def _tables_with_hadm_id() -> frozenset[str]:
+    return _schema_hint_set("tables_with_hadm_id")
 
-def _micro_only_cols() -> set[str]:
-    value = _schema_hints().get("micro_only_cols")
-    return value if isinstance(value, set) else set()
 
+def _micro_only_cols() -> frozenset[str]:
+    return _schema_hint_set("micro_only_cols")
 
-def _timestamp_cols() -> set[str]:
-    value = _schema_hints().get("timestamp_cols")
-    return value if isinstance(value, set) else set()
+
+def _timestamp_cols() -> frozenset[str]:
+    return _schema_hint_set("timestamp_cols")
 
 _HAS_ICU_RE = re.compile(r"\bHAS_ICU_STAY\b\s*=\s*(?:'Y'|1|TRUE)", re.IGNORECASE)
 _ICU_STAY_RE = re.compile(r"\bICU_STAY\b\s*=\s*(?:'Y'|'YES'|1|TRUE)", re.IGNORECASE)
@@ -227,6 +279,14 @@ _OUTER_ROWNUM_RE = re.compile(
     r"^\s*SELECT\s+\*\s+FROM\s*\((SELECT .*?)\)\s*WHERE\s+ROWNUM\s*<=\s*(\d+)\s*;?\s*$",
     re.IGNORECASE | re.DOTALL,
 )
+_OUTER_SELECT_WHERE_RE = re.compile(
+    r"^\s*SELECT\s+\*\s+FROM\s*\((SELECT .*?)\)\s*WHERE\s+(.+?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_ROWNUM_LE_RE = re.compile(r"\bROWNUM\s*<=\s*(\d+)\b", re.IGNORECASE)
+_REPEATED_AND_RE = re.compile(r"\bAND\b\s*(\bAND\b)?", re.IGNORECASE)
+_LEADING_AND_OR_RE = re.compile(r"^(AND|OR)\s+", re.IGNORECASE)
+_TRAILING_AND_OR_RE = re.compile(r"\s+(AND|OR)$", re.IGNORECASE)
 _ABS_YEAR_RE = re.compile(r"(?<!\d)(?:19|20|21)\d{2}(?!\d)")
 _SYSDATE_YEAR_DIFF_RE = re.compile(
     r"\(\s*(?:SYSDATE|CURRENT_DATE)\s*-\s*(?:CAST\s*\(\s*)?([A-Za-z0-9_\\.]+)"
@@ -241,6 +301,10 @@ _POST_WINDOW_KO_RE = re.compile(r"후\s*(\d+)\s*일|(\d+)\s*일\s*이내")
 _POST_WINDOW_EN_RE = re.compile(r"(?:within|after)\s+(\d+)\s+day", re.IGNORECASE)
 _TOP_N_EN_RE = re.compile(r"\btop\s+(\d+)\b", re.IGNORECASE)
 _TOP_N_KO_RE = re.compile(r"(?:상위|탑)\s*(\d+)")
+_TOP_N_COMBINED_RE = re.compile(
+    f"(?P<en>{_TOP_N_EN_RE.pattern})|(?P<ko>{_TOP_N_KO_RE.pattern})",
+    re.IGNORECASE,
+)
 _TOP_N_KO_ONLY_RE = re.compile(r"(?<!\d)([0-9][0-9,]*)\s*(?:개|건|명|행|줄)\s*만")
 _COUNT_BY_GENDER_EN_RE = re.compile(r"\bcount\b.*\bby\s+gender\b", re.IGNORECASE)
 _COUNT_BY_GENDER_KO_RE = re.compile(r"성별.*(건수|건|수|카운트)|.*(건수|건|수|카운트).*성별")
@@ -272,132 +336,234 @@ _ADM_ICU_IN_RE = re.compile(
     r"(?P<adm>[A-Za-z0-9_]+)\.HADM_ID\s+IN\s*\(\s*SELECT\s+HADM_ID\s+FROM\s+ICUSTAYS\s*\)",
     re.IGNORECASE,
 )
+# Keyword hints matched against an already lowercased question.
+_KO_SAMPLE_COLUMN_HINT_RE = re.compile(r"columns?|with |컬럼|열|항목|포함")
+_SAMPLE_PREVIEW_HINT_RE = re.compile(r"sample|preview|샘플|미리보기|예시")
+_ADMISSION_GRAIN_HINT_RE = re.compile(r"입원|admission|hospitalization|inpatient")
+_RATE_LIKE_HINT_RE = re.compile(r"rate|ratio|평균|비율|median|중앙|중위")
+_TOP_RANK_HINT_KEYWORDS = ("top", "most", "highest")
+_FROM_TABLE_RE = re.compile(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
+_WHERE_KW_RE = re.compile(r"\bwhere\b", re.IGNORECASE)
+_GROUP_BY_KW_RE = re.compile(r"\bgroup\s+by\b", re.IGNORECASE)
+_ORDER_BY_KW_RE = re.compile(r"\border\s+by\b", re.IGNORECASE)
+_UNQUALIFIED_ITEMID_RE = re.compile(r"(?<!\.)\bITEMID\b", re.IGNORECASE)
+_ITEMID_REF_RE = re.compile(r"\b([A-Za-z0-9_]+)\.ITEMID\b|(?<!\.)\bITEMID\b", re.IGNORECASE)
+_UNQUALIFIED_LABEL_RE = re.compile(r"(?<!\.)\bLABEL\b", re.IGNORECASE)
+_UNQUALIFIED_LONG_TITLE_RE = re.compile(r"(?<!\.)\bLONG_TITLE\b", re.IGNORECASE)
+_UNQUALIFIED_ORDER_TYPE_RE = re.compile(r"(?<!\.)\bORDER_TYPE\b", re.IGNORECASE)
+_UNQUALIFIED_CAREUNIT_RE = re.compile(r"(?<!\.)\bCAREUNIT\b", re.IGNORECASE)
+_UNQUALIFIED_STATUSDESCRIPTION_RE = re.compile(r"(?<!\.)\bSTATUSDESCRIPTION\b", re.IGNORECASE)
+_UNQUALIFIED_PRIORITY_RE = re.compile(r"(?<!\.)\bPRIORITY\b", re.IGNORECASE)
+_UNQUALIFIED_SPEC_TYPE_DESC_RE = re.compile(r"(?<!\.)\bSPEC_TYPE_DESC\b", re.IGNORECASE)
+_UNQUALIFIED_ICD_CODE_RE = re.compile(r"(?<!\.)\bICD_CODE\b", re.IGNORECASE)
+_SERVICE_COLUMN_NAMES = ("CURR_SERVICE", "PREV_SERVICE", "ORDER_TYPE")
+_UNQUALIFIED_SERVICE_COLUMN_RE = re.compile(r"(?<!\.)\b(CURR_SERVICE|PREV_SERVICE|ORDER_TYPE)\b", re.IGNORECASE)
+_UNQUALIFIED_WORD_RES = {
+    "ITEMID": _UNQUALIFIED_ITEMID_RE,
+    "LABEL": _UNQUALIFIED_LABEL_RE,
+    "LONG_TITLE": _UNQUALIFIED_LONG_TITLE_RE,
+    "ORDER_TYPE": _UNQUALIFIED_ORDER_TYPE_RE,
+    "CAREUNIT": _UNQUALIFIED_CAREUNIT_RE,
+    "STATUSDESCRIPTION": _UNQUALIFIED_STATUSDESCRIPTION_RE,
+    "PRIORITY": _UNQUALIFIED_PRIORITY_RE,
+    "SPEC_TYPE_DESC": _UNQUALIFIED_SPEC_TYPE_DESC_RE,
+    "ICD_CODE": _UNQUALIFIED_ICD_CODE_RE,
+}
+# Case-sensitive twins for matching against the cached upper-case view of ASCII SQL.
+_UNQUALIFIED_WORD_UPPER_RES = {name: re.compile(rf"(?<!\.)\b{name}\b") for name in _UNQUALIFIED_WORD_RES}
+_SQL_WORD_NAMES = (
+    "PATIENTS",
+    "ADMISSIONS",
+    "ICUSTAYS",
+    "TRANSFERS",
+    "SERVICES",
+    "DIAGNOSES_ICD",
+    "PROCEDURES_ICD",
+    "D_ICD_DIAGNOSES",
+    "D_ICD_PROCEDURES",
+    "MICROBIOLOGYEVENTS",
+    "LABEVENTS",
+    "CHARTEVENTS",
+    "PRESCRIPTIONS",
+    "D_ITEMS",
+    "D_LABITEMS",
+    "EMAR",
+    "EMAR_DETAIL",
+    "INPUTEVENTS",
+    "OUTPUTEVENTS",
+    "HADM_ID",
+    "ITEMID",
+    "LABEL",
+    "LONG_TITLE",
+    "MEDICATION",
+    "CHARTTIME",
+    "CAREUNIT",
+    "FIRST_CAREUNIT",
+    "LAST_CAREUNIT",
+    "STATUSDESCRIPTION",
+    "PRIORITY",
+    "SPEC_TYPE_DESC",
+    "ICD_CODE",
+    "ADMISSION_LENGTH",
+    "ADMISSION_DAYS",
+    "DURATION_DAYS",
+    "DURATION",
+    "CURR_SERVICE",
+    "PREV_SERVICE",
+    "ORDER_TYPE",
+    "CNT",
+    "ROWNUM",
+    "ADMISSION_TYPE",
+    "ICU_STAY",
+    "TO_DATE",
+    "EXTRACT",
+    "TIMESTAMPDIFF",
+    "HOSPITAL_EXPIRE_FLAG",
+    "YEAR",
+    "LIMIT",
+    "FETCH",
+    "UPDATE",
+)
+_SQL_WORD_RES = {name: re.compile(rf"\b{name}\b", re.IGNORECASE) for name in _SQL_WORD_NAMES}
+_SQL_WORD_UPPER_RES = {name: re.compile(rf"\b{name}\b") for name in _SQL_WORD_NAMES}
+
+
+_SCAN_QUOTED_OR_PAREN = r"'[^']*(?:''[^']*)*'?|[()]"
+_FINAL_SELECT_SCAN_RE = re.compile(_SCAN_QUOTED_OR_PAREN + r"|(?<![\w$#])SELECT(?![\w$#])")
+_FINAL_FROM_SCAN_RE = re.compile(_SCAN_QUOTED_OR_PAREN + r"|(?<![\w$#])FROM(?![\w$#])")
+
+
+@lru_cache(maxsize=32)
+def _top_level_keyword_scan_re(tokens: tuple[str, ...]) -> re.Pattern[str]:
+    alternation = "|".join(re.escape(token) for token in tokens)
+    return re.compile(_SCAN_QUOTED_OR_PAREN + r"|(?<![\w$#])(?:" + alternation + r")(?![\w$#])")
+
+
+@lru_cache(maxsize=256)
+def _upper_sql(sql: str) -> str:
+    return sql.upper()
+
+
+@lru_cache(maxsize=64)
+def _lower_question(question: str) -> str:
+    return question.lower()
+
+
+@lru_cache(maxsize=256)
+def _question_has_keyword(question: str, keywords: tuple[str, ...]) -> bool:
+    return any(keyword in question for keyword in keywords)
 
 
-def _is_ident_char(ch: str) -> bool:
-    return ch.isalnum() or ch in {"_", "$", "#"}
+@lru_cache(maxsize=1024)
+def _question_has_intent(pattern: re.Pattern[str], question: str) -> bool:
+    return pattern.search(question) is not None
 
 
-def _token_at(text_upper: str, idx: int, token: str) -> bool:
-    length = len(token)
-    if text_upper[idx: idx + length] != token:
+@lru_cache(maxsize=256)
+def _scan_sql_tokens(sql: str) -> frozenset[str]:
+    # Non-ASCII text can case-fold onto ASCII names under IGNORECASE, so
+    # leave those strings to the word-boundary patterns.
+    if not sql.isascii():
+        return frozenset(_SQL_WORD_NAMES)
+    text_upper = _upper_sql(sql)
+    return frozenset(name for name in _SQL_WORD_NAMES if name in text_upper)
+
+
+_SQL_WORD_BITS = {name: 1 << index for index, name in enumerate(_SQL_WORD_NAMES)}
+
+
+def _sql_word_mask(*names: str) -> int:
+    mask = 0
+    for name in names:
+        mask |= _SQL_WORD_BITS[name]
+    return mask
+
+
+@lru_cache(maxsize=256)
+def _scan_sql_token_mask(sql: str) -> int:
+    """Bitmask form of _scan_sql_tokens for table-driven rewriter dispatch."""
+    return _sql_word_mask(*_scan_sql_tokens(sql))
+
+
+def _sql_mentions(sql: str, name: str) -> bool:
+    if name not in _scan_sql_tokens(sql):
         return False
-    prev = text_upper[idx - 1] if idx > 0 else " "
-    nxt = text_upper[idx + length] if idx + length < len(text_upper) else " "
-    if _is_ident_char(prev) or _is_ident_char(nxt):
+    if sql.isascii():
+        # ASCII upper-casing keeps word boundaries, so skip per-character case folding.
+        return _SQL_WORD_UPPER_RES[name].search(_upper_sql(sql)) is not None
+    return _SQL_WORD_RES[name].search(sql) is not None
+
+
+@lru_cache(maxsize=256)
+def _first_from_table(sql: str) -> re.Match[str] | None:
+    return _FROM_TABLE_RE.search(sql)
+
+
+def _replace_from_table(sql: str, match: re.Match[str], replacement: str) -> str:
+    return sql[: match.start()] + replacement + sql[match.end() :]
+
+
+def _sql_mentions_any(sql: str, names: Iterable[str]) -> bool:
+    return any(_sql_mentions(sql, name) for name in names)
+
+
+def _has_limit_or_fetch(sql: str) -> bool:
+    tokens = _scan_sql_tokens(sql)
+    if "LIMIT" in tokens and _LIMIT_RE.search(sql):
+        return True
+    return "FETCH" in tokens and _FETCH_RE.search(sql) is not None
+
+
+def _has_unqualified(sql: str, name: str) -> bool:
+    if name not in _scan_sql_tokens(sql):
         return False
-    return True
+    if sql.isascii():
+        return _UNQUALIFIED_WORD_UPPER_RES[name].search(_upper_sql(sql)) is not None
+    return _UNQUALIFIED_WORD_RES[name].search(sql) is not None
 
 
-def _find_final_select_from_span(sql: str) -> tuple[str, int, int] | None:
-    core = sql.strip().rstrip(";")
-    if not core:
-        return None
-    upper = core.upper()
+def _sub_unqualified(sql: str, name: str, repl: str) -> tuple[str, int]:
+    if name not in _scan_sql_tokens(sql):
+        return sql, 0
+    return _UNQUALIFIED_WORD_RES[name].subn(repl, sql)
+
+
+def _scan_top_level(pattern: re.Pattern[str], text_upper: str, start_idx: int = 0) -> Iterable[int]:
     depth = 0
-    in_single = False
-    last_select = -1
-    i = 0
-    while i < len(upper):
-        ch = upper[i]
-        if in_single:
-            if ch == "'":
-                if i + 1 < len(upper) and upper[i + 1] == "'":
-                    i += 2
-                    continue
-                in_single = False
-            i += 1
-            continue
+    for match in pattern.finditer(text_upper, start_idx):
+        ch = text_upper[match.start()]
         if ch == "'":
-            in_single = True
-            i += 1
             continue
         if ch == "(":
             depth += 1
-            i += 1
-            continue
-        if ch == ")":
+        elif ch == ")":
             depth = max(0, depth - 1)
-            i += 1
-            continue
-        if depth == 0 and _token_at(upper, i, "SELECT"):
-            last_select = i
-            i += 6
-            continue
-        i += 1
+        elif depth == 0:
+            yield match.start()
+
+
+@lru_cache(maxsize=256)
+def _find_final_select_from_span(sql: str) -> tuple[str, int, int] | None:
+    core = sql.strip().rstrip(";")
+    if not core:
+        return None
+    upper = _upper_sql(core)
+    last_select = -1
+    for idx in _scan_top_level(_FINAL_SELECT_SCAN_RE, upper):
+        last_select = idx
     if last_select < 0:
         return None
-
-    depth = 0
-    in_single = False
-    i = last_select + 6
-    from_idx = -1
-    while i < len(upper):
-        ch = upper[i]
-        if in_single:
-            if ch == "'":
-                if i + 1 < len(upper) and upper[i + 1] == "'":
-                    i += 2
-                    continue
-                in_single = False
-            i += 1
-            continue
-        if ch == "'":
-            in_single = True
-            i += 1
-            continue
-        if ch == "(":
-            depth += 1
-            i += 1
-            continue
-        if ch == ")":
-            depth = max(0, depth - 1)
-            i += 1
-            continue
-        if depth == 0 and _token_at(upper, i, "FROM"):
-            from_idx = i
-            break
-        i += 1
+    from_idx = next(iter(_scan_top_level(_FINAL_FROM_SCAN_RE, upper, last_select + 6)), -1)
     if from_idx < 0:
         return None
     return core, last_select, from_idx
 
 
 def _find_first_top_level_keyword(sql: str, start_idx: int, keywords: tuple[str, ...]) -> int:
-    if not sql or start_idx < 0 or start_idx >= len(sql):
+    if not sql or start_idx < 0 or start_idx >= len(sql) or not keywords:
         return -1
-    upper = sql.upper()
-    depth = 0
-    in_single = False
-    i = start_idx
-    while i < len(upper):
-        ch = upper[i]
-        if in_single:
-            if ch == "'":
-                if i + 1 < len(upper) and upper[i + 1] == "'":
-                    i += 2
-                    continue
-                in_single = False
-            i += 1
-            continue
-        if ch == "'":
-            in_single = True
-            i += 1
-            continue
-        if ch == "(":
-            depth += 1
-            i += 1
-            continue
-        if ch == ")":
-            depth = max(0, depth - 1)
-            i += 1
-            continue
-        if depth == 0:
-            for keyword in keywords:
-                if _token_at(upper, i, keyword.upper()):
-                    return i
-        i += 1
-    return -1
+    pattern = _top_level_keyword_scan_re(tuple(keyword.upper() for keyword in keywords))
+    return next(iter(_scan_top_level(pattern, _upper_sql(sql), start_idx)), -1)
 
 
 def _split_top_level_csv(text: str) -> list[str]:
@@ -440,6 +606,12 @@ def _split_top_level_csv(text: str) -> list[str]:
     return items
 
 
+_COUNT_DISTINCT_HADM_PROJECTION_RE = re.compile(
+    r"^\s*COUNT\s*\(\s*DISTINCT\s+(?:[A-Za-z0-9_]+\.)?HADM_ID\s*\)\s*(?:AS\s+[A-Za-z_][A-Za-z0-9_$#]*)?\s*$",
+    re.IGNORECASE,
+)
+
+
 def _is_single_count_distinct_hadm_projection(sql: str) -> bool:
     span = _find_final_select_from_span(sql)
     if not span:
@@ -450,23 +622,21 @@ def _is_single_count_distinct_hadm_projection(sql: str) -> bool:
     if len(items) != 1:
         return False
     item = items[0].strip()
-    return bool(
-        re.match(
-            r"^\s*COUNT\s*\(\s*DISTINCT\s+(?:[A-Za-z0-9_]+\.)?HADM_ID\s*\)\s*(?:AS\s+[A-Za-z_][A-Za-z0-9_$#]*)?\s*$",
-            item,
-            re.IGNORECASE,
-        )
-    )
+    return bool(_COUNT_DISTINCT_HADM_PROJECTION_RE.match(item))
+
+
+_SELECT_AS_ALIAS_TAIL_RE = re.compile(r"\bAS\s+([A-Za-z_][A-Za-z0-9_$#]*)\s*$", re.IGNORECASE)
+_SELECT_BARE_ALIAS_TAIL_RE = re.compile(r"\s+([A-Za-z_][A-Za-z0-9_$#]*)\s*$")
 
 
 def _extract_select_alias(expr: str) -> str | None:
     trimmed = expr.strip()
     if not trimmed:
         return None
-    m = re.search(r"\bAS\s+([A-Za-z_][A-Za-z0-9_$#]*)\s*$", trimmed, re.IGNORECASE)
+    m = _SELECT_AS_ALIAS_TAIL_RE.search(trimmed)
     if m:
         return m.group(1)
-    m = re.search(r"\s+([A-Za-z_][A-Za-z0-9_$#]*)\s*$", trimmed)
+    m = _SELECT_BARE_ALIAS_TAIL_RE.search(trimmed)
     if not m:
         return None
     candidate = m.group(1)
@@ -475,18 +645,16 @@ def _extract_select_alias(expr: str) -> str | None:
     return candidate
 
 
+_NON_WORD_CHARS_RE = re.compile(r"[^0-9A-Za-z가-힣]+")
+
+
 def _normalize_text_key(text: str) -> str:
-    return re.sub(r"[^0-9A-Za-z가-힣]+", "", str(text or "").lower())
+    return _NON_WORD_CHARS_RE.sub("", str(text or "").lower())
 
 
 def _tokenize_text(text: str) -> list[str]:
-    raw = re.split(r"[^0-9A-Za-z가-힣]+", str(text or "").lower())
-    tokens = [token for token in raw if len(token) >= 2]
-    deduped: list[str] = []
-    for token in tokens:
-        if token not in deduped:
-            deduped.append(token)
-    return deduped
+    raw = _NON_WORD_CHARS_RE.split(str(text or "").lower())
+    return list(dict.fromkeys(token for token in raw if len(token) >= 2))
 
 
 def _sql_quote_literal(text: str) -> str:
@@ -523,7 +691,8 @@ def _find_matching_paren_index(text: str, open_idx: int) -> int | None:
     return None
 
 
-def _table_alias_map(sql: str) -> dict[str, str]:
+@lru_cache(maxsize=256)
+def _table_alias_map(sql: str) -> Mapping[str, str]:
     mapping: dict[str, str] = {}
     for match in _TABLE_ALIAS_REF_RE.finditer(sql):
         table = str(match.group(1) or "").strip().upper()
@@ -533,21 +702,42 @@ def _table_alias_map(sql: str) -> dict[str, str]:
         mapping[table] = table
         if alias and alias not in {"WHERE", "JOIN", "ON", "GROUP", "ORDER", "HAVING"}:
             mapping[alias] = table
-    return mapping
+    # Shared across callers through the cache, so hand out a read-only view.
+    return MappingProxyType(mapping)
+
+
+_COLUMN_VALUE_INDEX_ROWS: list[dict[str, Any]] | None = None
+_COLUMN_VALUE_INDEX_CACHE: dict[str, dict[str, list[str]]] = {}
 
 
 def _column_value_index() -> dict[str, dict[str, list[str]]]:
-    index: dict[str, dict[str, list[str]]] = {}
-    for row in load_column_value_rows():
+    global _COLUMN_VALUE_INDEX_ROWS
+    global _COLUMN_VALUE_INDEX_CACHE
+
+    # The store hands back the same list until its source file changes.
+    rows = load_column_value_rows()
+    if rows is _COLUMN_VALUE_INDEX_ROWS:
+        return _COLUMN_VALUE_INDEX_CACHE
+    index = _build_column_value_index(rows)
+    _COLUMN_VALUE_INDEX_ROWS = rows
+    _COLUMN_VALUE_INDEX_CACHE = index
+    return index
+
+
+def _build_column_value_index(rows: list[dict[str, Any]]) -> dict[str, dict[str, list[str]]]:
+    # Ordered dicts collect distinct values without rescanning each column's list.
+    distinct: dict[str, dict[str, dict[str, None]]] = {}
+    for row in rows:
         table = str(row.get("table") or "").strip().upper()
         column = str(row.get("column") or "").strip().upper()
         value = str(row.get("value") or "").strip()
         if not table or not column or not value:
             continue
-        table_bucket = index.setdefault(table, {})
-        values = table_bucket.setdefault(column, [])
-        if value not in values:
-            values.append(value)
+        distinct.setdefault(table, {}).setdefault(column, {})[value] = None
+    index: dict[str, dict[str, list[str]]] = {
+        table: {column: list(values) for column, values in columns.items()}
+        for table, columns in distinct.items()
+    }
 
     # Some sources include only SERVICES.PREV_SERVICE values, while most analysis
     # questions filter current service (CURR_SERVICE). Share value catalogs between
@@ -561,10 +751,7 @@ def _column_value_index() -> dict[str, dict[str, list[str]]]:
         elif curr_values and not prev_values:
             services_bucket["PREV_SERVICE"] = list(curr_values)
         elif prev_values and curr_values:
-            merged: list[str] = []
-            for value in [*prev_values, *curr_values]:
-                if value not in merged:
-                    merged.append(value)
+            merged = list(dict.fromkeys([*prev_values, *curr_values]))
             services_bucket["PREV_SERVICE"] = list(merged)
             services_bucket["CURR_SERVICE"] = list(merged)
     return index
@@ -623,8 +810,11 @@ def _select_best_categorical_values(
     return selected
 
 
+_AND_SEPARATOR_RE = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
 def _parse_columns(text: str) -> list[str]:
-    cleaned = re.sub(r"\s+and\s+", ",", text.strip(), flags=re.IGNORECASE)
+    cleaned = _AND_SEPARATOR_RE.sub(",", text.strip())
     cols = [c.strip() for c in cleaned.split(",") if c.strip()]
     if not cols:
         return []
@@ -633,8 +823,17 @@ def _parse_columns(text: str) -> list[str]:
     return cols
 
 
+@lru_cache(maxsize=4)
+def _sample_table_union_re(subject_tables: frozenset[str], hadm_tables: frozenset[str]) -> re.Pattern[str]:
+    tables = sorted(
+        {name for name in subject_tables | hadm_tables if name} | {"PATIENTS"},
+        key=lambda name: (-len(name), name),
+    )
+    return re.compile(r"(?<![A-Z0-9_])(" + "|".join(re.escape(name) for name in tables) + r")(?![A-Z0-9_])")
+
+
 def _extract_sample_table_from_question(question: str) -> str | None:
-    q = str(question or "")
+    q = question or ""
     if not q:
         return None
 
@@ -644,21 +843,15 @@ def _extract_sample_table_from_question(question: str) -> str | None:
         if _IDENT_RE.fullmatch(candidate):
             return candidate
 
-    q_upper = q.upper()
-    table_candidates = sorted(
-        set(_tables_with_subject_id()) | set(_tables_with_hadm_id()) | {"PATIENTS"},
-        key=lambda name: (-len(name), name),
-    )
-    for table in table_candidates:
-        if not table:
-            continue
-        if re.search(rf"(?<![A-Z0-9_]){re.escape(table)}(?![A-Z0-9_])", q_upper):
-            return table
-    return None
+    pattern = _sample_table_union_re(_tables_with_subject_id(), _tables_with_hadm_id())
+    found = [match.group(1) for match in pattern.finditer(q.upper())]
+    if not found:
+        return None
+    return min(found, key=lambda name: (-len(name), name))
 
 
 def _extract_sample_limit_from_question(question: str, default: int = 100) -> int:
-    q = str(question or "")
+    q = question or ""
     if not q:
         return default
     match = _SAMPLE_KO_LIMIT_RE.search(q)
@@ -674,20 +867,19 @@ def _extract_sample_limit_from_question(question: str, default: int = 100) -> in
     return value if value > 0 else default
 
 
-def _build_ko_sample_template(question: str) -> tuple[str | None, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip()
+def _build_ko_sample_template(question: str) -> tuple[str | None, Sequence[str]]:
+    q = (question or "").strip()
     if not q:
-        return None, rules
+        return None, _NO_RULES
     q_lower = q.lower()
     if "샘플" not in q_lower:
-        return None, rules
-    if any(token in q_lower for token in ("column", "columns", "with ", "컬럼", "열", "항목", "포함")):
-        return None, rules
+        return None, _NO_RULES
+    if _KO_SAMPLE_COLUMN_HINT_RE.search(q_lower):
+        return None, _NO_RULES
 
     table = _extract_sample_table_from_question(q)
     if not table:
-        return None, rules
+        return None, _NO_RULES
 
     columns: list[str] = []
     if table == "PATIENTS":
@@ -701,10 +893,11 @@ def _build_ko_sample_template(question: str) -> tuple[str | None, list[str]]:
 
     first = _first(columns)
     if not columns or not first:
-        return None, rules
+        return None, _NO_RULES
 
     limit = _extract_sample_limit_from_question(q, default=100)
     cols_sql = ", ".join(columns)
+    rules: list[str] = []
     rules.append("sample_rows_template_ko")
     return f"SELECT {cols_sql} FROM {table} WHERE {first} IS NOT NULL AND ROWNUM <= {limit}", rules
 
@@ -715,28 +908,96 @@ def _first(items: Iterable[str]) -> str | None:
     return None
 
 
+@lru_cache(maxsize=64)
+def _table_alias_re(table: str) -> re.Pattern[str]:
+    return re.compile(rf"\b(from|join)\s+{re.escape(table)}(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
+
+
+# Only the keyword is consumed so every FROM/JOIN is visited, matching a per-table search.
+_TABLE_REF_SCAN_RE = re.compile(r"\b(?:from|join)\s+(?=([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?)", re.IGNORECASE)
+_TABLE_NAME_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+@lru_cache(maxsize=256)
+def _table_refs(text: str) -> tuple[tuple[str, str | None], ...]:
+    """(upper-cased table token, following word) for every FROM/JOIN, in order."""
+    return tuple((m.group(1).upper(), m.group(2)) for m in _TABLE_REF_SCAN_RE.finditer(text))
+
+
+@lru_cache(maxsize=512)
 def _find_table_alias(text: str, table: str) -> str | None:
-    pattern = re.compile(rf"\b(from|join)\s+{re.escape(table)}(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
-    match = pattern.search(text)
-    if not match:
-        return None
-    alias = match.group(2) or table
+    if text.isascii() and table.isascii() and _TABLE_NAME_RE.fullmatch(table):
+        # One scan per text serves every table lookup; a longer token means the
+        # table name was only a prefix, where the alias group cannot match.
+        table_upper = table.upper()
+        for token, following in _table_refs(text):
+            if token.startswith(table_upper):
+                alias = (following if token == table_upper else None) or table
+                break
+        else:
+            return None
+    else:
+        match = _table_alias_re(table).search(text)
+        if not match:
+            return None
+        alias = match.group(2) or table
     if alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
         return table
     return alias
 
 
+_ALIAS_STOP_WORDS = frozenset({"ON", "WHERE", "JOIN", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL"})
+
+
+@lru_cache(maxsize=64)
+def _table_alias_ref_re(table: str) -> re.Pattern[str]:
+    return re.compile(rf"\b(?:FROM|JOIN)\s+{re.escape(table)}(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def _table_alias_refs(sql: str, table: str) -> frozenset[str]:
+    """Upper-cased references to a table: its own name plus any FROM/JOIN aliases."""
+    aliases = {table}
+    for match in _table_alias_ref_re(table).finditer(sql):
+        alias = match.group(1)
+        if alias and alias.upper() not in _ALIAS_STOP_WORDS:
+            aliases.add(alias.upper())
+    return frozenset(aliases)
+
+
+@lru_cache(maxsize=128)
+def _alias_column_re(alias: str, columns: str) -> re.Pattern[str]:
+    return re.compile(rf"\b({re.escape(alias)})\.(?:{columns})\b", re.IGNORECASE)
+
+
+def _requalify_alias_columns(
+    text: str,
+    aliases_upper: frozenset[str],
+    columns: str,
+    target: str,
+    qualified_re: re.Pattern[str],
+) -> str:
+    """Point `<alias>.<column>` references at `target` for the given table aliases."""
+    if not text.isascii():
+        return qualified_re.sub(
+            lambda m: f"{m.group(1)}.{target}" if m.group(1).upper() in aliases_upper else m.group(0),
+            text,
+        )
+    for alias in aliases_upper:
+        text = _alias_column_re(alias, columns).sub(rf"\1.{target}", text)
+    return text
+
+
 def _has_lab_intent(question: str) -> bool:
-    return bool(_LAB_INTENT_RE.search(str(question or "")))
+    return _question_has_intent(_LAB_INTENT_RE, question or "")
+
+
+_FROM_JOIN_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+[A-Za-z0-9_]+(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?", re.IGNORECASE)
 
 
 def _next_join_alias(sql: str, base: str) -> str:
     used_aliases: set[str] = set()
-    for match in re.finditer(
-        r"\b(?:FROM|JOIN)\s+[A-Za-z0-9_]+(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        sql,
-        re.IGNORECASE,
-    ):
+    for match in _FROM_JOIN_ALIAS_RE.finditer(sql):
         alias = str(match.group(1) or "").strip()
         if alias and alias.upper() not in {"WHERE", "JOIN", "ON", "GROUP", "ORDER", "HAVING"}:
             used_aliases.add(alias.upper())
@@ -750,33 +1011,37 @@ def _next_join_alias(sql: str, base: str) -> str:
 
 
 def _insert_join(text: str, join_clause: str) -> str:
-    if re.search(r"\bwhere\b", text, re.IGNORECASE):
-        return re.sub(r"\bwhere\b", join_clause + " WHERE", text, count=1, flags=re.IGNORECASE)
-    if re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-        return re.sub(r"\bgroup\s+by\b", join_clause + " GROUP BY", text, count=1, flags=re.IGNORECASE)
-    if re.search(r"\border\s+by\b", text, re.IGNORECASE):
-        return re.sub(r"\border\s+by\b", join_clause + " ORDER BY", text, count=1, flags=re.IGNORECASE)
+    if _WHERE_KW_RE.search(text):
+        return _WHERE_KW_RE.sub(join_clause + " WHERE", text, count=1)
+    if _GROUP_BY_KW_RE.search(text):
+        return _GROUP_BY_KW_RE.sub(join_clause + " GROUP BY", text, count=1)
+    if _ORDER_BY_KW_RE.search(text):
+        return _ORDER_BY_KW_RE.sub(join_clause + " ORDER BY", text, count=1)
     return text.rstrip(";") + join_clause
 
 
+@lru_cache(maxsize=32)
+def _from_table_re(table: str) -> re.Pattern[str]:
+    return re.compile(rf"\bfrom\s+{re.escape(table)}(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
+
+
 def _inject_join_in_outer(
     sql: str,
     base_table: str,
     join_template: str,
     replace_from: str,
     replace_to: str,
-) -> tuple[str | None, list[str]]:
-    rules: list[str] = []
+) -> tuple[str | None, Sequence[str]]:
     match = _OUTER_ROWNUM_RE.match(sql)
     if not match:
-        return None, rules
+        return None, _NO_RULES
     inner = match.group(1)
     limit = match.group(2)
 
-    pattern = re.compile(rf"\bfrom\s+{re.escape(base_table)}(?:\s+([A-Za-z0-9_]+))?", re.IGNORECASE)
+    pattern = _from_table_re(base_table)
     m = pattern.search(inner)
     if not m:
-        return None, rules
+        return None, _NO_RULES
     alias = m.group(1) or base_table
     if alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
         alias = base_table
@@ -788,125 +1053,25 @@ def _inject_join_in_outer(
 
     inner = pattern.sub(base_clause + join_clause, inner, count=1)
     inner = re.sub(replace_from, replace_to, inner, flags=re.IGNORECASE)
+    rules: list[str] = []
     rules.append("inject_join_in_outer")
     return f"SELECT * FROM ({inner}) WHERE ROWNUM <= {limit}", rules
 
 
+_ROWNUM_WRAP_PREFIX = "SELECT * FROM ("
+
+
 def _wrap_with_rownum(sql: str, n: int) -> str:
     core = sql.strip().rstrip(";")
-    return f"SELECT * FROM ({core}) WHERE ROWNUM <= {n}"
+    return f"{_ROWNUM_WRAP_PREFIX}{core}) WHERE ROWNUM <= {n}"
 
 
-def _apply_rownum_cap(sql: str, cap: int = 100000) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_oracle_syntax(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    if text.isascii() and not _ORACLE_SYNTAX_HINT_RE.search(_upper_sql(text)):
+        return text, _NO_RULES
 
-    def _inject_cap(inner_sql: str) -> str:
-        if re.search(r"\bwhere\b", inner_sql, re.IGNORECASE):
-            return re.sub(r"\bwhere\b", f"WHERE ROWNUM <= {cap} AND", inner_sql, count=1, flags=re.IGNORECASE)
-        if re.search(r"\bgroup\s+by\b", inner_sql, re.IGNORECASE):
-            return re.sub(
-                r"\bgroup\s+by\b",
-                f"WHERE ROWNUM <= {cap} GROUP BY",
-                inner_sql,
-                count=1,
-                flags=re.IGNORECASE,
-            )
-        if re.search(r"\border\s+by\b", inner_sql, re.IGNORECASE):
-            return re.sub(
-                r"\border\s+by\b",
-                f"WHERE ROWNUM <= {cap} ORDER BY",
-                inner_sql,
-                count=1,
-                flags=re.IGNORECASE,
-            )
-        return inner_sql.rstrip(";") + f" WHERE ROWNUM <= {cap}"
-
-    if "ROWNUM" in text.upper():
-        match = _OUTER_ROWNUM_RE.match(text)
-        if match:
-            inner = match.group(1)
-            limit = match.group(2)
-            heavy_tables = {
-                "LABEVENTS",
-                "CHARTEVENTS",
-                "MICROBIOLOGYEVENTS",
-                "INPUTEVENTS",
-                "OUTPUTEVENTS",
-                "EMAR",
-                "PRESCRIPTIONS",
-            }
-            if "ROWNUM" not in inner.upper() and any(
-                re.search(rf"\b{t}\b", inner, re.IGNORECASE) for t in heavy_tables
-            ):
-                inner = _inject_cap(inner)
-                rules.append(f"rownum_cap_inner_{cap}")
-                return f"SELECT * FROM ({inner}) WHERE ROWNUM <= {limit}", rules
-        return text, rules
-    heavy_tables = {
-        "LABEVENTS",
-        "CHARTEVENTS",
-        "MICROBIOLOGYEVENTS",
-        "INPUTEVENTS",
-        "OUTPUTEVENTS",
-        "EMAR",
-        "PRESCRIPTIONS",
-    }
-    if not any(re.search(rf"\b{t}\b", text, re.IGNORECASE) for t in heavy_tables):
-        return text, rules
-    if re.search(r"\bwhere\b", text, re.IGNORECASE):
-        text = re.sub(r"\bwhere\b", f"WHERE ROWNUM <= {cap} AND", text, count=1, flags=re.IGNORECASE)
-    else:
-        # Insert WHERE before GROUP BY / ORDER BY if present
-        if re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\bgroup\s+by\b", f"WHERE ROWNUM <= {cap} GROUP BY", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\border\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\border\s+by\b", f"WHERE ROWNUM <= {cap} ORDER BY", text, count=1, flags=re.IGNORECASE)
-        else:
-            text = text.rstrip(";") + f" WHERE ROWNUM <= {cap}"
-    rules.append(f"rownum_cap_{cap}")
-    return text, rules
-
-
-def _should_apply_rownum_cap_conservative(question: str, sql: str) -> bool:
-    q = (question or "").lower()
-    if not q or not sql:
-        return False
-    text_upper = sql.upper()
-    explicit_sample_intent = any(
-        token in q
-        for token in (
-            "sample",
-            "샘플",
-            "미리보기",
-            "preview",
-            "상위",
-            "top ",
-            "top-",
-        )
-    )
-    if explicit_sample_intent:
-        if _OUTER_ROWNUM_RE.match(sql.strip().rstrip(";")) and "GROUP BY" in text_upper and "COUNT(" in text_upper:
-            # Top-N grouped ranking already has explicit row limiting.
-            # Adding an inner sample cap can distort ranking semantics.
-            return False
-        return True
-    if "GROUP BY" in text_upper:
-        return False
-    if any(agg in text_upper for agg in ("COUNT(", "AVG(", "SUM(", "MIN(", "MAX(")):
-        return False
-    return bool(
-        re.search(
-            r"\b(LABEVENTS|CHARTEVENTS|MICROBIOLOGYEVENTS|INPUTEVENTS|OUTPUTEVENTS|EMAR|PRESCRIPTIONS)\b",
-            text_upper,
-        )
-    )
-
-
-def _rewrite_oracle_syntax(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
-    text = sql
-
     # Replace WHERE TRUE / AND TRUE with Oracle-friendly boolean
     if _WHERE_TRUE_RE.search(text):
         text = _WHERE_TRUE_RE.sub("WHERE 1=1", text)
@@ -914,12 +1079,13 @@ def _rewrite_oracle_syntax(sql: str) -> tuple[str, list[str]]:
     if _AND_TRUE_RE.search(text):
         text = _AND_TRUE_RE.sub("AND 1=1", text)
         rules.append("and_true_to_1eq1")
-    if "WHERE" not in text.upper() and re.search(r"\b1=1\b", text):
-        text = re.sub(r"\b1=1\b", "WHERE 1=1", text, count=1, flags=re.IGNORECASE)
+    if "WHERE" not in _upper_sql(text) and _ONE_EQ_ONE_RE.search(text):
+        text = _ONE_EQ_ONE_RE.sub("WHERE 1=1", text, count=1)
         rules.append("insert_where_for_1eq1")
 
     # Preserve JOIN location if WHERE is injected after an outer join rewrite
-    text = re.sub(r"\bJOIN\b\s+(.*)\s+WHERE\s+1=1", r"JOIN \\1 WHERE 1=1", text, flags=re.IGNORECASE)
+    if "1=1" in text:
+        text = _JOIN_BEFORE_WHERE_ONE_EQ_ONE_RE.sub(r"JOIN \\1 WHERE 1=1", text)
 
     # Normalize INTERVAL literals (Oracle expects INTERVAL 'n' YEAR|MONTH|DAY)
     if _INTERVAL_YEAR_RE.search(text):
@@ -933,35 +1099,53 @@ def _rewrite_oracle_syntax(sql: str) -> tuple[str, list[str]]:
         rules.append("interval_day_normalized")
 
     # LIMIT / FETCH FIRST / TOP -> ROWNUM wrapper
-    if _LIMIT_RE.search(text):
-        n = int(_LIMIT_RE.search(text).group(1))
+    m = _LIMIT_RE.search(text) if "LIMIT" in _scan_sql_tokens(text) else None
+    if m:
+        n = int(m.group(1))
         text = _LIMIT_RE.sub("", text).rstrip()
-        if "ROWNUM" not in text.upper():
+        if "ROWNUM" not in _upper_sql(text):
             text = _wrap_with_rownum(text, n)
             rules.append("limit_to_rownum")
-    if _FETCH_RE.search(text):
-        n = int(_FETCH_RE.search(text).group(1))
+    m = _FETCH_RE.search(text) if "FETCH" in _scan_sql_tokens(text) else None
+    if m:
+        n = int(m.group(1))
         text = _FETCH_RE.sub("", text).rstrip()
-        if "ROWNUM" not in text.upper():
+        if "ROWNUM" not in _upper_sql(text):
             text = _wrap_with_rownum(text, n)
             rules.append("fetch_first_to_rownum")
-    if _TOP_RE.search(text):
-        n = int(_TOP_RE.search(text).group(1))
-        text = _TOP_RE.sub("SELECT ", text, count=1)
-        if "ROWNUM" not in text.upper():
+    m = _TOP_RE.search(text)
+    if m:
+        n = int(m.group(1))
+        text = text[: m.start()] + "SELECT " + text[m.end() :]
+        if "ROWNUM" not in _upper_sql(text):
             text = _wrap_with_rownum(text, n)
             rules.append("top_to_rownum")
 
     return text, rules
 
 
-def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
+_SCHEMA_MAPPINGS_SOURCE: tuple[Any, ...] = ()
+_SCHEMA_MAPPINGS_CACHE: list[tuple[re.Pattern[str], Any, str]] = []
+
+
+def _compiled_schema_mappings() -> list[tuple[re.Pattern[str], Any, str]]:
+    global _SCHEMA_MAPPINGS_SOURCE
+    global _SCHEMA_MAPPINGS_CACHE
+
+    # The rules and schema-hint stores return the same dicts until their
+    # files change, so their identities key the compiled mappings.
     rules_cfg = load_sql_postprocess_rules().get("schema_aliases", {})
+    use_schema_hints = bool(rules_cfg.get("use_schema_hints", False))
+    source: tuple[Any, ...] = (rules_cfg,)
+    if use_schema_hints:
+        source = (rules_cfg, _table_aliases(), _column_aliases())
+    if len(source) == len(_SCHEMA_MAPPINGS_SOURCE) and all(
+        current is cached for current, cached in zip(source, _SCHEMA_MAPPINGS_SOURCE)
+    ):
+        return _SCHEMA_MAPPINGS_CACHE
+
     table_aliases_cfg = rules_cfg.get("table_aliases", {})
     column_aliases_cfg = rules_cfg.get("column_aliases", {})
-    use_schema_hints = bool(rules_cfg.get("use_schema_hints", False))
     table_aliases: dict[str, str] = {}
     column_aliases: dict[str, str] = {}
     if use_schema_hints:
@@ -980,6 +1164,7 @@ def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
             if str(src).strip() and str(dest).strip()
         })
 
+    mappings: list[tuple[re.Pattern[str], Any, str]] = []
     # Table name replacements: restrict to FROM/JOIN positions to avoid
     # accidental rewrites of non-table identifiers.
     for src, dest in table_aliases.items():
@@ -987,37 +1172,71 @@ def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
             rf"(?P<prefix>\b(?:FROM|JOIN)\s+){re.escape(src)}\b",
             re.IGNORECASE,
         )
-        if pattern.search(text):
-            text = pattern.sub(lambda m: f"{m.group('prefix')}{dest}", text)
-            rules.append(f"table:{src}->{dest}")
+        mappings.append((pattern, lambda m, dest=dest: f"{m.group('prefix')}{dest}", f"table:{src}->{dest}"))
 
     # Column name replacements (case-insensitive, word boundaries)
     for src, dest in column_aliases.items():
         pattern = re.compile(rf"\b{re.escape(src)}\b", re.IGNORECASE)
-        if pattern.search(text):
-            text = pattern.sub(dest, text)
-            rules.append(f"column:{src}->{dest}")
+        mappings.append((pattern, dest, f"column:{src}->{dest}"))
 
-    return text, rules
+    _SCHEMA_MAPPINGS_SOURCE = source
+    _SCHEMA_MAPPINGS_CACHE = mappings
+    return mappings
 
 
-def _ensure_patients_join(sql: str) -> tuple[str, list[str]]:
+def _apply_schema_mappings(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    for pattern, repl, rule in _compiled_schema_mappings():
+        text, count = pattern.subn(repl, text)
+        if count:
+            rules.append(rule)
+    return text, rules
 
-    # Skip if PATIENTS already referenced
-    if re.search(r"\bPATIENTS\b", text, re.IGNORECASE):
-        return text, rules
 
-    # Trigger only if patients-only columns appear unqualified
-    needed = [c for c in _patients_only_cols() if re.search(rf"(?<!\.)\b{c}\b", text, re.IGNORECASE)]
-    if not needed:
-        return text, rules
+@lru_cache(maxsize=32)
+def _unqualified_cols_re(cols: frozenset[str]) -> tuple[re.Pattern[str], tuple[str, ...]]:
+    ordered = tuple(sorted(cols))
+    alternation = "|".join(f"({re.escape(col)})" for col in ordered)
+    # A leading first-character class lets the regex engine skip ahead instead
+    # of trying every alternative at every position.
+    first_chars = "".join(sorted({re.escape(col[0]) for col in ordered}))
+    return re.compile(rf"(?=[{first_chars}])(?<!\.)\b(?:{alternation})\b", re.IGNORECASE), ordered
 
-    # Find base FROM table and optional alias (simple SQL only)
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+
+def _find_unqualified_cols(text: str, cols: Iterable[str]) -> list[str]:
+    cols = cols if isinstance(cols, frozenset) else frozenset(cols)
+    if not cols:
+        return []
+    pattern, ordered = _unqualified_cols_re(cols)
+    found = {ordered[match.lastindex - 1] for match in pattern.finditer(text)}
+    return [col for col in ordered if col in found]
+
+
+def _qualify_unqualified_cols(text: str, cols: Iterable[str], alias: str) -> str:
+    cols = list(cols)
+    if not cols:
+        return text
+    pattern, ordered = _unqualified_cols_re(frozenset(cols))
+    return pattern.sub(lambda match: f"{alias}.{ordered[match.lastindex - 1]}", text)
+
+
+def _ensure_patients_join(sql: str) -> tuple[str, Sequence[str]]:
+    text = sql
+
+    # Skip if PATIENTS already referenced
+    if _sql_mentions(text, "PATIENTS"):
+        return text, _NO_RULES
+
+    # Trigger only if patients-only columns appear unqualified
+    needed = _find_unqualified_cols(text, _patients_only_cols())
+    if not needed:
+        return text, _NO_RULES
+
+    # Find base FROM table and optional alias (simple SQL only)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     base_table = m.group(1)
     base_alias = m.group(2) or base_table
     # If alias accidentally captured a keyword, ignore
@@ -1025,20 +1244,23 @@ def _ensure_patients_join(sql: str) -> tuple[str, list[str]]:
         base_alias = base_table
 
     if base_table.upper() not in _tables_with_subject_id():
-        return text, rules
+        return text, _NO_RULES
 
     # Insert JOIN before WHERE (or end if WHERE missing)
     join_clause = f" JOIN PATIENTS p ON {base_alias}.SUBJECT_ID = p.SUBJECT_ID"
     text = _insert_join(text, join_clause)
 
     # Qualify unqualified patients-only columns
-    for col in needed:
-        text = re.sub(rf"(?<!\.)\b{col}\b", f"p.{col}", text, flags=re.IGNORECASE)
+    text = _qualify_unqualified_cols(text, needed, "p")
 
+    rules: list[str] = []
     rules.append("join_patients_for_demographics")
     return text, rules
 
 
+_PATIENTS_DOT_ID_RE = re.compile(r"\bPATIENTS\s*\.\s*ID\b", re.IGNORECASE)
+
+
 def _rewrite_patients_id(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
@@ -1046,12 +1268,12 @@ def _rewrite_patients_id(sql: str) -> tuple[str, list[str]]:
     changed = False
     if alias:
         pattern = re.compile(rf"\b{re.escape(alias)}\s*\.\s*ID\b", re.IGNORECASE)
-        rewritten = pattern.sub(f"{alias}.SUBJECT_ID", text)
-        if rewritten != text:
+        rewritten, count = pattern.subn(f"{alias}.SUBJECT_ID", text)
+        if count:
             text = rewritten
             changed = True
-    rewritten_patients = re.sub(r"\bPATIENTS\s*\.\s*ID\b", "PATIENTS.SUBJECT_ID", text, flags=re.IGNORECASE)
-    if rewritten_patients != text:
+    rewritten_patients, count = _PATIENTS_DOT_ID_RE.subn("PATIENTS.SUBJECT_ID", text)
+    if count:
         text = rewritten_patients
         changed = True
     if changed:
@@ -1059,54 +1281,123 @@ def _rewrite_patients_id(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _ensure_admissions_join(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_admissions_join(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
 
-    if re.search(r"\bADMISSIONS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "ADMISSIONS"):
+        return text, _NO_RULES
 
-    needed = [c for c in _admissions_only_cols() if re.search(rf"(?<!\.)\b{c}\b", text, re.IGNORECASE)]
+    needed = _find_unqualified_cols(text, _admissions_only_cols())
     if not needed:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     base_table = m.group(1)
     base_alias = m.group(2) or base_table
     if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
         base_alias = base_table
 
     if base_table.upper() not in _tables_with_subject_id():
-        return text, rules
+        return text, _NO_RULES
 
     join_clause = f" JOIN ADMISSIONS a ON {base_alias}.SUBJECT_ID = a.SUBJECT_ID"
-    if re.search(r"\bHADM_ID\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "HADM_ID"):
         join_clause = f" JOIN ADMISSIONS a ON {base_alias}.SUBJECT_ID = a.SUBJECT_ID AND {base_alias}.HADM_ID = a.HADM_ID"
 
     text = _insert_join(text, join_clause)
-    for col in needed:
-        text = re.sub(rf"(?<!\.)\b{col}\b", f"a.{col}", text, flags=re.IGNORECASE)
+    text = _qualify_unqualified_cols(text, needed, "a")
 
+    rules: list[str] = []
     rules.append("join_admissions_for_admission_fields")
     return text, rules
 
 
-def _ensure_microbiology_table(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_MICRO_QUESTION_TRIGGERS = ("micro", "microbiology", "organism", "antibiotic", "culture", "specimen")
+_PRESCRIPTIONS_QUESTION_TRIGGERS = ("prescription", "drug", "medication", "doses", "formulation")
+_INPUTEVENTS_QUESTION_TRIGGERS = (
+    "input event",
+    "input events",
+    "input amount",
+    "intake",
+    "fluid intake",
+    "infusion",
+    "infusions",
+)
+_OUTPUTEVENTS_QUESTION_TRIGGERS = (
+    "output event",
+    "output events",
+    "output value",
+    "output volume",
+    "urine output",
+    "drain output",
+)
+_EMAR_QUESTION_TRIGGERS = (
+    "emar",
+    "med admin",
+    "medication administration",
+    "administration record",
+    "dose given",
+    "dose due",
+)
+
+
+def _question_trigger_lookahead(name: str, alternation: str) -> str:
+    return rf"(?=[\s\S]*?(?P<{name}>{alternation}))?"
+
+
+def _literal_alternation(triggers: Iterable[str]) -> str:
+    return "|".join(re.escape(trigger) for trigger in triggers)
+
+
+_MICRO_QUESTION_TRIGGER_RE = re.compile(_literal_alternation(_MICRO_QUESTION_TRIGGERS))
+_PRESCRIPTIONS_QUESTION_TRIGGER_RE = re.compile(_literal_alternation(_PRESCRIPTIONS_QUESTION_TRIGGERS))
+_INPUTEVENTS_QUESTION_TRIGGER_RE = re.compile(_literal_alternation(_INPUTEVENTS_QUESTION_TRIGGERS))
+_OUTPUTEVENTS_QUESTION_TRIGGER_RE = re.compile(_literal_alternation(_OUTPUTEVENTS_QUESTION_TRIGGERS))
+_EMAR_QUESTION_TRIGGER_RE = re.compile(_literal_alternation(_EMAR_QUESTION_TRIGGERS))
+_EMAR_DETAIL_QUESTION_TRIGGER_RE = re.compile(r"detail|administration type|dose given|dose due|barcode")
+
+# One optional lookahead per table intent, so a single match reports every
+# intent whose trigger occurs anywhere in the lowercased question.
+_QUESTION_TABLE_TRIGGER_RE = re.compile(
+    "".join(
+        (
+            _question_trigger_lookahead("micro", _literal_alternation(_MICRO_QUESTION_TRIGGERS)),
+            _question_trigger_lookahead("chart", "chart"),
+            _question_trigger_lookahead("lab", f"(?i:{_LAB_INTENT_RE.pattern})"),
+            _question_trigger_lookahead("services", "service"),
+            _question_trigger_lookahead("prescriptions", _literal_alternation(_PRESCRIPTIONS_QUESTION_TRIGGERS)),
+            _question_trigger_lookahead("inputevents", _literal_alternation(_INPUTEVENTS_QUESTION_TRIGGERS)),
+            _question_trigger_lookahead("outputevents", _literal_alternation(_OUTPUTEVENTS_QUESTION_TRIGGERS)),
+            _question_trigger_lookahead("emar", _literal_alternation(_EMAR_QUESTION_TRIGGERS)),
+            _question_trigger_lookahead("diagnoses", "diagnos"),
+            _question_trigger_lookahead("procedures", "procedur"),
+        )
+    )
+)
+
+
+def _question_table_triggers(question: str) -> set[str]:
+    match = _QUESTION_TABLE_TRIGGER_RE.match(_lower_question(question or ""))
+    if not match:
+        return set()
+    return {name for name, value in match.groupdict().items() if value is not None}
+
+
+def _ensure_microbiology_table(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
 
-    if re.search(r"\bMICROBIOLOGYEVENTS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "MICROBIOLOGYEVENTS"):
+        return text, _NO_RULES
 
-    needed = [c for c in _micro_only_cols() if re.search(rf"(?<!\.)\b{c}\b", text, re.IGNORECASE)]
+    needed = _find_unqualified_cols(text, _micro_only_cols())
     if not needed:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     base_table = m.group(1)
     base_alias = m.group(2) or base_table
     if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
@@ -1115,729 +1406,801 @@ def _ensure_microbiology_table(sql: str) -> tuple[str, list[str]]:
     replacement = "FROM MICROBIOLOGYEVENTS"
     if m.group(2):
         replacement = f"FROM MICROBIOLOGYEVENTS {base_alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_microbiology_table")
     return text, rules
 
 
-def _ensure_microbiology_by_question(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_microbiology_by_question(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bMICROBIOLOGYEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
-    if not any(k in q for k in ("micro", "microbiology", "organism", "antibiotic", "culture", "specimen")):
-        return text, rules
+    if _sql_mentions(text, "MICROBIOLOGYEVENTS"):
+        return text, _NO_RULES
+    q = _lower_question(question)
+    if not _MICRO_QUESTION_TRIGGER_RE.search(q):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM MICROBIOLOGYEVENTS"
     if alias:
         replacement = f"FROM MICROBIOLOGYEVENTS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_microbiology_by_question")
     return text, rules
 
 
-def _ensure_icustays_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_icustays_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "ICUSTAYS"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     icu_only = "icu stay" in q or "icu stays" in q or ("icu" in q and "los" in q)
     if "admission" in q or "admissions" in q or "patient" in q or "patients" in q:
         icu_only = False
 
     # INTIME/OUTTIME are shared with TRANSFERS and should not alone force ICUSTAYS.
-    icu_cols = {"FIRST_CAREUNIT", "LAST_CAREUNIT", "LOS", "STAY_ID"}
-    has_icu_cols = any(re.search(rf"(?<!\.)\b{c}\b", text, re.IGNORECASE) for c in icu_cols)
+    has_icu_cols = bool(_find_unqualified_cols(text, ("FIRST_CAREUNIT", "LAST_CAREUNIT", "LOS", "STAY_ID")))
     if not icu_only and not has_icu_cols:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM ICUSTAYS"
     if alias:
         replacement = f"FROM ICUSTAYS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_icustays_table")
     return text, rules
 
 
-def _ensure_chartevents_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_chartevents_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "CHARTEVENTS"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     if "chart event" not in q and "chart events" not in q and "chart" not in q:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM CHARTEVENTS"
     if alias:
         replacement = f"FROM CHARTEVENTS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_chartevents_table")
     return text, rules
 
 
-def _ensure_chart_label(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_chart_label(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "label" not in q or "chart" not in q:
-        return text, rules
-    if re.search(r"\bD_ITEMS\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "D_ITEMS"):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "CHARTEVENTS"):
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, "CHARTEVENTS") or "CHARTEVENTS"
     label_alias = _next_join_alias(text, "d")
     join_clause = f" JOIN D_ITEMS {label_alias} ON {alias}.ITEMID = {label_alias}.ITEMID"
     text = _insert_join(text, join_clause)
-    text = re.sub(r"(?<!\.)\bLABEL\b", f"{label_alias}.LABEL", text, flags=re.IGNORECASE)
+    text, _ = _sub_unqualified(text, "LABEL", f"{label_alias}.LABEL")
+    rules: list[str] = []
     rules.append("force_chart_label")
     return text, rules
 
 
-def _ensure_labevents_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_labevents_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "LABEVENTS"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     if not _has_lab_intent(q):
-        return text, rules
+        return text, _NO_RULES
     if "micro" in q or "microbiology" in q:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM LABEVENTS"
     if alias:
         replacement = f"FROM LABEVENTS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_labevents_table")
     return text, rules
 
 
-def _ensure_lab_label(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_lab_label(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "label" not in q or not _has_lab_intent(q):
-        return text, rules
-    if re.search(r"\bD_LABITEMS\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "D_LABITEMS"):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "LABEVENTS"):
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, "LABEVENTS") or "LABEVENTS"
     label_alias = _next_join_alias(text, "d")
     join_clause = f" JOIN D_LABITEMS {label_alias} ON {alias}.ITEMID = {label_alias}.ITEMID"
     text = _insert_join(text, join_clause)
-    text = re.sub(r"(?<!\.)\bLABEL\b", f"{label_alias}.LABEL", text, flags=re.IGNORECASE)
+    text, _ = _sub_unqualified(text, "LABEL", f"{label_alias}.LABEL")
+    rules: list[str] = []
     rules.append("force_lab_label")
     return text, rules
 
 
-def _rewrite_label_field(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_UNQUALIFIED_ITEMID_OR_LABEL_RE = re.compile(r"(?<!\.)\b(?:(ITEMID)|LABEL)\b", re.IGNORECASE)
+
+
+def _qualify_label_refs(text: str, alias: str) -> str:
+    # Single pass over bare ITEMID/LABEL. An alias that is itself a bare LABEL
+    # gets qualified too, as a separate LABEL pass over the output would do.
+    label_ref = f"{alias}.LABEL"
+    itemid_ref = f"{label_ref}.LABEL" if _UNQUALIFIED_LABEL_RE.fullmatch(alias) else label_ref
+    return _UNQUALIFIED_ITEMID_OR_LABEL_RE.sub(
+        lambda match: itemid_ref if match.group(1) else label_ref,
+        text,
+    )
+
+
+def _rewrite_label_field(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "label" not in q:
-        return text, rules
+        return text, _NO_RULES
 
+    rules: list[str] = []
     if "chart" in q and "lab" not in q:
         alias = _find_table_alias(text, "D_ITEMS")
         if alias:
-            text = re.sub(r"(?<!\.)\bITEMID\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
-            text = re.sub(r"(?<!\.)\bLABEL\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
+            text = _qualify_label_refs(text, alias)
             rules.append("chart_label_itemid_to_label")
         return text, rules
 
     if "lab" in q or "laboratory" in q:
         alias = _find_table_alias(text, "D_LABITEMS")
         if alias:
-            text = re.sub(r"(?<!\.)\bITEMID\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
-            text = re.sub(r"(?<!\.)\bLABEL\b", f"{alias}.LABEL", text, flags=re.IGNORECASE)
+            text = _qualify_label_refs(text, alias)
             rules.append("lab_label_itemid_to_label")
     return text, rules
 
 
-def _ensure_prescriptions_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_prescriptions_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bPRESCRIPTIONS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "PRESCRIPTIONS"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     if "emar" in q or "ingredient" in q:
-        return text, rules
-    triggers = ("prescription", "drug", "medication", "doses", "formulation")
-    if not any(t in q for t in triggers):
-        return text, rules
+        return text, _NO_RULES
+    if not _PRESCRIPTIONS_QUESTION_TRIGGER_RE.search(q):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM PRESCRIPTIONS"
     if alias:
         replacement = f"FROM PRESCRIPTIONS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_prescriptions_table")
     return text, rules
 
 
-def _ensure_inputevents_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_inputevents_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bINPUTEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
-    triggers = ("input event", "input events", "input amount", "intake", "fluid intake", "infusion", "infusions")
-    if not any(t in q for t in triggers):
-        return text, rules
+    if _sql_mentions(text, "INPUTEVENTS"):
+        return text, _NO_RULES
+    q = _lower_question(question)
+    if not _INPUTEVENTS_QUESTION_TRIGGER_RE.search(q):
+        return text, _NO_RULES
     if "ingredient" in q:
-        return text, rules
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM INPUTEVENTS"
     if alias:
         replacement = f"FROM INPUTEVENTS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_inputevents_table")
     return text, rules
 
 
-def _ensure_outputevents_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_outputevents_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bOUTPUTEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
-    triggers = ("output event", "output events", "output value", "output volume", "urine output", "drain output")
-    if not any(t in q for t in triggers):
-        return text, rules
+    if _sql_mentions(text, "OUTPUTEVENTS"):
+        return text, _NO_RULES
+    q = _lower_question(question)
+    if not _OUTPUTEVENTS_QUESTION_TRIGGER_RE.search(q):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM OUTPUTEVENTS"
     if alias:
         replacement = f"FROM OUTPUTEVENTS {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_outputevents_table")
     return text, rules
 
 
-def _ensure_emar_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_emar_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
-    triggers = ("emar", "med admin", "medication administration", "administration record", "dose given", "dose due")
-    if not any(t in q for t in triggers):
-        return text, rules
+    q = _lower_question(question)
+    if not _EMAR_QUESTION_TRIGGER_RE.search(q):
+        return text, _NO_RULES
 
-    detail_triggers = ("detail", "administration type", "dose given", "dose due", "barcode")
-    target = "EMAR_DETAIL" if any(t in q for t in detail_triggers) else "EMAR"
-    if re.search(rf"\b{target}\b", text, re.IGNORECASE):
-        return text, rules
+    target = "EMAR_DETAIL" if _EMAR_DETAIL_QUESTION_TRIGGER_RE.search(q) else "EMAR"
+    if _sql_mentions(text, target):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = f"FROM {target}"
     if alias:
         replacement = f"FROM {target} {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append(f"force_{target.lower()}_table")
     return text, rules
 
 
-def _ensure_diagnoses_icd_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_diagnoses_icd_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "diagnos" not in q:
-        return text, rules
+        return text, _NO_RULES
     if "title" in q:
-        return text, rules
-    if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "DIAGNOSES_ICD"):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM DIAGNOSES_ICD"
     if alias:
         replacement = f"FROM DIAGNOSES_ICD {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_diagnoses_icd_table")
     return text, rules
 
 
-def _ensure_procedures_icd_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_procedures_icd_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "procedur" not in q:
-        return text, rules
+        return text, _NO_RULES
     if "title" in q:
-        return text, rules
+        return text, _NO_RULES
     if "procedure event" in q or "procedureevents" in q:
-        return text, rules
-    if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "PROCEDURES_ICD"):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM PROCEDURES_ICD"
     if alias:
         replacement = f"FROM PROCEDURES_ICD {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_procedures_icd_table")
     return text, rules
 
 
-def _rewrite_prescriptions_drug_field(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_prescriptions_drug_field(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bPRESCRIPTIONS\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
+    if not _sql_mentions(text, "PRESCRIPTIONS"):
+        return text, _NO_RULES
+    q = _lower_question(question)
     if "drug" not in q and "medication" not in q:
-        return text, rules
+        return text, _NO_RULES
 
-    if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
-        text = re.sub(r"(?<!\.)\bITEMID\b", "DRUG", text, flags=re.IGNORECASE)
+    text, count = _sub_unqualified(text, "ITEMID", "DRUG")
+    rules: list[str] = []
+    if count:
         rules.append("prescriptions_itemid_to_drug")
     return text, rules
 
 
+_PRESCRIPTIONS_QUALIFIED_COL_RE = re.compile(r"\b([A-Za-z0-9_]+)\.(?:(MEDICATION)|CHARTTIME)\b", re.IGNORECASE)
+_PRESCRIPTIONS_UNQUALIFIED_COL_RE = re.compile(r"(?<!\.)\b(?:(MEDICATION)|CHARTTIME)\b", re.IGNORECASE)
+_EMAR_OR_DETAIL_RE = re.compile(r"\bEMAR(?:_DETAIL)?\b", re.IGNORECASE)
+_PRESCRIPTIONS_COL_MAP = {"MEDICATION": "DRUG", "CHARTTIME": "STARTTIME"}
+
+
 def _rewrite_prescriptions_columns(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
 
-    aliases: set[str] = {"PRESCRIPTIONS"}
-    for m in re.finditer(
-        r"\b(?:FROM|JOIN)\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        text,
-        re.IGNORECASE,
-    ):
-        alias = m.group(1)
-        if alias and alias.upper() not in {"ON", "WHERE", "JOIN", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL"}:
-            aliases.add(alias)
+    aliases_upper = _table_alias_refs(text, "PRESCRIPTIONS")
 
-    aliases_upper = {a.upper() for a in aliases}
+    qualified_fired: set[str] = set()
 
-    def replace_qualified(col: str, repl: str) -> bool:
-        nonlocal text
-        changed = False
-
-        def _repl(match: re.Match) -> str:
-            nonlocal changed
-            alias = match.group(1)
-            if alias.upper() in aliases_upper:
-                changed = True
-                return f"{alias}.{repl}"
+    def _repl_qualified(match: re.Match) -> str:
+        alias = match.group(1)
+        if alias.upper() not in aliases_upper:
             return match.group(0)
+        col = "MEDICATION" if match.group(2) else "CHARTTIME"
+        qualified_fired.add(col)
+        return f"{alias}.{_PRESCRIPTIONS_COL_MAP[col]}"
 
-        text = re.sub(
-            rf"\b([A-Za-z0-9_]+)\.{col}\b",
-            _repl,
-            text,
-            flags=re.IGNORECASE,
-        )
-        return changed
-
-    if replace_qualified("MEDICATION", "DRUG"):
+    text = _PRESCRIPTIONS_QUALIFIED_COL_RE.sub(_repl_qualified, text)
+    if "MEDICATION" in qualified_fired:
         rules.append("prescriptions_medication_to_drug")
-    if replace_qualified("CHARTTIME", "STARTTIME"):
+    if "CHARTTIME" in qualified_fired:
         rules.append("prescriptions_charttime_to_starttime")
 
     # If EMAR is absent, unqualified MEDICATION/CHARTTIME in PRESCRIPTIONS context should map to DRUG/STARTTIME.
-    has_emar = re.search(r"\bEMAR(?:_DETAIL)?\b", text, re.IGNORECASE) is not None
-    if not has_emar:
-        if re.search(r"(?<!\.)\bMEDICATION\b", text, re.IGNORECASE):
-            text = re.sub(r"(?<!\.)\bMEDICATION\b", "DRUG", text, flags=re.IGNORECASE)
+    if not _EMAR_OR_DETAIL_RE.search(text):
+        unqualified_fired: set[str] = set()
+
+        def _repl_unqualified(match: re.Match) -> str:
+            col = "MEDICATION" if match.group(1) else "CHARTTIME"
+            unqualified_fired.add(col)
+            return _PRESCRIPTIONS_COL_MAP[col]
+
+        text = _PRESCRIPTIONS_UNQUALIFIED_COL_RE.sub(_repl_unqualified, text)
+        if "MEDICATION" in unqualified_fired:
             rules.append("prescriptions_unqualified_medication_to_drug")
-        if re.search(r"(?<!\.)\bCHARTTIME\b", text, re.IGNORECASE):
-            text = re.sub(r"(?<!\.)\bCHARTTIME\b", "STARTTIME", text, flags=re.IGNORECASE)
+        if "CHARTTIME" in unqualified_fired:
             rules.append("prescriptions_unqualified_charttime_to_starttime")
 
     return text, rules
 
 
-def _rewrite_icd_code_field(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_icd_code_field(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "code" not in q:
-        return text, rules
+        return text, _NO_RULES
 
-    if "diagnos" in q and re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
-        if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
-            text = re.sub(r"(?<!\.)\bITEMID\b", "ICD_CODE", text, flags=re.IGNORECASE)
+    rules: list[str] = []
+    if "diagnos" in q and _sql_mentions(text, "DIAGNOSES_ICD"):
+        text, count = _sub_unqualified(text, "ITEMID", "ICD_CODE")
+        if count:
             rules.append("diagnoses_itemid_to_icd_code")
         return text, rules
 
-    if "procedur" in q and re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
-        if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
-            text = re.sub(r"(?<!\.)\bITEMID\b", "ICD_CODE", text, flags=re.IGNORECASE)
+    if "procedur" in q and _sql_mentions(text, "PROCEDURES_ICD"):
+        text, count = _sub_unqualified(text, "ITEMID", "ICD_CODE")
+        if count:
             rules.append("procedures_itemid_to_icd_code")
     return text, rules
 
 
+def _itemid_ref_to_icd_code(match: re.Match) -> str:
+    alias = match.group(1)
+    if alias is None:
+        return "ICD_CODE"
+    # An alias that is itself a bare ITEMID gets rewritten too.
+    alias_hit = _UNQUALIFIED_ITEMID_RE.match(match.string, match.start(1))
+    if alias_hit and alias_hit.end() == match.end(1):
+        alias = "ICD_CODE"
+    return f"{alias}.ICD_CODE"
+
+
 def _rewrite_itemid_in_icd_tables(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE) or re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
-        if re.search(r"\bITEMID\b", text, re.IGNORECASE):
-            text = re.sub(r"(?<!\.)\bITEMID\b", "ICD_CODE", text, flags=re.IGNORECASE)
-            text = re.sub(r"\b([A-Za-z0-9_]+)\.ITEMID\b", r"\1.ICD_CODE", text, flags=re.IGNORECASE)
+    if _sql_mentions(text, "DIAGNOSES_ICD") or _sql_mentions(text, "PROCEDURES_ICD"):
+        if _sql_mentions(text, "ITEMID"):
+            text = _ITEMID_REF_RE.sub(_itemid_ref_to_icd_code, text)
             rules.append("icd_tables_itemid_to_icd_code")
     return text, rules
 
 
-def _rewrite_emar_medication_field(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_emar_medication_field(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bEMAR\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
+    if not _sql_mentions(text, "EMAR"):
+        return text, _NO_RULES
+    q = _lower_question(question)
     if "medication" not in q and "drug" not in q:
-        return text, rules
+        return text, _NO_RULES
 
-    if re.search(r"(?<!\.)\bITEMID\b", text, re.IGNORECASE):
-        text = re.sub(r"(?<!\.)\bITEMID\b", "MEDICATION", text, flags=re.IGNORECASE)
+    text, count = _sub_unqualified(text, "ITEMID", "MEDICATION")
+    rules: list[str] = []
+    if count:
         rules.append("emar_itemid_to_medication")
     return text, rules
 
 
-def _ensure_diagnosis_title_join(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+# Column rewriters in pipeline order, keyed by a mask of the words (see _scan_sql_token_mask)
+# of which the SQL must contain at least one for the rewriter to change anything.
+_SQL_FIELD_REWRITERS: tuple[tuple[int, Callable[[str, str], tuple[str, Sequence[str]]]], ...] = (
+    (_sql_word_mask("PRESCRIPTIONS"), _rewrite_prescriptions_drug_field),
+    (_sql_word_mask("MEDICATION", "CHARTTIME"), lambda question, sql: _rewrite_prescriptions_columns(sql)),
+    (_sql_word_mask("DIAGNOSES_ICD", "PROCEDURES_ICD"), _rewrite_icd_code_field),
+    (_sql_word_mask("DIAGNOSES_ICD", "PROCEDURES_ICD"), lambda question, sql: _rewrite_itemid_in_icd_tables(sql)),
+    (_sql_word_mask("EMAR"), _rewrite_emar_medication_field),
+)
+
+
+_FROM_D_ICD_DIAGNOSES_RE = re.compile(r"\bfrom\s+D_ICD_DIAGNOSES\b(?:\s+[A-Za-z0-9_]+)?", re.IGNORECASE)
+
+
+def _ensure_diagnosis_title_join(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "diagnos" not in q or "title" not in q:
-        return text, rules
-    if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\bD_ICD_DIAGNOSES\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "DIAGNOSES_ICD"):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "D_ICD_DIAGNOSES"):
+        return text, _NO_RULES
 
     replacement = (
         "FROM DIAGNOSES_ICD dx JOIN D_ICD_DIAGNOSES d "
         "ON dx.ICD_CODE = d.ICD_CODE AND dx.ICD_VERSION = d.ICD_VERSION"
     )
-    text = re.sub(
-        r"\bfrom\s+D_ICD_DIAGNOSES\b(?:\s+[A-Za-z0-9_]+)?",
-        replacement,
-        text,
-        count=1,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+    text = _FROM_D_ICD_DIAGNOSES_RE.sub(replacement, text, count=1)
+    text, _ = _sub_unqualified(text, "LONG_TITLE", "d.LONG_TITLE")
+    rules: list[str] = []
     rules.append("diagnosis_title_join")
     return text, rules
 
 
-def _ensure_procedure_title_join(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_procedure_title_join(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "procedur" not in q or "title" not in q:
-        return text, rules
-    if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if _sql_mentions(text, "PROCEDURES_ICD"):
+        return text, _NO_RULES
 
     replacement = (
         "FROM PROCEDURES_ICD p JOIN D_ICD_PROCEDURES d "
         "ON p.ICD_CODE = d.ICD_CODE AND p.ICD_VERSION = d.ICD_VERSION"
     )
-    text = re.sub(
-        r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?",
-        replacement,
-        text,
-        count=1,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+    m = _first_from_table(text)
+    if m:
+        text = _replace_from_table(text, m, replacement)
+    text, _ = _sub_unqualified(text, "LONG_TITLE", "d.LONG_TITLE")
+    rules: list[str] = []
     rules.append("procedure_title_join")
     return text, rules
 
 
-def _cleanup_procedure_title_joins(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_ITEMID_OR_TO_NUMBER_RE = re.compile(r"\b(ITEMID|TO_NUMBER)\b", re.IGNORECASE)
+_PROCEDURE_TITLE_JOIN_SEGMENT_RE = re.compile(
+    r"\bJOIN\s+D_ICD_PROCEDURES\b(?:(?!\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b).)*",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _cleanup_procedure_title_joins(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bD_ICD_PROCEDURES\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\b(ITEMID|TO_NUMBER)\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "D_ICD_PROCEDURES"):
+        return text, _NO_RULES
+    if not _ITEMID_OR_TO_NUMBER_RE.search(text):
+        return text, _NO_RULES
 
-    pattern = re.compile(r"\bJOIN\s+D_ICD_PROCEDURES\b", re.IGNORECASE)
-    pos = 0
-    while True:
-        m = pattern.search(text, pos)
-        if not m:
-            break
-        start = m.start()
-        tail = text[m.end():]
-        end_match = re.search(r"\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b", tail, re.IGNORECASE)
-        end = m.end() + (end_match.start() if end_match else len(tail))
-        segment = text[start:end]
-        if re.search(r"\bITEMID\b|\bTO_NUMBER\b", segment, re.IGNORECASE):
-            text = text[:start] + " " + text[end:]
+    rules: list[str] = []
+    def _drop_bad_join(match: re.Match) -> str:
+        segment = match.group(0)
+        if _ITEMID_OR_TO_NUMBER_RE.search(segment):
             rules.append("drop_bad_d_icd_procedures_join")
-            pos = start
-        else:
-            pos = end
+            return " "
+        return segment
+
+    text = _PROCEDURE_TITLE_JOIN_SEGMENT_RE.sub(_drop_bad_join, text)
     return text, rules
 
 
-def _ensure_services_table(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_services_table(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bSERVICES\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "SERVICES"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     if "service" not in q:
-        return text, rules
+        return text, _NO_RULES
     if "order" in q or "poe" in q:
-        return text, rules
+        return text, _NO_RULES
 
-    if not re.search(r"\b(CURR_SERVICE|PREV_SERVICE)\b", text, re.IGNORECASE) and "current service" not in q:
-        return text, rules
+    if not _sql_mentions_any(text, ("CURR_SERVICE", "PREV_SERVICE")) and "current service" not in q:
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     alias = m.group(2)
     replacement = "FROM SERVICES"
     if alias:
         replacement = f"FROM SERVICES {alias}"
-    text = re.sub(r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?", replacement, text, count=1, flags=re.IGNORECASE)
+    text = _replace_from_table(text, m, replacement)
+    rules: list[str] = []
     rules.append("force_services_table")
     return text, rules
 
 
-def _ensure_transfers_eventtype(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+# Table-forcing rewriters in pipeline order, keyed by the question trigger each
+# one requires (None: depends on the SQL as well, always run).
+_QUESTION_TABLE_REWRITERS: tuple[tuple[str | None, Callable[[str, str], tuple[str, Sequence[str]]]], ...] = (
+    ("micro", _ensure_microbiology_by_question),
+    (None, _ensure_icustays_table),
+    ("chart", _ensure_chartevents_table),
+    ("lab", _ensure_labevents_table),
+    ("services", _ensure_services_table),
+    ("prescriptions", _ensure_prescriptions_table),
+    ("inputevents", _ensure_inputevents_table),
+    ("outputevents", _ensure_outputevents_table),
+    ("emar", _ensure_emar_table),
+    ("diagnoses", _ensure_diagnoses_icd_table),
+    ("procedures", _ensure_procedures_icd_table),
+)
+
+
+def _ensure_transfers_eventtype(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "transfer" not in q:
-        return text, rules
+        return text, _NO_RULES
     if "event type" not in q and "eventtype" not in q:
-        return text, rules
+        return text, _NO_RULES
 
-    if re.search(r"\bSERVICES\b", text, re.IGNORECASE) or re.search(
-        r"\b(CURR_SERVICE|PREV_SERVICE|ORDER_TYPE)\b", text, re.IGNORECASE
-    ):
-        m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    rules: list[str] = []
+    if _sql_mentions(text, "SERVICES") or _sql_mentions_any(text, _SERVICE_COLUMN_NAMES):
+        m = _first_from_table(text)
         if m:
             alias = m.group(2)
             replacement = "FROM TRANSFERS"
             if alias:
                 replacement = f"FROM TRANSFERS {alias}"
-            text = re.sub(
-                r"\bfrom\s+[A-Za-z0-9_]+(?:\s+[A-Za-z0-9_]+)?",
-                replacement,
-                text,
-                count=1,
-                flags=re.IGNORECASE,
-            )
+            text = _replace_from_table(text, m, replacement)
             rules.append("force_transfers_table")
 
-    if re.search(r"(?<!\.)\b(CURR_SERVICE|PREV_SERVICE|ORDER_TYPE)\b", text, re.IGNORECASE):
-        text = re.sub(
-            r"(?<!\.)\b(CURR_SERVICE|PREV_SERVICE|ORDER_TYPE)\b",
-            "EVENTTYPE",
-            text,
-            flags=re.IGNORECASE,
-        )
-        rules.append("eventtype_from_transfers")
+    if _sql_mentions_any(text, _SERVICE_COLUMN_NAMES):
+        text, count = _UNQUALIFIED_SERVICE_COLUMN_RE.subn("EVENTTYPE", text)
+        if count:
+            rules.append("eventtype_from_transfers")
     return text, rules
 
 
-def _rewrite_services_order_type(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_QUALIFIED_CAREUNIT_RE = re.compile(r"\b([A-Za-z0-9_]+)\.CAREUNIT\b", re.IGNORECASE)
+_QUALIFIED_FIRST_LAST_CAREUNIT_RE = re.compile(r"\b([A-Za-z0-9_]+)\.(FIRST_CAREUNIT|LAST_CAREUNIT)\b", re.IGNORECASE)
+_UNQUALIFIED_FIRST_LAST_CAREUNIT_RE = re.compile(r"(?<!\.)\b(FIRST_CAREUNIT|LAST_CAREUNIT)\b", re.IGNORECASE)
+_NULL_PREDICATES_BEFORE_GROUP_BY_RE = re.compile(
+    r"\b([A-Za-z0-9_\.]+(?:\s+IS\s+NOT\s+NULL|\s+IS\s+NULL)"
+    r"(?:\s+AND\s+[A-Za-z0-9_\.]+(?:\s+IS\s+NOT\s+NULL|\s+IS\s+NULL))*)\s+GROUP\s+BY\b",
+    re.IGNORECASE,
+)
+_OUTTIME_MINUS_INTIME_RE = re.compile(
+    r"CAST\(([^)]+OUTTIME[^)]*)\s+AS\s+DATE\)\s*-\s*CAST\(([^)]+INTIME[^)]*)\s+AS\s+DATE\)",
+    re.IGNORECASE,
+)
+_INTIME_MINUS_OUTTIME_RE = re.compile(
+    r"CAST\(([^)]+INTIME[^)]*)\s+AS\s+DATE\)\s*-\s*CAST\(([^)]+OUTTIME[^)]*)\s+AS\s+DATE\)",
+    re.IGNORECASE,
+)
+_UNQUALIFIED_MICRO_ID_COLS_RE = re.compile(
+    r"(?<!\.)\b(MICROEVENT_ID|MICRO_SPECIMEN_ID|ITEMID|TEST_ITEMID|ORG_ITEMID|AB_ITEMID)\b",
+    re.IGNORECASE,
+)
+_GROUP_BY_TAIL_RE = re.compile(r"\bGROUP\s+BY\s+(.*)", re.IGNORECASE)
+_ADMISSION_LENGTH_COLUMNS = ("ADMISSION_LENGTH", "ADMISSION_DAYS")
+_UNQUALIFIED_ADMISSION_LENGTH_RE = re.compile(r"(?<!\.)\b(ADMISSION_LENGTH|ADMISSION_DAYS)\b", re.IGNORECASE)
+_DURATION_COLUMNS = ("DURATION_DAYS", "DURATION")
+_UNQUALIFIED_DURATION_RE = re.compile(r"(?<!\.)\b(DURATION_DAYS|DURATION)\b", re.IGNORECASE)
+_AGG_FUNC_CALL_RE = re.compile(r"\b(COUNT|AVG|SUM|MIN|MAX)\s*\(")
+_BY_WORD_RE = re.compile(r"\bBY\b", re.IGNORECASE)
+_LEADING_WITH_RE = re.compile(r"^\s*WITH\b", re.IGNORECASE)
+_FROM_SUBQUERY_RE = re.compile(r"\bFROM\s*\(\s*SELECT\b", re.IGNORECASE)
+_ORDER_BY_TAIL_RE = re.compile(r"(\border\s+by\b[^;]*)", re.IGNORECASE)
+_GROUPED_EVENT_TABLE_RE = re.compile(r"\b(PRESCRIPTIONS|INPUTEVENTS|OUTPUTEVENTS)\b")
+_GROUPED_ROWNUM_CAP_SUBS = (
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+", re.IGNORECASE), "WHERE "),
+    (re.compile(r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+", re.IGNORECASE), " AND "),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+GROUP\s+BY\b", re.IGNORECASE), "GROUP BY"),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+ORDER\s+BY\b", re.IGNORECASE), "ORDER BY"),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\b", re.IGNORECASE), ""),
+    (re.compile(r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\b", re.IGNORECASE), ""),
+)
+_GROUPED_ROWNUM_CAP_RE = re.compile(
+    r"(?P<wa>\bWHERE\s+ROWNUM\s*<=\s*(?P<wa_n>\d+)\s+AND\s+)"
+    r"|(?P<aa>\s+AND\s+ROWNUM\s*<=\s*(?P<aa_n>\d+)\s+AND\s+)"
+    r"|(?P<wg>\bWHERE\s+ROWNUM\s*<=\s*(?P<wg_n>\d+)\s+GROUP\s+BY\b)"
+    r"|(?P<wo>\bWHERE\s+ROWNUM\s*<=\s*(?P<wo_n>\d+)\s+ORDER\s+BY\b)"
+    r"|(?P<wb>\bWHERE\s+ROWNUM\s*<=\s*(?P<wb_n>\d+)\b)"
+    r"|(?P<ab>\s+AND\s+ROWNUM\s*<=\s*(?P<ab_n>\d+)\b)",
+    re.IGNORECASE,
+)
+_GROUPED_ROWNUM_CAP_REPLACEMENTS = {
+    "wa": "WHERE ",
+    "aa": " AND ",
+    "wg": "GROUP BY",
+    "wo": "ORDER BY",
+    "wb": "",
+    "ab": "",
+}
+_MICRO_ROWNUM_CAP_SUBS = (
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+", re.IGNORECASE), "WHERE "),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+GROUP\s+BY\b", re.IGNORECASE), "GROUP BY"),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+ORDER\s+BY\b", re.IGNORECASE), "ORDER BY"),
+    (re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*\d+\b", re.IGNORECASE), ""),
+)
+_MICRO_ROWNUM_CAP_RE = re.compile(
+    r"\bWHERE\s+ROWNUM\s*<=\s*\d+"
+    r"(?:(?P<and>\s+AND\s+)|(?P<group>\s+GROUP\s+BY\b)|(?P<order>\s+ORDER\s+BY\b)|\b)",
+    re.IGNORECASE,
+)
+_MICRO_ROWNUM_CAP_REPLACEMENTS = {"and": "WHERE ", "group": "GROUP BY", "order": "ORDER BY", None: ""}
+
+
+@lru_cache(maxsize=64)
+def _word_re(word: str) -> re.Pattern[str]:
+    return re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _upper_word_re(word: str) -> re.Pattern[str]:
+    return re.compile(rf"\b{re.escape(word)}\b")
+
+
+@lru_cache(maxsize=64)
+def _words_re(words: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b", re.IGNORECASE)
+
+
+def _mentions_word(sql: str, word: str) -> bool:
+    if sql.isascii() and word.isascii():
+        upper = _upper_sql(sql)
+        upper_word = word.upper()
+        return upper_word in upper and _upper_word_re(upper_word).search(upper) is not None
+    return _word_re(word).search(sql) is not None
+
+
+def _rewrite_services_order_type(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bSERVICES\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"(?<!\.)\bORDER_TYPE\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "SERVICES"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     target = "CURR_SERVICE"
     if "previous service" in q or "prev service" in q or "prior service" in q:
         target = "PREV_SERVICE"
     elif "current service" in q:
         target = "CURR_SERVICE"
-    text = re.sub(r"(?<!\.)\bORDER_TYPE\b", target, text, flags=re.IGNORECASE)
+    text, count = _sub_unqualified(text, "ORDER_TYPE", target)
+    if not count:
+        return sql, _NO_RULES
+    rules: list[str] = []
     rules.append("services_order_type_to_curr_prev")
     return text, rules
 
 
-def _rewrite_icustays_careunit(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_icustays_careunit(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\bCAREUNIT\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "ICUSTAYS"):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "CAREUNIT"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     target = "FIRST_CAREUNIT"
     if "last careunit" in q or "last care unit" in q:
         target = "LAST_CAREUNIT"
     elif "first careunit" in q or "first care unit" in q:
         target = "FIRST_CAREUNIT"
 
-    aliases: set[str] = {"ICUSTAYS"}
-    for m in re.finditer(
-        r"\b(?:FROM|JOIN)\s+ICUSTAYS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        text,
-        re.IGNORECASE,
-    ):
-        alias = m.group(1)
-        if alias and alias.upper() not in {"ON", "WHERE", "JOIN", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL"}:
-            aliases.add(alias)
-
-    aliases_upper = {a.upper() for a in aliases}
-    updated = re.sub(
-        r"\b([A-Za-z0-9_]+)\.CAREUNIT\b",
-        lambda m: f"{m.group(1)}.{target}" if m.group(1).upper() in aliases_upper else m.group(0),
-        text,
-        flags=re.IGNORECASE,
-    )
+    aliases_upper = _table_alias_refs(text, "ICUSTAYS")
+    updated = _requalify_alias_columns(text, aliases_upper, "CAREUNIT", target, _QUALIFIED_CAREUNIT_RE)
 
     # ICUSTAYS 단일 문맥일 때만 비한정 CAREUNIT을 FIRST/LAST로 보정
-    if not re.search(r"\bTRANSFERS\b", updated, re.IGNORECASE):
-        updated = re.sub(r"(?<!\.)\bCAREUNIT\b", target, updated, flags=re.IGNORECASE)
+    if not _sql_mentions(updated, "TRANSFERS"):
+        updated, _ = _sub_unqualified(updated, "CAREUNIT", target)
 
+    rules: list[str] = []
     if updated != text:
         text = updated
         rules.append("icustays_careunit_to_first_last")
     return text, rules
 
 
-def _rewrite_transfers_careunit_fields(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_transfers_careunit_fields(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bTRANSFERS\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\b(FIRST_CAREUNIT|LAST_CAREUNIT)\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "TRANSFERS"):
+        return text, _NO_RULES
+    if not _sql_mentions_any(text, ("FIRST_CAREUNIT", "LAST_CAREUNIT")):
+        return text, _NO_RULES
 
-    aliases: set[str] = {"TRANSFERS"}
-    for m in re.finditer(
-        r"\b(?:FROM|JOIN)\s+TRANSFERS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        text,
-        re.IGNORECASE,
-    ):
-        alias = m.group(1)
-        if alias and alias.upper() not in {"ON", "WHERE", "JOIN", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL"}:
-            aliases.add(alias)
-
-    aliases_upper = {a.upper() for a in aliases}
-    updated = re.sub(
-        r"\b([A-Za-z0-9_]+)\.(FIRST_CAREUNIT|LAST_CAREUNIT)\b",
-        lambda m: f"{m.group(1)}.CAREUNIT" if m.group(1).upper() in aliases_upper else m.group(0),
+    aliases_upper = _table_alias_refs(text, "TRANSFERS")
+    updated = _requalify_alias_columns(
         text,
-        flags=re.IGNORECASE,
+        aliases_upper,
+        "FIRST_CAREUNIT|LAST_CAREUNIT",
+        "CAREUNIT",
+        _QUALIFIED_FIRST_LAST_CAREUNIT_RE,
     )
 
     # TRANSFERS만 사용하는 문맥의 비한정 FIRST/LAST_CAREUNIT 보정
-    if not re.search(r"\bICUSTAYS\b", updated, re.IGNORECASE):
-        updated = re.sub(r"(?<!\.)\b(FIRST_CAREUNIT|LAST_CAREUNIT)\b", "CAREUNIT", updated, flags=re.IGNORECASE)
+    if not _sql_mentions(updated, "ICUSTAYS"):
+        updated = _UNQUALIFIED_FIRST_LAST_CAREUNIT_RE.sub("CAREUNIT", updated)
 
+    rules: list[str] = []
     if updated != text:
         text = updated
         rules.append("transfers_careunit_to_careunit")
     return text, rules
 
 
-def _strip_rownum_cap_for_micro_topk(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _strip_rownum_cap_for_micro_topk(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
     match = _OUTER_ROWNUM_RE.match(text)
     if not match:
-        return text, rules
+        return text, _NO_RULES
     inner = match.group(1)
     limit = match.group(2)
-    if not re.search(r"\bMICROBIOLOGYEVENTS\b", inner, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(inner, "MICROBIOLOGYEVENTS"):
+        return text, _NO_RULES
 
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+",
-        "WHERE ",
-        inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+GROUP\s+BY\b",
-        "GROUP BY",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+ORDER\s+BY\b",
-        "ORDER BY",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
-    new_inner = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*\d+\b",
-        "",
-        new_inner,
-        flags=re.IGNORECASE,
-    )
+    new_inner = inner
+    rownum_count = _upper_sql(inner).count("ROWNUM")
+    if rownum_count == 1:
+        new_inner = _MICRO_ROWNUM_CAP_RE.sub(lambda m: _MICRO_ROWNUM_CAP_REPLACEMENTS[m.lastgroup], inner)
+    elif rownum_count > 1:
+        for pattern, replacement in _MICRO_ROWNUM_CAP_SUBS:
+            new_inner = pattern.sub(replacement, new_inner)
 
+    rules: list[str] = []
     if new_inner != inner:
         text = f"SELECT * FROM ({new_inner.strip()}) WHERE ROWNUM <= {limit}"
         rules.append("strip_rownum_cap_for_micro_topk")
     return text, rules
 
 
-def _strip_rownum_cap_for_grouped_tables(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _strip_rownum_cap_for_grouped_tables(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    upper = text.upper()
+    upper = _upper_sql(text)
     if "GROUP BY" not in upper:
-        return text, rules
+        return text, _NO_RULES
 
-    if not re.search(r"\b(PRESCRIPTIONS|INPUTEVENTS|OUTPUTEVENTS)\b", upper):
-        return text, rules
+    if not _GROUPED_EVENT_TABLE_RE.search(upper):
+        return text, _NO_RULES
+    rownum_count = upper.count("ROWNUM")
+    if not rownum_count:
+        return text, _NO_RULES
+
+    changed = False
 
-    def _maybe_strip(match: re.Match, replacement: str) -> str:
+    def _maybe_strip(match: re.Match, limit_group: str | int, replacement: str) -> str:
         nonlocal changed
         try:
-            limit = int(match.group(1))
+            limit = int(match.group(limit_group))
         except (TypeError, ValueError):
             return match.group(0)
         if limit < 1000:
@@ -1845,186 +2208,144 @@ def _strip_rownum_cap_for_grouped_tables(sql: str) -> tuple[str, list[str]]:
         changed = True
         return replacement
 
-    changed = False
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+",
-        lambda m: _maybe_strip(m, "WHERE "),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\s+AND\s+",
-        lambda m: _maybe_strip(m, " AND "),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+GROUP\s+BY\b",
-        lambda m: _maybe_strip(m, "GROUP BY"),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\s+ORDER\s+BY\b",
-        lambda m: _maybe_strip(m, "ORDER BY"),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)\b",
-        lambda m: _maybe_strip(m, ""),
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\s+AND\s+ROWNUM\s*<=\s*(\d+)\b",
-        lambda m: _maybe_strip(m, ""),
-        text,
-        flags=re.IGNORECASE,
-    )
+    if rownum_count == 1:
+        # A single cap can only be consumed by one pattern, so one pass over the
+        # alternation (ordered like the sequential passes) gives the same result.
+        text = _GROUPED_ROWNUM_CAP_RE.sub(
+            lambda m: _maybe_strip(
+                m, f"{m.lastgroup}_n", _GROUPED_ROWNUM_CAP_REPLACEMENTS[m.lastgroup]
+            ),
+            text,
+        )
+    else:
+        for pattern, replacement in _GROUPED_ROWNUM_CAP_SUBS:
+            text = pattern.sub(lambda m: _maybe_strip(m, 1, replacement), text)
 
-    new_text, changed = text, changed
+    rules: list[str] = []
     if changed:
         rules.append("strip_rownum_cap_for_grouped_tables")
-    return new_text, rules
+    return text, rules
 
 
-def _pushdown_outer_predicates(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _pushdown_outer_predicates(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    pattern = re.compile(
-        r"^\s*SELECT\s+\*\s+FROM\s*\((SELECT .*?)\)\s*WHERE\s+(.+?)\s*;?\s*$",
-        re.IGNORECASE | re.DOTALL,
-    )
-    match = pattern.match(text)
+    if "ROWNUM" not in _upper_sql(text):
+        return text, _NO_RULES
+    match = _OUTER_SELECT_WHERE_RE.match(text)
     if not match:
-        return text, rules
+        return text, _NO_RULES
     inner = match.group(1)
     where_clause = match.group(2)
-    m_limit = re.search(r"\bROWNUM\s*<=\s*(\d+)\b", where_clause, re.IGNORECASE)
+    m_limit = _ROWNUM_LE_RE.search(where_clause)
     if not m_limit:
-        return text, rules
+        return text, _NO_RULES
     limit = m_limit.group(1)
-    pred = re.sub(r"\bROWNUM\s*<=\s*\d+\b", "", where_clause, flags=re.IGNORECASE)
-    pred = re.sub(r"\bAND\b\s*(\bAND\b)?", "AND", pred, flags=re.IGNORECASE)
+    pred = _ROWNUM_LE_RE.sub("", where_clause)
+    pred = _REPEATED_AND_RE.sub("AND", pred)
     pred = pred.strip()
-    pred = re.sub(r"^(AND|OR)\s+", "", pred, flags=re.IGNORECASE)
-    pred = re.sub(r"\s+(AND|OR)$", "", pred, flags=re.IGNORECASE)
+    pred = _LEADING_AND_OR_RE.sub("", pred)
+    pred = _TRAILING_AND_OR_RE.sub("", pred)
     pred = pred.strip()
     if not pred:
-        return text, rules
-
-    if re.search(r"\bwhere\b", inner, re.IGNORECASE):
-        inner = re.sub(r"\bwhere\b", f"WHERE {pred} AND", inner, count=1, flags=re.IGNORECASE)
-    elif re.search(r"\bgroup\s+by\b", inner, re.IGNORECASE):
-        inner = re.sub(r"\bgroup\s+by\b", f"WHERE {pred} GROUP BY", inner, count=1, flags=re.IGNORECASE)
-    elif re.search(r"\border\s+by\b", inner, re.IGNORECASE):
-        inner = re.sub(r"\border\s+by\b", f"WHERE {pred} ORDER BY", inner, count=1, flags=re.IGNORECASE)
+        return text, _NO_RULES
+
+    if _WHERE_KW_RE.search(inner):
+        inner = _WHERE_KW_RE.sub(f"WHERE {pred} AND", inner, count=1)
+    elif _GROUP_BY_KW_RE.search(inner):
+        inner = _GROUP_BY_KW_RE.sub(f"WHERE {pred} GROUP BY", inner, count=1)
+    elif _ORDER_BY_KW_RE.search(inner):
+        inner = _ORDER_BY_KW_RE.sub(f"WHERE {pred} ORDER BY", inner, count=1)
     else:
         inner = inner.rstrip(";") + f" WHERE {pred}"
 
     text = f"SELECT * FROM ({inner}) WHERE ROWNUM <= {limit}"
+    rules: list[str] = []
     rules.append("pushdown_outer_predicate")
     return text, rules
 
 
-def _fix_missing_where_predicate(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
+def _insert_missing_where(segment: str) -> str | None:
+    if _WHERE_KW_RE.search(segment):
+        return None
+    match = _NULL_PREDICATES_BEFORE_GROUP_BY_RE.search(segment)
+    if not match:
+        return None
+    predicate = match.group(1)
+    return segment.replace(f"{predicate} GROUP BY", f"WHERE {predicate} GROUP BY", 1)
 
-    def fix_segment(segment: str) -> tuple[str, bool]:
-        if re.search(r"\bwhere\b", segment, re.IGNORECASE):
-            return segment, False
-        match = re.search(
-            r"\b([A-Za-z0-9_\.]+(?:\s+IS\s+NOT\s+NULL|\s+IS\s+NULL)"
-            r"(?:\s+AND\s+[A-Za-z0-9_\.]+(?:\s+IS\s+NOT\s+NULL|\s+IS\s+NULL))*)\s+GROUP\s+BY\b",
-            segment,
-            re.IGNORECASE,
-        )
-        if not match:
-            return segment, False
-        predicate = match.group(1)
-        fixed = segment.replace(f"{predicate} GROUP BY", f"WHERE {predicate} GROUP BY", 1)
-        return fixed, True
+
+def _fix_missing_where_predicate(sql: str) -> tuple[str, Sequence[str]]:
+    text = sql
+    # The predicate pattern needs an IS [NOT] NULL run directly before GROUP BY.
+    upper = _upper_sql(text)
+    if "NULL" not in upper or "GROUP" not in upper:
+        return text, _NO_RULES
 
     match = _OUTER_ROWNUM_RE.match(text)
+    segment = match.group(1) if match else text
+    fixed = _insert_missing_where(segment)
+    if fixed is None:
+        return text, _NO_RULES
     if match:
-        inner = match.group(1)
-        limit = match.group(2)
-        fixed_inner, changed = fix_segment(inner)
-        if changed:
-            text = f"SELECT * FROM ({fixed_inner}) WHERE ROWNUM <= {limit}"
-            rules.append("insert_missing_where_predicate")
-        return text, rules
-
-    fixed_text, changed = fix_segment(text)
-    if changed:
-        rules.append("insert_missing_where_predicate")
-    return fixed_text, rules
+        fixed = f"SELECT * FROM ({fixed}) WHERE ROWNUM <= {match.group(2)}"
+    rules: list[str] = []
+    rules.append("insert_missing_where_predicate")
+    return fixed, rules
 
 
-def _rewrite_icustays_los(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_icustays_los(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "ICUSTAYS"):
+        return text, _NO_RULES
 
-    pattern = re.compile(
-        r"CAST\(([^)]+OUTTIME[^)]*)\s+AS\s+DATE\)\s*-\s*CAST\(([^)]+INTIME[^)]*)\s+AS\s+DATE\)",
-        re.IGNORECASE,
-    )
-    new_text = pattern.sub("LOS", text)
+    new_text = _OUTTIME_MINUS_INTIME_RE.sub("LOS", text)
+    rules: list[str] = []
     if new_text != text:
         rules.append("icustays_diff_to_los")
         return new_text, rules
 
-    pattern_rev = re.compile(
-        r"CAST\(([^)]+INTIME[^)]*)\s+AS\s+DATE\)\s*-\s*CAST\(([^)]+OUTTIME[^)]*)\s+AS\s+DATE\)",
-        re.IGNORECASE,
-    )
-    new_text = pattern_rev.sub("LOS", text)
-    if new_text != text:
+    new_text, count = _INTIME_MINUS_OUTTIME_RE.subn("LOS", text)
+    if count:
         rules.append("icustays_diff_to_los")
         return new_text, rules
     return text, rules
 
 
-def _rewrite_warning_flag(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_warning_flag(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "warning" not in q:
-        return text, rules
-    if not re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"(?<!\.)\bSTATUSDESCRIPTION\b", text, re.IGNORECASE):
-        return text, rules
-    text = re.sub(r"(?<!\.)\bSTATUSDESCRIPTION\b", "WARNING", text, flags=re.IGNORECASE)
+        return text, _NO_RULES
+    if not _sql_mentions(text, "CHARTEVENTS"):
+        return text, _NO_RULES
+    text, count = _sub_unqualified(text, "STATUSDESCRIPTION", "WARNING")
+    if not count:
+        return sql, _NO_RULES
+    rules: list[str] = []
     rules.append("warning_flag_from_chartevents")
     return text, rules
 
 
-def _rewrite_lab_priority(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_lab_priority(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     if "priority" not in q:
-        return text, rules
-    if not re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    if re.search(r"(?<!\.)\bPRIORITY\b", text, re.IGNORECASE):
-        return text, rules
-    text = re.sub(r"(?<!\.)\bSPEC_TYPE_DESC\b", "PRIORITY", text, flags=re.IGNORECASE)
+        return text, _NO_RULES
+    if not _sql_mentions(text, "LABEVENTS"):
+        return text, _NO_RULES
+    if _has_unqualified(text, "PRIORITY"):
+        return text, _NO_RULES
+    text, _ = _sub_unqualified(text, "SPEC_TYPE_DESC", "PRIORITY")
+    rules: list[str] = []
     rules.append("lab_priority_from_labevents")
     return text, rules
 
 
-def _rewrite_micro_count_field(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_micro_count_field(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bMICROBIOLOGYEVENTS\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
+    if not _sql_mentions(text, "MICROBIOLOGYEVENTS"):
+        return text, _NO_RULES
+    q = _lower_question(question)
     target = None
     if "antibiotic" in q:
         target = "AB_NAME"
@@ -2033,123 +2354,138 @@ def _rewrite_micro_count_field(question: str, sql: str) -> tuple[str, list[str]]
     elif "test" in q:
         target = "TEST_NAME"
     if not target:
-        return text, rules
+        return text, _NO_RULES
 
     # Replace the selected/grouped field if it is a generic ID.
-    text = re.sub(
-        r"(?<!\.)\b(MICROEVENT_ID|MICRO_SPECIMEN_ID|ITEMID|TEST_ITEMID|ORG_ITEMID|AB_ITEMID)\b",
-        target,
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        r"\bGROUP\s+BY\s+(.*)",
-        lambda m: re.sub(
-            r"(?<!\.)\b(MICROEVENT_ID|MICRO_SPECIMEN_ID|ITEMID|TEST_ITEMID|ORG_ITEMID|AB_ITEMID)\b",
-            target,
-            m.group(0),
-            flags=re.IGNORECASE,
-        ),
-        text,
-        flags=re.IGNORECASE,
-    )
+    text = _UNQUALIFIED_MICRO_ID_COLS_RE.sub(target, text)
+    text = _GROUP_BY_TAIL_RE.sub(lambda m: _UNQUALIFIED_MICRO_ID_COLS_RE.sub(target, m.group(0)), text)
+    rules: list[str] = []
     rules.append("micro_count_field_to_name")
     return text, rules
 
 
-def _ensure_icd_join(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_SQL_COLUMN_REWRITERS: tuple[tuple[int, Callable[[str, str], tuple[str, Sequence[str]]]], ...] = (
+    (_sql_word_mask("ICUSTAYS"), _rewrite_icustays_careunit),
+    (_sql_word_mask("ICUSTAYS"), lambda question, sql: _rewrite_icustays_los(sql)),
+    (_sql_word_mask("CHARTEVENTS"), _rewrite_warning_flag),
+    (_sql_word_mask("LABEVENTS"), _rewrite_lab_priority),
+    (_sql_word_mask("MICROBIOLOGYEVENTS"), _rewrite_micro_count_field),
+    (_sql_word_mask("CHARTEVENTS"), _ensure_chart_label),
+    (_sql_word_mask("LABEVENTS"), _ensure_lab_label),
+    (_sql_word_mask("D_ITEMS", "D_LABITEMS"), _rewrite_label_field),
+)
+
+
+def _ensure_icd_join(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"(?<!\.)\bICD_CODE\b", text, re.IGNORECASE):
-        return text, rules
+    if not _has_unqualified(text, "ICD_CODE"):
+        return text, _NO_RULES
 
-    q = question.lower()
+    q = _lower_question(question)
     target = "DIAGNOSES_ICD"
     if "procedure" in q:
         target = "PROCEDURES_ICD"
 
-    if re.search(rf"\b{target}\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, target):
+        return text, _NO_RULES
 
-    m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    m = _first_from_table(text)
     if not m:
-        return text, rules
+        return text, _NO_RULES
     base_table = m.group(1)
     base_alias = m.group(2) or base_table
     if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
         base_alias = base_table
 
     if base_table.upper() not in _tables_with_subject_id():
-        return text, rules
+        return text, _NO_RULES
 
     join_clause = f" JOIN {target} d ON {base_alias}.SUBJECT_ID = d.SUBJECT_ID"
-    if re.search(r"\bHADM_ID\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "HADM_ID"):
         join_clause = f" JOIN {target} d ON {base_alias}.SUBJECT_ID = d.SUBJECT_ID AND {base_alias}.HADM_ID = d.HADM_ID"
 
     text = _insert_join(text, join_clause)
-    text = re.sub(r"(?<!\.)\bICD_CODE\b", "d.ICD_CODE", text, flags=re.IGNORECASE)
+    text = _UNQUALIFIED_ICD_CODE_RE.sub("d.ICD_CODE", text)
+    rules: list[str] = []
     rules.append(f"join_{target.lower()}_for_icd_code")
     return text, rules
 
 
-def _rewrite_admission_length(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_admission_length(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"(?<!\.)\b(ADMISSION_LENGTH|ADMISSION_DAYS)\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions_any(text, _ADMISSION_LENGTH_COLUMNS):
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, "ADMISSIONS") or "ADMISSIONS"
     replacement = f"CAST({alias}.DISCHTIME AS DATE) - CAST({alias}.ADMITTIME AS DATE)"
-    text = re.sub(r"(?<!\.)\b(ADMISSION_LENGTH|ADMISSION_DAYS)\b", replacement, text, flags=re.IGNORECASE)
+    text, count = _UNQUALIFIED_ADMISSION_LENGTH_RE.subn(replacement, text)
+    if not count:
+        return sql, _NO_RULES
+    rules: list[str] = []
     rules.append("admission_length_to_date_diff")
     return text, rules
 
 
-def _rewrite_to_date_cast(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_to_date_cast(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    if "TO_DATE" not in _upper_sql(text):
+        return text, _NO_RULES
+    timestamp_cols = _timestamp_cols()
+    if not timestamp_cols:
+        return text, _NO_RULES
     changed = False
 
     def repl(match: re.Match) -> str:
         nonlocal changed
         col = match.group(1)
         col_name = col.split(".")[-1].upper()
-        if col_name in _timestamp_cols():
+        if col_name in timestamp_cols:
             changed = True
             return f"CAST({col} AS DATE)"
         return match.group(0)
 
     new_text = _TO_DATE_RE.sub(repl, text)
-    if changed:
-        rules.append("to_date_on_timestamp_to_cast")
+    if not changed:
+        return text, _NO_RULES
+    rules: list[str] = []
+    rules.append("to_date_on_timestamp_to_cast")
     return new_text, rules
 
 
-def _rewrite_duration(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_duration(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"(?<!\.)\b(DURATION_DAYS|DURATION)\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions_any(text, _DURATION_COLUMNS):
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, "TRANSFERS") or "TRANSFERS"
     replacement = f"CAST({alias}.OUTTIME AS DATE) - CAST({alias}.INTIME AS DATE)"
-    text = re.sub(r"(?<!\.)\b(DURATION_DAYS|DURATION)\b", replacement, text, flags=re.IGNORECASE)
+    text, count = _UNQUALIFIED_DURATION_RE.subn(replacement, text)
+    if not count:
+        return sql, _NO_RULES
+    rules: list[str] = []
     rules.append("duration_to_date_diff")
     return text, rules
 
 
-def _fix_orphan_by(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _fix_orphan_by(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if "GROUP BY" in text.upper():
-        return text, rules
-    if not re.search(r"\b(COUNT|AVG|SUM|MIN|MAX)\s*\(", text, re.IGNORECASE):
-        return text, rules
-    for match in re.finditer(r"\bBY\b", text, re.IGNORECASE):
-        prefix = text[:match.start()].upper()
-        if prefix.endswith("ORDER "):
+    upper = _upper_sql(text)
+    if "GROUP BY" in upper:
+        return text, _NO_RULES
+    if not _AGG_FUNC_CALL_RE.search(upper):
+        return text, _NO_RULES
+    # Offsets into ``upper`` only line up with ``text`` for ASCII input.
+    ascii_only = text.isascii()
+    rules: list[str] = []
+    for match in _BY_WORD_RE.finditer(upper if ascii_only else text):
+        start = match.start()
+        if ascii_only:
+            after_order = upper.endswith("ORDER ", 0, start)
+        else:
+            after_order = text[max(0, start - 6):start].upper().endswith("ORDER ")
+        if after_order:
             continue
-        text = text[:match.start()] + "GROUP BY" + text[match.end():]
+        text = text[:start] + "GROUP BY" + text[match.end():]
         rules.append("orphan_by_to_group_by")
         break
     return text, rules
@@ -2162,19 +2498,19 @@ def _fix_having_where(sql: str) -> tuple[str, list[str]]:
         text = _HAVING_WHERE_RE.sub("HAVING", text)
         rules.append("fix_having_where")
 
-    new_text = _HAVING_TRUE_RE.sub("", text)
-    if new_text != text:
+    new_text, count = _HAVING_TRUE_RE.subn("", text)
+    if count:
         text = new_text
         rules.append("drop_having_true")
     return text, rules
 
 
-def _rewrite_hospital_expire_flag(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_hospital_expire_flag(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not _HOSPITAL_EXPIRE_RE.search(text):
-        return text, rules
-    text = _HOSPITAL_EXPIRE_RE.sub("HOSPITAL_EXPIRE_FLAG = 1", text)
+    text, count = _HOSPITAL_EXPIRE_RE.subn("HOSPITAL_EXPIRE_FLAG = 1", text)
+    if not count:
+        return sql, _NO_RULES
+    rules: list[str] = []
     rules.append("hospital_expire_flag_to_one")
     return text, rules
 
@@ -2183,25 +2519,24 @@ def _rewrite_age_from_sysdate_diff(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
 
-    new_text = _SYSDATE_YEAR_DIFF_RE.sub("ANCHOR_AGE", text)
-    if new_text != text:
+    new_text, count = _SYSDATE_YEAR_DIFF_RE.subn("ANCHOR_AGE", text)
+    if count:
         rules.append("sysdate_diff_years_to_anchor_age")
     return new_text, rules
 
 
-def _rewrite_absolute_year_range(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_absolute_year_range(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
 
     years = sorted({int(m.group(0)) for m in _ABS_YEAR_RE.finditer(question)})
     if len(years) < 2:
-        return text, rules
+        return text, _NO_RULES
     start_year = years[0]
     end_year = years[-1]
     if end_year < start_year or (end_year - start_year) > 30:
-        return text, rules
-    if "ADD_MONTHS" not in text.upper():
-        return text, rules
+        return text, _NO_RULES
+    if "ADD_MONTHS" not in _upper_sql(text):
+        return text, _NO_RULES
 
     changed = False
 
@@ -2216,65 +2551,59 @@ def _rewrite_absolute_year_range(question: str, sql: str) -> tuple[str, list[str
         return f"{col} < TO_DATE('{end_year + 1}-01-01', 'YYYY-MM-DD')"
 
     new_text = _ADD_MONTHS_PRED_RE.sub(_repl, text)
+    rules: list[str] = []
     if changed:
         rules.append("absolute_year_range_from_question")
     return new_text, rules
 
 
+def _unwrap_extract_day_diff(match: re.Match) -> str:
+    expr = match.group(1).strip()
+    # If the inner expression is already a date diff, EXTRACT(DAY FROM ...) is unnecessary.
+    if "-" in expr:
+        return expr
+    return match.group(0)
+
+
 def _rewrite_extract_day_diff(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-
-    def repl(match: re.Match) -> str:
-        expr = match.group(1).strip()
-        # If the inner expression is already a date diff, EXTRACT(DAY FROM ...) is unnecessary.
-        if "-" in expr:
-            return expr
-        return match.group(0)
-
-    new_text = _EXTRACT_DAY_RE.sub(repl, text)
+    new_text = _EXTRACT_DAY_RE.sub(_unwrap_extract_day_diff, text)
     if new_text != text:
         rules.append("extract_day_to_date_diff")
     return new_text, rules
 
 
-def _rewrite_age_from_anchor(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_age_from_extract(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    if "EXTRACT" not in _upper_sql(text):
+        return text, _NO_RULES
 
-    def repl(match: re.Match) -> str:
-        expr = match.group(1)
-        if "." in expr:
-            alias = expr.split(".")[0]
-            return f"{alias}.ANCHOR_AGE"
-        return "ANCHOR_AGE"
-
-    new_text = _AGE_FROM_ANCHOR_RE.sub(repl, text)
-    if new_text != text:
-        rules.append("anchor_year_to_anchor_age")
-    return new_text, rules
-
-
-def _rewrite_age_from_birthdate(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
+    fired: set[str] = set()
 
     def repl(match: re.Match) -> str:
-        expr = match.group(1)
+        fired.add(match.lastgroup)
+        expr = match.group(match.lastgroup)
         if "." in expr:
             alias = expr.split(".")[0]
             return f"{alias}.ANCHOR_AGE"
         return "ANCHOR_AGE"
 
-    new_text = _AGE_FROM_BIRTHDATE_RE.sub(repl, text)
-    if new_text != text:
+    text = _AGE_FROM_CURRENT_YEAR_RE.sub(repl, text)
+    rules: list[str] = []
+    if "anchor" in fired:
+        # A rewritten ANCHOR_YEAR can complete a birthdate expression around it.
+        text = _AGE_FROM_BIRTHDATE_RE.sub(repl, text)
+        rules.append("anchor_year_to_anchor_age")
+    if "birth" in fired:
         rules.append("birthdate_to_anchor_age")
-    return new_text, rules
+    return text, rules
 
 
-def _rewrite_birthdate_to_anchor_age(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_birthdate_to_anchor_age(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    if "EXTRACT" not in _upper_sql(text):
+        return text, _NO_RULES
 
     def repl(match: re.Match[str]) -> str:
         anchor = str(match.group("anchor") or "").strip()
@@ -2287,20 +2616,20 @@ def _rewrite_birthdate_to_anchor_age(sql: str) -> tuple[str, list[str]]:
         return "ANCHOR_AGE"
 
     rewritten = _ANCHOR_MINUS_BIRTH_EXTRACT_RE.sub(repl, text)
+    rules: list[str] = []
     if rewritten != text:
         text = rewritten
         rules.append("anchor_minus_birth_extract_to_anchor_age")
     return text, rules
 
 
-def _rewrite_birth_year_age(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_birth_year_age(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    if "YEAR" not in _upper_sql(text):
+        return text, _NO_RULES
 
-    def repl(match: re.Match) -> str:
-        return "ANCHOR_AGE"
-
-    new_text = _BIRTH_YEAR_DIFF_RE.sub(repl, text)
+    new_text = _BIRTH_YEAR_DIFF_RE.sub("ANCHOR_AGE", text)
+    rules: list[str] = []
     if new_text != text:
         rules.append("birth_year_diff_to_anchor_age")
         text = new_text
@@ -2312,16 +2641,17 @@ def _rewrite_birth_year_age(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _normalize_count_aliases(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _normalize_count_aliases(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.match(r"^\s*WITH\b", text, re.IGNORECASE):
+    if "COUNT" not in _upper_sql(text):
+        return text, _NO_RULES
+    if _LEADING_WITH_RE.match(text):
         # Keep CTE-local aggregate aliases intact because outer SELECT scopes
         # often reference them by name.
-        return text, rules
-    if re.search(r"\bFROM\s*\(\s*SELECT\b", text, re.IGNORECASE):
+        return text, _NO_RULES
+    if _FROM_SUBQUERY_RE.search(text):
         # Avoid alias rewrite inside derived tables; outer scopes may reference inner aliases.
-        return text, rules
+        return text, _NO_RULES
     keywords = {"FROM", "WHERE", "GROUP", "ORDER", "HAVING", "JOIN", "UNION", "LIMIT", "FETCH"}
     aliases: list[str] = []
 
@@ -2341,20 +2671,25 @@ def _normalize_count_aliases(sql: str) -> tuple[str, list[str]]:
         return match.group(1) + "CNT"
 
     new_text = _COUNT_ALIAS_RE.sub(repl, text)
+    rules: list[str] = []
     if aliases:
         def fix_order(match: re.Match) -> str:
             clause = match.group(1)
-            for old in aliases:
-                clause = re.sub(rf"\b{re.escape(old)}\b", "CNT", clause, flags=re.IGNORECASE)
-            return clause
-
-        new_text = re.sub(r"(\border\s+by\b[^;]*)", fix_order, new_text, count=1, flags=re.IGNORECASE)
+            if any("$" in old or "#" in old for old in aliases):
+                # `$`/`#` are not word characters, so these aliases can overlap
+                # and must be replaced in collection order.
+                for old in aliases:
+                    clause = _word_re(old).sub("CNT", clause)
+                return clause
+            return _words_re(tuple(dict.fromkeys(aliases))).sub("CNT", clause)
+
+        new_text = _ORDER_BY_TAIL_RE.sub(fix_order, new_text, count=1)
         rules.append("count_alias_to_cnt")
     return new_text, rules
 
 
 def _is_simple_count_aggregate_sql(sql: str) -> bool:
-    upper = sql.upper()
+    upper = _upper_sql(sql)
     if upper.count("COUNT(") != 1:
         return False
     blocked_tokens = ("AVG(", "SUM(", "MIN(", "MAX(", "CASE WHEN", "/")
@@ -2364,7 +2699,7 @@ def _is_simple_count_aggregate_sql(sql: str) -> bool:
 
 
 def _is_simple_avg_aggregate_sql(sql: str) -> bool:
-    upper = sql.upper()
+    upper = _upper_sql(sql)
     if upper.count("AVG(") != 1:
         return False
     blocked_tokens = ("COUNT(", "SUM(", "MIN(", "MAX(", "CASE WHEN", "/")
@@ -2373,7 +2708,7 @@ def _is_simple_avg_aggregate_sql(sql: str) -> bool:
     return True
 
 
-def _normalize_count_aliases_for_simple_counts(sql: str) -> tuple[str, list[str]]:
+def _normalize_count_aliases_for_simple_counts(sql: str) -> tuple[str, Sequence[str]]:
     if not _is_simple_count_aggregate_sql(sql):
         return sql, []
     return _normalize_count_aliases(sql)
@@ -2391,10 +2726,12 @@ def _ensure_group_by_not_null_for_simple_avg(question: str, sql: str) -> tuple[s
     return _ensure_group_by_not_null(question, sql)
 
 
-def _rewrite_avg_count_alias(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_avg_count_alias(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    aliases_in_order = re.findall(r"\bAS\s+([A-Za-z_][A-Za-z0-9_$#]*)\b", text, flags=re.IGNORECASE)
+    upper = _upper_sql(text)
+    if "AVG" not in upper and "STDDEV" not in upper:
+        return text, _NO_RULES
+    aliases_in_order = _AS_ALIAS_RE.findall(text)
     projected_aliases = {alias.upper() for alias in aliases_in_order}
     count_like_aliases: list[str] = []
     seen_count_aliases: set[str] = set()
@@ -2407,11 +2744,7 @@ def _rewrite_avg_count_alias(sql: str) -> tuple[str, list[str]]:
         seen_count_aliases.add(alias_upper)
         count_like_aliases.append(alias)
 
-    agg_alias_ref_re = re.compile(
-        r"\b(?P<fn>AVG|STDDEV)\s*\(\s*(?P<alias>[A-Za-z_][A-Za-z0-9_$#]*)\s*\)",
-        re.IGNORECASE,
-    )
-
+    rules: list[str] = []
     # If outer aggregate references an alias that is not projected, map it to the
     # single projected count-like alias to avoid ORA-00904.
     if len(count_like_aliases) == 1:
@@ -2430,175 +2763,184 @@ def _rewrite_avg_count_alias(sql: str) -> tuple[str, list[str]]:
                 return f"{fn}({target_alias})"
             return match.group(0)
 
-        rewritten = agg_alias_ref_re.sub(_repl_agg_alias, text)
+        rewritten = _AGG_ALIAS_REF_RE.sub(_repl_agg_alias, text)
         if changed and rewritten != text:
             text = rewritten
             rules.append("aggregate_alias_to_existing_count_alias")
 
     # Keep AVG(..._COUNT)->AVG(CNT) normalization only when CNT is explicitly projected.
-    if "CNT" in projected_aliases and re.search(
-        r"\bAVG\s*\(\s*(diagnosis_count|procedure_count|num_diagnoses|num_procedures|[A-Za-z0-9_]*_count)\s*\)",
-        text,
-        re.IGNORECASE,
-    ):
-        rewritten = re.sub(
-            r"\bAVG\s*\(\s*(diagnosis_count|procedure_count|num_diagnoses|num_procedures|[A-Za-z0-9_]*_count)\s*\)",
-            "AVG(CNT)",
-            text,
-            flags=re.IGNORECASE,
-        )
-        if rewritten != text:
+    if "CNT" in projected_aliases:
+        rewritten, count = _AVG_COUNT_ALIAS_RE.subn("AVG(CNT)", text)
+        if count:
             text = rewritten
             rules.append("avg_count_alias_to_cnt")
     return text, rules
 
 
-def _normalize_avg_aliases(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _normalize_avg_aliases(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    alias_map = {
-        "DOSES_PER_24_HRS": "avg_doses",
-        "AMOUNT": "avg_amount",
-        "VALUE": "avg_value",
-        "ANCHOR_AGE": "avg_age",
-        "LOS": "avg_los",
-        "DIAGNOSIS_COUNT": "avg_diag",
-        "DIAG_CNT": "avg_diag",
-        "PROCEDURE_COUNT": "avg_proc",
-        "PROC_CNT": "avg_proc",
-    }
-    for col, alias in alias_map.items():
-        pattern = re.compile(
-            rf"AVG\(\s*([A-Za-z0-9_\.]*{col})\s*\)\s+AS\s+[A-Za-z0-9_]+",
-            re.IGNORECASE,
-        )
-        if pattern.search(text):
-            text = pattern.sub(lambda m: f"AVG({m.group(1)}) AS {alias}", text)
+    if "AVG(" not in _upper_sql(text):
+        return text, _NO_RULES
+    rules: list[str] = []
+    for col, alias, pattern in _AVG_ALIAS_RULES:
+        text, count = pattern.subn(lambda m: f"AVG({m.group(1)}) AS {alias}", text)
+        if count:
             rules.append(f"avg_alias_{col.lower()}")
     return text, rules
 
 
+_ORDER_BY_CNT_CALL_CNT_RE = re.compile(r"\bORDER\s+BY\s+CNT\s*\(\s*\*\s*\)\s+CNT\b", re.IGNORECASE)
+_ORDER_BY_COUNT_STAR_CNT_RE = re.compile(r"\bORDER\s+BY\s+COUNT\(\*\)\s+CNT\b", re.IGNORECASE)
+
+
 def _fix_order_by_bad_alias(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
     if _ORDER_BY_BAD_COUNT_RE.search(text):
         text = _ORDER_BY_BAD_COUNT_RE.sub("ORDER BY CNT", text)
         rules.append("order_by_bad_alias_to_cnt")
-    if re.search(r"\bORDER\s+BY\s+CNT\s*\(\s*\*\s*\)\s+CNT\b", text, re.IGNORECASE):
-        text = re.sub(r"\bORDER\s+BY\s+CNT\s*\(\s*\*\s*\)\s+CNT\b", "ORDER BY CNT", text, flags=re.IGNORECASE)
+    if _ORDER_BY_CNT_CALL_CNT_RE.search(text):
+        text = _ORDER_BY_CNT_CALL_CNT_RE.sub("ORDER BY CNT", text)
         rules.append("order_by_cnt_star")
-    if re.search(r"\bORDER\s+BY\s+COUNT\(\*\)\s+CNT\b", text, re.IGNORECASE):
-        text = re.sub(r"\bORDER\s+BY\s+COUNT\(\*\)\s+CNT\b", "ORDER BY CNT", text, flags=re.IGNORECASE)
+    if _ORDER_BY_COUNT_STAR_CNT_RE.search(text):
+        text = _ORDER_BY_COUNT_STAR_CNT_RE.sub("ORDER BY CNT", text)
         rules.append("order_by_count_cnt")
     return text, rules
 
 
-def _fix_order_by_count_suffix(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_ORDER_BY_COLUMN_RE = re.compile(r"\bORDER\s+BY\s+([A-Za-z0-9_]+)(\s+DESC|\s+ASC)?\b", re.IGNORECASE)
+
+
+def _fix_order_by_count_suffix(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bORDER\s+BY\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(r"\bCNT\b", text, re.IGNORECASE):
-        return text, rules
-    match = re.search(r"\bORDER\s+BY\s+([A-Za-z0-9_]+)(\s+DESC|\s+ASC)?\b", text, re.IGNORECASE)
+    if not _ORDER_BY_KW_RE.search(text):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "CNT"):
+        return text, _NO_RULES
+    match = _ORDER_BY_COLUMN_RE.search(text)
     if not match:
-        return text, rules
+        return text, _NO_RULES
     alias = match.group(1)
     direction = match.group(2) or ""
+    rules: list[str] = []
     if alias.upper() != "CNT" and alias.upper().endswith("_COUNT"):
-        text = re.sub(
-            r"\bORDER\s+BY\s+[A-Za-z0-9_]+(\s+DESC|\s+ASC)?\b",
-            f"ORDER BY CNT{direction}",
-            text,
-            count=1,
-            flags=re.IGNORECASE,
-        )
+        text = _ORDER_BY_COLUMN_RE.sub(f"ORDER BY CNT{direction}", text, count=1)
         rules.append("order_by_count_suffix_to_cnt")
     return text, rules
 
 
-def _extract_top_n_from_question(question: str) -> int | None:
-    def _parse_pos_int(value: str | None) -> int | None:
-        if value is None:
-            return None
-        raw = str(value).strip().replace(",", "")
-        if not raw or not raw.isdigit():
-            return None
-        try:
-            return max(1, int(raw))
-        except Exception:
-            return None
+def _parse_pos_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    raw = str(value).strip().replace(",", "")
+    if not raw or not raw.isdigit():
+        return None
+    try:
+        return max(1, int(raw))
+    except Exception:
+        return None
 
-    q = str(question or "").strip().lower()
+
+@lru_cache(maxsize=2048)
+def _extract_top_n_from_question(question: str) -> int | None:
+    q = (question or "").strip().lower()
     if not q:
         return None
-    m = _TOP_N_EN_RE.search(q)
-    if m:
-        parsed = _parse_pos_int(m.group(1))
-        return parsed if parsed is not None else 10
-    m = _TOP_N_KO_RE.search(q)
-    if m:
-        parsed = _parse_pos_int(m.group(1))
-        return parsed if parsed is not None else 10
+    has_top_word = "top" in q or "상위" in q or "탑" in q
+    if has_top_word:
+        m = _TOP_N_COMBINED_RE.search(q)
+        if m:
+            if m.lastgroup == "en":
+                parsed = _parse_pos_int(m.group(2))
+            else:
+                # English "top N" takes precedence over a leftmost Korean match.
+                en = _TOP_N_EN_RE.search(q, m.end()) if "top" in q else None
+                parsed = _parse_pos_int(en.group(1) if en else m.group(4))
+            return parsed if parsed is not None else 10
     m = _TOP_N_KO_ONLY_RE.search(q)
     if m:
         parsed = _parse_pos_int(m.group(1))
         return parsed if parsed is not None else 10
-    if "top" in q or "상위" in q or "탑" in q:
+    if has_top_word:
         return 10
     return None
 
 
+_ROWNUM_MULTI_RE = re.compile(
+    r"(?P<wa>\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+)"
+    r"|(?P<ar>\s+AND\s+ROWNUM\s*<=\s*\d+)"
+    r"|(?P<wc>\bWHERE\s+ROWNUM\s*<=\s*\d+\s+(?P<clause>GROUP\s+BY|ORDER\s+BY|HAVING)\b)"
+    r"|(?P<w>\bWHERE\s+ROWNUM\s*<=\s*\d+\b)",
+    re.IGNORECASE,
+)
+
+
+def _rownum_strip_repl(match: re.Match[str]) -> str:
+    kind = match.lastgroup
+    if kind == "wa":
+        return "WHERE "
+    if kind == "wc":
+        return " " + match.group("clause")
+    return ""
+
+
+_WHERE_AND_RE = re.compile(r"\bWHERE\s+AND\b", re.IGNORECASE)
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+
+
 def _strip_rownum_predicates(sql: str) -> tuple[str, bool]:
     text = sql
     changed = False
-    patterns = [
-        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+AND\s+", "WHERE "),
-        (r"\s+AND\s+ROWNUM\s*<=\s*\d+", ""),
-        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\s+(GROUP\s+BY|ORDER\s+BY|HAVING)\b", r" \1"),
-        (r"\bWHERE\s+ROWNUM\s*<=\s*\d+\b", ""),
-    ]
-    for pattern, repl in patterns:
-        updated = re.sub(pattern, repl, text, flags=re.IGNORECASE)
-        if updated != text:
-            changed = True
-            text = updated
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s{2,}", " ", text).strip()
+    # A stripped "WHERE ROWNUM <= n AND" can expose another ROWNUM bound, so
+    # repeat the single pass until nothing matches. Stacked bounds therefore
+    # keep their WHERE ("WHERE ROWNUM <= a AND ROWNUM <= b AND x" -> "WHERE x"),
+    # where the old sequential passes emitted the invalid "FROM t AND x".
+    while True:
+        text, count = _ROWNUM_MULTI_RE.subn(_rownum_strip_repl, text)
+        if not count:
+            break
+        changed = True
+    if not changed:
+        return sql, False
+    text = _WHERE_AND_RE.sub("WHERE", text)
+    text = _MULTI_SPACE_RE.sub(" ", text).strip()
     return text, changed
 
 
-def _strip_unrequested_top_n_cap(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _is_small_top_n(value: str) -> bool:
+    try:
+        limit = int(value)
+    except Exception:
+        return False
+    return 0 < limit <= 200
+
+
+def _strip_unrequested_top_n_cap(question: str, sql: str) -> tuple[str, Sequence[str]]:
     if _extract_top_n_from_question(question) is not None:
-        return sql, rules
+        return sql, _NO_RULES
 
-    q = str(question or "").lower()
-    if any(token in q for token in ("sample", "preview", "샘플", "미리보기", "예시")):
-        return sql, rules
+    q = _lower_question(question)
+    if _SAMPLE_PREVIEW_HINT_RE.search(q):
+        return sql, _NO_RULES
 
-    text = str(sql or "").strip().rstrip(";")
+    text = (sql or "").strip().rstrip(";")
     if not text:
-        return sql, rules
-
-    def _is_small_topn(value: str) -> bool:
-        try:
-            limit = int(value)
-        except Exception:
-            return False
-        return 0 < limit <= 200
+        return sql, _NO_RULES
 
     outer = _OUTER_ROWNUM_RE.match(text)
+    rules: list[str] = []
     if outer:
         inner = outer.group(1).strip()
         limit = outer.group(2)
-        if _is_small_topn(limit) and ("GROUP BY" in inner.upper() or "ORDER BY" in inner.upper()):
+        inner_upper = _upper_sql(inner)
+        if _is_small_top_n(limit) and ("GROUP BY" in inner_upper or "ORDER BY" in inner_upper):
             rules.append(f"strip_unrequested_top_n_rownum:{limit}")
             return inner, rules
 
-    if "GROUP BY" in text.upper() or "ORDER BY" in text.upper():
-        match = re.search(r"\bROWNUM\s*<=\s*(\d+)\b", text, re.IGNORECASE)
-        if match and _is_small_topn(match.group(1)):
+    upper = _upper_sql(text)
+    if "GROUP BY" in upper or "ORDER BY" in upper:
+        match = _ROWNUM_LE_RE.search(text)
+        if match and _is_small_top_n(match.group(1)):
             stripped, changed = _strip_rownum_predicates(text)
             if changed:
                 rules.append(f"strip_unrequested_top_n_rownum:{match.group(1)}")
@@ -2606,17 +2948,17 @@ def _strip_unrequested_top_n_cap(question: str, sql: str) -> tuple[str, list[str
     return text, rules
 
 
-def _enforce_top_n_wrapper(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _enforce_top_n_wrapper(question: str, sql: str) -> tuple[str, Sequence[str]]:
     n = _extract_top_n_from_question(question)
     if n is None:
-        return sql, rules
+        return sql, _NO_RULES
 
-    text = str(sql or "").strip().rstrip(";")
+    text = (sql or "").strip().rstrip(";")
     if not text:
-        return sql, rules
+        return sql, _NO_RULES
 
     outer = _OUTER_ROWNUM_RE.match(text)
+    rules: list[str] = []
     if outer:
         inner = outer.group(1).strip()
         try:
@@ -2627,14 +2969,24 @@ def _enforce_top_n_wrapper(question: str, sql: str) -> tuple[str, list[str]]:
             rules.append(f"enforce_top_n_rownum:{current}->{n}")
         else:
             rules.append(f"enforce_top_n_rownum:{n}")
-        return f"SELECT * FROM ({inner}) WHERE ROWNUM <= {n}", rules
+            suffix = f") WHERE ROWNUM <= {n}"
+            if (
+                outer.start(1) == len(_ROWNUM_WRAP_PREFIX)
+                and outer.end(1) == len(text) - len(suffix)
+                and text.startswith(_ROWNUM_WRAP_PREFIX)
+                and text.endswith(suffix)
+                and not text[outer.end(1) - 1].isspace()
+            ):
+                # Already in the exact wrapped form; skip rebuilding an identical string.
+                return text, rules
+        return f"{_ROWNUM_WRAP_PREFIX}{inner}) WHERE ROWNUM <= {n}", rules
 
     stripped, stripped_changed = _strip_rownum_predicates(text)
     if stripped_changed:
         text = stripped
         rules.append("strip_rownum_before_top_n")
 
-    if "ORDER BY" not in text.upper():
+    if "ORDER BY" not in _upper_sql(text):
         return text, rules
 
     wrapped = _wrap_with_rownum(text, n)
@@ -2643,118 +2995,121 @@ def _enforce_top_n_wrapper(question: str, sql: str) -> tuple[str, list[str]]:
     return wrapped, rules
 
 
-def _apply_monthly_trend_default_cap(question: str, sql: str, default_n: int = 120) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip().rstrip(";")
-    if not text or default_n <= 0:
-        return sql, rules
+_TRUNC_MM_RE = re.compile(r"TRUNC\s*\(\s*[^,]+,\s*'MM'\s*\)", re.IGNORECASE)
+_TO_CHAR_YYYYMM_RE = re.compile(r"TO_CHAR\s*\(\s*[^,]+,\s*'YYYY[-_/]?MM'\s*\)", re.IGNORECASE)
+_EXTRACT_MONTH_RE = re.compile(r"EXTRACT\s*\(\s*MONTH\s+FROM\s+[^)]+\)", re.IGNORECASE)
 
-    if _extract_top_n_from_question(question) is not None:
-        return text, rules
-    if not _MONTHLY_TREND_INTENT_RE.search(str(question or "")):
-        return text, rules
 
-    upper = text.upper()
+def _apply_monthly_trend_default_cap(question: str, sql: str, default_n: int = 120) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip().rstrip(";")
+    if not text or default_n <= 0:
+        return sql, _NO_RULES
+
+    upper = _upper_sql(text)
     if "GROUP BY" not in upper or "ORDER BY" not in upper:
-        return text, rules
-    if "ROWNUM" in upper or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
-        return text, rules
+        return text, _NO_RULES
+    if _extract_top_n_from_question(question) is not None:
+        return text, _NO_RULES
+    if not _question_has_intent(_MONTHLY_TREND_INTENT_RE, question or ""):
+        return text, _NO_RULES
+    if "ROWNUM" in upper or _has_limit_or_fetch(text):
+        return text, _NO_RULES
 
     has_month_bucket = bool(
-        re.search(r"TRUNC\s*\(\s*[^,]+,\s*'MM'\s*\)", text, re.IGNORECASE)
-        or re.search(r"TO_CHAR\s*\(\s*[^,]+,\s*'YYYY[-_/]?MM'\s*\)", text, re.IGNORECASE)
-        or re.search(r"EXTRACT\s*\(\s*MONTH\s+FROM\s+[^)]+\)", text, re.IGNORECASE)
+        _TRUNC_MM_RE.search(text)
+        or _TO_CHAR_YYYYMM_RE.search(text)
+        or _EXTRACT_MONTH_RE.search(text)
     )
     if not has_month_bucket:
-        return text, rules
+        return text, _NO_RULES
 
     wrapped = _wrap_with_rownum(text, default_n)
+    rules: list[str] = []
     if wrapped != text:
         rules.append(f"default_monthly_trend_cap:{default_n}")
     return wrapped, rules
 
 
-def _strip_first_icu_rownum_for_careunit_counts(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip().rstrip(";")
-    if not text:
-        return sql, rules
+_RN_FILTER_RE = re.compile(
+    r"(?P<wa>\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s+AND\s+)"
+    r"|(?P<ar>\bAND\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*)"
+    r"|(?P<wt>\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$))",
+    re.IGNORECASE,
+)
+_DANGLING_WHERE_RE = re.compile(r"\bWHERE\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)", re.IGNORECASE)
+_FIRST_CAREUNIT_QUESTION_RE = re.compile(
+    r"(first\s+care\s*unit|first\s+careunit|icu\s+stays\s+by\s+first\s+careunit|첫\s*careunit|첫\s*병동)",
+)
+_RN_FIRST_EQ_ONE_RE = re.compile(r"\b(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\b", re.IGNORECASE)
 
-    q = str(question or "").lower()
-    first_careunit_intent = bool(
-        re.search(r"(first\s+care\s*unit|first\s+careunit|icu\s+stays\s+by\s+first\s+careunit|첫\s*careunit|첫\s*병동)", q)
-    )
-    if not first_careunit_intent:
-        return text, rules
-    if _FIRST_ICU_INTENT_RE.search(q):
-        return text, rules
 
-    upper = text.upper()
+def _rn_filter_repl(match: re.Match[str]) -> str:
+    return "WHERE " if match.lastgroup == "wa" else ""
+
+
+def _strip_rn_first_filters(sql: str) -> str:
+    text = _RN_FILTER_RE.sub(_rn_filter_repl, sql)
+    text = _DANGLING_WHERE_RE.sub("", text)
+    return _MULTI_SPACE_RE.sub(" ", text).strip()
+
+
+def _strip_first_icu_rownum_for_careunit_counts(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip().rstrip(";")
+    if not text:
+        return sql, _NO_RULES
+
+    upper = _upper_sql(text)
     if "ICUSTAYS" not in upper or "ROW_NUMBER(" not in upper:
-        return text, rules
+        return text, _NO_RULES
     if "GROUP BY" not in upper or "FIRST_CAREUNIT" not in upper:
-        return text, rules
-    if not re.search(r"\b(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
 
-    rewritten = text
-    rewritten = re.sub(
-        r"\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s+AND\s+",
-        "WHERE ",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(
-        r"\bAND\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*",
-        "",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(
-        r"\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)",
-        "",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(r"\bWHERE\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)", "", rewritten, flags=re.IGNORECASE)
-    rewritten = re.sub(r"\s{2,}", " ", rewritten).strip()
+    q = _lower_question(question)
+    first_careunit_intent = bool(_FIRST_CAREUNIT_QUESTION_RE.search(q))
+    if not first_careunit_intent:
+        return text, _NO_RULES
+    if _question_has_intent(_FIRST_ICU_INTENT_RE, q):
+        return text, _NO_RULES
+    if not _RN_FIRST_EQ_ONE_RE.search(text):
+        return text, _NO_RULES
+
+    rewritten = _strip_rn_first_filters(text)
+    rules: list[str] = []
     if rewritten != text:
         rules.append("strip_first_icu_rownum_for_careunit_counts")
         return rewritten, rules
     return text, rules
 
 
-def _apply_first_careunit_default_cap(question: str, sql: str, default_n: int = 10) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip().rstrip(";")
+def _apply_first_careunit_default_cap(question: str, sql: str, default_n: int = 10) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip().rstrip(";")
     if not text or default_n <= 0:
-        return sql, rules
-    if _extract_top_n_from_question(question) is not None:
-        return text, rules
-
-    q = str(question or "").lower()
-    first_careunit_intent = bool(
-        re.search(r"(icu\s+stays\s+by\s+first\s+careunit|first\s+care\s*unit|first\s+careunit|첫\s*병동|첫\s*careunit)", q)
-    )
-    if not first_careunit_intent:
-        return text, rules
+        return sql, _NO_RULES
 
-    upper = text.upper()
-    if "ROWNUM" in upper or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
-        return text, rules
+    upper = _upper_sql(text)
     if "ICUSTAYS" not in upper or "GROUP BY" not in upper or "ORDER BY" not in upper:
-        return text, rules
+        return text, _NO_RULES
     if "FIRST_CAREUNIT" not in upper or "COUNT(" not in upper:
-        return text, rules
+        return text, _NO_RULES
+    if _extract_top_n_from_question(question) is not None:
+        return text, _NO_RULES
+
+    q = _lower_question(question)
+    first_careunit_intent = bool(_FIRST_CAREUNIT_QUESTION_RE.search(q))
+    if not first_careunit_intent:
+        return text, _NO_RULES
+    if "ROWNUM" in upper or _has_limit_or_fetch(text):
+        return text, _NO_RULES
 
     wrapped = _wrap_with_rownum(text, default_n)
+    rules: list[str] = []
     if wrapped != text:
         rules.append(f"default_first_careunit_cap:{default_n}")
     return wrapped, rules
 
 
 def _append_where_predicate(sql: str, predicate: str) -> str:
-    text = str(sql or "").strip().rstrip(";")
+    text = (sql or "").strip().rstrip(";")
     if not text or not predicate:
         return text
     span = _find_final_select_from_span(text)
@@ -2776,44 +3131,44 @@ def _append_where_predicate(sql: str, predicate: str) -> str:
     return f"{core} WHERE {predicate}".strip()
 
 
+_FROM_JOIN_TABLE_ALIAS_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+([A-Za-z0-9_]+)(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
+    re.IGNORECASE,
+)
+
+
+_ALIAS_BLOCKLIST = frozenset({"ON", "WHERE", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL", "JOIN"})
+
+
 def _collect_table_aliases(sql: str) -> dict[str, str]:
     aliases: dict[str, str] = {}
-    for match in re.finditer(
-        r"\b(?:FROM|JOIN)\s+([A-Za-z0-9_]+)(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        str(sql or ""),
-        re.IGNORECASE,
-    ):
-        table = str(match.group(1) or "").strip().upper()
-        alias = str(match.group(2) or "").strip().upper()
-        if not table:
-            continue
-        if not alias or alias in {"ON", "WHERE", "GROUP", "ORDER", "INNER", "LEFT", "RIGHT", "FULL", "JOIN"}:
+    for table, alias in _FROM_JOIN_TABLE_ALIAS_RE.findall(sql or ""):
+        table = table.upper()
+        alias = alias.upper()
+        if not alias or alias in _ALIAS_BLOCKLIST:
             alias = table
         aliases[alias] = table
     return aliases
 
 
-def _ensure_hadm_not_null_for_distinct_counts(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip()
+_COUNT_DISTINCT_ALIAS_HADM_RE = re.compile(r"\bCOUNT\s*\(\s*DISTINCT\s+([A-Za-z0-9_]+)\.HADM_ID\s*\)", re.IGNORECASE)
+
+
+def _ensure_hadm_not_null_for_distinct_counts(sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip()
     if not text:
-        return text, rules
-    if re.match(r"^\s*WITH\b", text, re.IGNORECASE):
+        return text, _NO_RULES
+    if _LEADING_WITH_RE.match(text):
         # Appending a single predicate to the outer query can reference aliases
         # that exist only inside CTEs and cause ORA-00904.
-        return text, rules
+        return text, _NO_RULES
+    if "DISTINCT" not in _upper_sql(text) or "HADM_ID" not in _scan_sql_tokens(text):
+        return text, _NO_RULES
 
-    alias_tables = _collect_table_aliases(text)
-    aliases = {
-        str(match.group(1) or "").strip().upper()
-        for match in re.finditer(
-            r"\bCOUNT\s*\(\s*DISTINCT\s+([A-Za-z0-9_]+)\.HADM_ID\s*\)",
-            text,
-            re.IGNORECASE,
-        )
-    }
+    aliases = {alias.upper() for alias in _COUNT_DISTINCT_ALIAS_HADM_RE.findall(text)}
     if not aliases:
-        return text, rules
+        return text, _NO_RULES
+    alias_tables = _collect_table_aliases(text)
 
     target_tables = {
         "ADMISSIONS",
@@ -2828,12 +3183,13 @@ def _ensure_hadm_not_null_for_distinct_counts(sql: str) -> tuple[str, list[str]]
         "LABEVENTS",
         "MICROBIOLOGYEVENTS",
     }
+    rules: list[str] = []
     for alias in sorted(aliases):
         table = alias_tables.get(alias, alias)
         if table not in target_tables:
             continue
         predicate = f"{alias}.HADM_ID IS NOT NULL"
-        if re.search(rf"\b{re.escape(alias)}\s*\.\s*HADM_ID\s+IS\s+NOT\s+NULL\b", text, re.IGNORECASE):
+        if _alias_hadm_not_null_re(alias).search(text):
             continue
         updated = _append_where_predicate(text, predicate)
         if updated != text:
@@ -2843,98 +3199,128 @@ def _ensure_hadm_not_null_for_distinct_counts(sql: str) -> tuple[str, list[str]]
     return text, rules
 
 
-def _rewrite_prescriptions_hadm_count_to_admissions_exists(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").lower()
-    if not any(token in q for token in ("입원", "admission", "hospitalization", "inpatient", "during admission")):
-        return sql, rules
+_GROUP_BY_OR_HAVING_RE = re.compile(r"\bGROUP\s+BY\b|\bHAVING\b", re.IGNORECASE)
+_FROM_PRESCRIPTIONS_ALIAS_RE = re.compile(r"\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?", re.IGNORECASE)
+_WHERE_BODY_UP_TO_CLAUSE_RE = re.compile(
+    r"\bWHERE\b(?P<body>.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bHAVING\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_AND_AND_RE = re.compile(r"\bAND\s+AND\b", re.IGNORECASE)
+_LEADING_AND_RE = re.compile(r"^\s*AND\s+", re.IGNORECASE)
+_TRAILING_AND_RE = re.compile(r"\s+AND\s*$", re.IGNORECASE)
+_FROM_PRESCRIPTIONS_RE = re.compile(r"\bFROM\s+PRESCRIPTIONS\b", re.IGNORECASE)
+_ADMISSIONS_EXISTS_TMPL = (
+    "SELECT COUNT(DISTINCT a.HADM_ID) AS CNT "
+    "FROM ADMISSIONS a "
+    "WHERE EXISTS (SELECT 1 FROM PRESCRIPTIONS {alias} WHERE {exists_clause})"
+)
+_COUNT_DISTINCT_QUALIFIED_HADM_RE = re.compile(r"\bCOUNT\s*\(\s*DISTINCT\s+[A-Za-z0-9_]+\.HADM_ID\s*\)", re.IGNORECASE)
+
 
-    text = str(sql or "").strip()
+def _extract_where_body(sql: str) -> str:
+    match = _WHERE_BODY_UP_TO_CLAUSE_RE.search(sql)
+    return match.group("body").strip() if match else ""
+
+
+def _rewrite_prescriptions_hadm_count_to_admissions_exists(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    if re.search(r"\bADMISSIONS\b", text, re.IGNORECASE):
-        return sql, rules
-    if not re.search(r"\bFROM\s+PRESCRIPTIONS\b", text, re.IGNORECASE):
-        return sql, rules
-    if not re.search(r"\bCOUNT\s*\(\s*DISTINCT\s+[A-Za-z0-9_]+\.HADM_ID\s*\)", text, re.IGNORECASE):
-        return sql, rules
-    if re.search(r"\bGROUP\s+BY\b|\bHAVING\b", text, re.IGNORECASE):
-        return sql, rules
+        return sql, _NO_RULES
+    tokens = _scan_sql_tokens(text)
+    if "PRESCRIPTIONS" not in tokens or "HADM_ID" not in tokens:
+        return sql, _NO_RULES
+    q = _lower_question(question)
+    if not _ADMISSION_GRAIN_HINT_RE.search(q):
+        return sql, _NO_RULES
+    if _sql_mentions(text, "ADMISSIONS"):
+        return sql, _NO_RULES
+    upper = _upper_sql(text)
+    if "DISTINCT" not in upper or not _FROM_PRESCRIPTIONS_RE.search(text):
+        return sql, _NO_RULES
+    if not _COUNT_DISTINCT_QUALIFIED_HADM_RE.search(text):
+        return sql, _NO_RULES
+    if ("GROUP" in upper or "HAVING" in upper) and _GROUP_BY_OR_HAVING_RE.search(text):
+        return sql, _NO_RULES
     if not _is_single_count_distinct_hadm_projection(text):
-        return sql, rules
+        return sql, _NO_RULES
 
-    from_match = re.search(
-        r"\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        text,
-        re.IGNORECASE,
-    )
+    from_match = _FROM_PRESCRIPTIONS_ALIAS_RE.search(text)
     if not from_match:
-        return sql, rules
+        return sql, _NO_RULES
     alias = str(from_match.group(1) or "PRESCRIPTIONS").strip()
     alias_upper = alias.upper()
     if alias_upper in {"WHERE", "GROUP", "ORDER", "HAVING", "JOIN", "ON"}:
         alias = "PRESCRIPTIONS"
 
-    where_match = re.search(
-        r"\bWHERE\b(?P<body>.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bHAVING\b|$)",
-        text,
-        re.IGNORECASE | re.DOTALL,
-    )
-    where_body = str(where_match.group("body") or "").strip() if where_match else ""
+    where_body = _extract_where_body(text)
     if not where_body:
-        return sql, rules
+        return sql, _NO_RULES
 
     hadm_not_null_pattern = rf"(?:\bAND\s+)?\b{re.escape(alias)}\s*\.\s*HADM_ID\s+IS\s+NOT\s+NULL\b(?:\s+AND)?"
     cleaned_where = re.sub(hadm_not_null_pattern, " ", where_body, flags=re.IGNORECASE)
-    cleaned_where = re.sub(r"\bAND\s+AND\b", "AND", cleaned_where, flags=re.IGNORECASE)
-    cleaned_where = re.sub(r"^\s*AND\s+", "", cleaned_where, flags=re.IGNORECASE)
-    cleaned_where = re.sub(r"\s+AND\s*$", "", cleaned_where, flags=re.IGNORECASE)
-    cleaned_where = re.sub(r"\s{2,}", " ", cleaned_where).strip()
+    cleaned_where = _AND_AND_RE.sub("AND", cleaned_where)
+    cleaned_where = _LEADING_AND_RE.sub("", cleaned_where)
+    cleaned_where = _TRAILING_AND_RE.sub("", cleaned_where)
+    cleaned_where = _MULTI_SPACE_RE.sub(" ", cleaned_where).strip()
 
     exists_predicates = [f"{alias}.HADM_ID = a.HADM_ID"]
     if cleaned_where:
         exists_predicates.append(cleaned_where)
     exists_clause = " AND ".join(exists_predicates)
-    rewritten = (
-        "SELECT COUNT(DISTINCT a.HADM_ID) AS CNT "
-        "FROM ADMISSIONS a "
-        f"WHERE EXISTS (SELECT 1 FROM PRESCRIPTIONS {alias} WHERE {exists_clause})"
-    )
+    rewritten = _ADMISSIONS_EXISTS_TMPL.format(alias=alias, exists_clause=exists_clause)
+    rules: list[str] = []
     rules.append("prescriptions_hadm_count_to_admissions_exists")
     return rewritten, rules
 
 
-def _ensure_prescriptions_hadm_not_null_for_grouping(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip()
-    if not text:
-        return text, rules
-    if not re.search(r"\bPRESCRIPTIONS\b", text, re.IGNORECASE):
-        return text, rules
+@lru_cache(maxsize=32)
+def _group_by_alias_hadm_re(alias: str) -> re.Pattern[str]:
+    return re.compile(rf"\bGROUP\s+BY\b[\s\S]*\b{re.escape(alias)}\s*\.\s*HADM_ID\b", re.IGNORECASE)
 
-    alias_matches = list(
-        re.finditer(
-            r"\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-            text,
-            re.IGNORECASE,
-        )
+
+@lru_cache(maxsize=32)
+def _alias_hadm_not_null_re(alias: str) -> re.Pattern[str]:
+    return re.compile(rf"\b{re.escape(alias)}\s*\.\s*HADM_ID\s+IS\s+NOT\s+NULL\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _prescriptions_where_group_re(alias: str) -> re.Pattern[str]:
+    return re.compile(
+        rf"(\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?{re.escape(alias)})?\s+\bWHERE\b\s*)(?P<body>.*?)(\bGROUP\s+BY\b)",
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+@lru_cache(maxsize=32)
+def _prescriptions_from_group_re(alias: str) -> re.Pattern[str]:
+    return re.compile(
+        rf"(\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?{re.escape(alias)})?\s*)(\bGROUP\s+BY\b)",
+        re.IGNORECASE,
     )
-    for match in alias_matches:
+
+
+def _ensure_prescriptions_hadm_not_null_for_grouping(sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip()
+    if not text:
+        return text, _NO_RULES
+    if "GROUP" not in _upper_sql(text) or "HADM_ID" not in _scan_sql_tokens(text):
+        return text, _NO_RULES
+    if not _sql_mentions(text, "PRESCRIPTIONS"):
+        return text, _NO_RULES
+
+    rules: list[str] = []
+    # finditer stays bound to the original SQL while `text` is rewritten below.
+    for match in _FROM_PRESCRIPTIONS_ALIAS_RE.finditer(text):
         alias = str(match.group(1) or "PRESCRIPTIONS").strip()
         alias_upper = alias.upper()
         if alias_upper in {"WHERE", "GROUP", "ORDER", "HAVING", "JOIN", "ON"}:
             alias = "PRESCRIPTIONS"
             alias_upper = "PRESCRIPTIONS"
-        if not re.search(rf"\bGROUP\s+BY\b[\s\S]*\b{re.escape(alias)}\s*\.\s*HADM_ID\b", text, re.IGNORECASE):
+        if not _group_by_alias_hadm_re(alias).search(text):
             continue
-        if re.search(rf"\b{re.escape(alias)}\s*\.\s*HADM_ID\s+IS\s+NOT\s+NULL\b", text, re.IGNORECASE):
+        if _alias_hadm_not_null_re(alias).search(text):
             continue
 
-        where_group_pattern = re.compile(
-            rf"(\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?{re.escape(alias)})?\s+\bWHERE\b\s*)(?P<body>.*?)(\bGROUP\s+BY\b)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
         def repl_where_group(found: re.Match[str]) -> str:
             body = str(found.group("body") or "").rstrip()
             if body:
@@ -2943,69 +3329,72 @@ def _ensure_prescriptions_hadm_not_null_for_grouping(sql: str) -> tuple[str, lis
                 body = f"{alias}.HADM_ID IS NOT NULL "
             return f"{found.group(1)}{body}{found.group(3)}"
 
-        updated = where_group_pattern.sub(repl_where_group, text, count=1)
-        if updated != text:
+        updated, count = _prescriptions_where_group_re(alias).subn(repl_where_group, text, count=1)
+        if count:
             text = updated
             rules.append(f"prescriptions_hadm_not_null_group:{alias_upper}")
             continue
 
-        from_group_pattern = re.compile(
-            rf"(\bFROM\s+PRESCRIPTIONS(?:\s+(?:AS\s+)?{re.escape(alias)})?\s*)(\bGROUP\s+BY\b)",
-            re.IGNORECASE,
-        )
-        updated = from_group_pattern.sub(
+        updated, count = _prescriptions_from_group_re(alias).subn(
             rf"\1WHERE {alias}.HADM_ID IS NOT NULL \2",
             text,
             count=1,
         )
-        if updated != text:
+        if count:
             text = updated
             rules.append(f"prescriptions_hadm_not_null_group:{alias_upper}")
 
     return text, rules
 
 
-def _rewrite_services_hadm_count_to_admissions_join(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").lower()
-    if not any(token in q for token in ("입원", "admission", "hospitalization", "inpatient")):
-        return sql, rules
+_FROM_SERVICES_ALIAS_RE = re.compile(r"\bFROM\s+SERVICES(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?", re.IGNORECASE)
+_FROM_SERVICES_RE = re.compile(r"\bFROM\s+SERVICES\b", re.IGNORECASE)
+_COUNT_DISTINCT_HADM_RE = re.compile(r"\bCOUNT\s*\(\s*DISTINCT\s+HADM_ID\s*\)", re.IGNORECASE)
+_SERVICES_JOIN_TMPL = (
+    "SELECT COUNT(DISTINCT a.HADM_ID) AS CNT "
+    "FROM ADMISSIONS a "
+    "JOIN SERVICES s ON s.HADM_ID = a.HADM_ID"
+)
+
+
+@lru_cache(maxsize=32)
+def _count_distinct_alias_hadm_re(alias: str) -> re.Pattern[str]:
+    return re.compile(rf"\bCOUNT\s*\(\s*DISTINCT\s+{re.escape(alias)}\s*\.\s*HADM_ID\s*\)", re.IGNORECASE)
+
 
-    text = str(sql or "").strip()
+def _rewrite_services_hadm_count_to_admissions_join(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    if re.search(r"\bADMISSIONS\b", text, re.IGNORECASE):
-        return sql, rules
-    if not re.search(r"\bFROM\s+SERVICES\b", text, re.IGNORECASE):
-        return sql, rules
-
-    from_match = re.search(
-        r"\bFROM\s+SERVICES(?:\s+(?:AS\s+)?([A-Za-z0-9_]+))?",
-        text,
-        re.IGNORECASE,
-    )
+        return sql, _NO_RULES
+    tokens = _scan_sql_tokens(text)
+    if "SERVICES" not in tokens or "HADM_ID" not in tokens:
+        return sql, _NO_RULES
+    q = _lower_question(question)
+    if not _ADMISSION_GRAIN_HINT_RE.search(q):
+        return sql, _NO_RULES
+    if _sql_mentions(text, "ADMISSIONS"):
+        return sql, _NO_RULES
+    if not _FROM_SERVICES_RE.search(text):
+        return sql, _NO_RULES
+
+    from_match = _FROM_SERVICES_ALIAS_RE.search(text)
     if not from_match:
-        return sql, rules
+        return sql, _NO_RULES
     alias = str(from_match.group(1) or "SERVICES").strip()
     alias_upper = alias.upper()
     if alias_upper in {"WHERE", "GROUP", "ORDER", "HAVING", "JOIN", "ON"}:
         alias = "SERVICES"
         alias_upper = "SERVICES"
 
-    if not re.search(rf"\bCOUNT\s*\(\s*DISTINCT\s+{re.escape(alias)}\s*\.\s*HADM_ID\s*\)", text, re.IGNORECASE):
-        if not re.search(r"\bCOUNT\s*\(\s*DISTINCT\s+HADM_ID\s*\)", text, re.IGNORECASE):
-            return sql, rules
-    if re.search(r"\bGROUP\s+BY\b|\bHAVING\b", text, re.IGNORECASE):
-        return sql, rules
+    if not _count_distinct_alias_hadm_re(alias).search(text):
+        if not _COUNT_DISTINCT_HADM_RE.search(text):
+            return sql, _NO_RULES
+    if _GROUP_BY_OR_HAVING_RE.search(text):
+        return sql, _NO_RULES
     if not _is_single_count_distinct_hadm_projection(text):
-        return sql, rules
+        return sql, _NO_RULES
 
-    where_match = re.search(
-        r"\bWHERE\b(?P<body>.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bHAVING\b|$)",
-        text,
-        re.IGNORECASE | re.DOTALL,
-    )
-    where_body = str(where_match.group("body") or "").strip() if where_match else ""
+    where_body = _extract_where_body(text)
     if where_body:
         if alias_upper != "S":
             where_body = re.sub(
@@ -3018,116 +3407,122 @@ def _rewrite_services_hadm_count_to_admissions_join(question: str, sql: str) ->
     else:
         where_clause = ""
 
-    rewritten = (
-        "SELECT COUNT(DISTINCT a.HADM_ID) AS CNT "
-        "FROM ADMISSIONS a "
-        "JOIN SERVICES s ON s.HADM_ID = a.HADM_ID"
-        f"{where_clause}"
-    )
+    rewritten = _SERVICES_JOIN_TMPL + where_clause
+    rules: list[str] = []
     rules.append("services_hadm_count_to_admissions_join")
     return rewritten, rules
 
 
-def _rewrite_service_mortality_query(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip().lower()
-    text = str(sql or "").strip()
+_PREV_SERVICE_QUESTION_RE = re.compile(
+    r"(prev(?:ious)?\s*service|prior\s*service|prev_service|이전\s*진료과|직전\s*진료과|과거\s*진료과)",
+    re.IGNORECASE,
+)
+
+_SERVICE_MORTALITY_ICU_TMPL = (
+    "SELECT s.{svc} AS service_group, "
+    "COUNT(DISTINCT a.HADM_ID) AS total_admissions, "
+    "COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
+    "AND i.INTIME IS NOT NULL AND i.OUTTIME IS NOT NULL "
+    "AND a.DEATHTIME BETWEEN i.INTIME AND i.OUTTIME THEN a.HADM_ID END) AS icu_deaths, "
+    "ROUND(100 * COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
+    "AND i.INTIME IS NOT NULL AND i.OUTTIME IS NOT NULL "
+    "AND a.DEATHTIME BETWEEN i.INTIME AND i.OUTTIME THEN a.HADM_ID END) "
+    "/ NULLIF(COUNT(DISTINCT a.HADM_ID), 0), 2) AS icu_mortality_rate_pct "
+    "FROM SERVICES s "
+    "JOIN ADMISSIONS a ON a.HADM_ID = s.HADM_ID "
+    "JOIN ICUSTAYS i ON i.HADM_ID = a.HADM_ID AND i.SUBJECT_ID = a.SUBJECT_ID "
+    "WHERE s.{svc} IS NOT NULL "
+    "GROUP BY s.{svc} "
+    "ORDER BY icu_mortality_rate_pct DESC"
+)
+_SERVICE_MORTALITY_HOSPITAL_TMPL = (
+    "SELECT s.{svc} AS service_group, "
+    "COUNT(DISTINCT a.HADM_ID) AS total_admissions, "
+    "COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
+    "AND (a.DISCHTIME IS NULL OR a.DEATHTIME <= a.DISCHTIME) THEN a.HADM_ID END) AS deaths, "
+    "ROUND(100 * COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
+    "AND (a.DISCHTIME IS NULL OR a.DEATHTIME <= a.DISCHTIME) THEN a.HADM_ID END) "
+    "/ NULLIF(COUNT(DISTINCT a.HADM_ID), 0), 2) AS hospital_mortality_rate_pct "
+    "FROM SERVICES s "
+    "JOIN ADMISSIONS a ON a.HADM_ID = s.HADM_ID "
+    "WHERE s.{svc} IS NOT NULL "
+    "GROUP BY s.{svc} "
+    "ORDER BY hospital_mortality_rate_pct DESC"
+)
+
+
+def _rewrite_service_mortality_query(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = _lower_question(question).strip()
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    if not _SERVICE_STRATIFY_INTENT_RE.search(q):
-        return sql, rules
-    if _ADMISSION_TYPE_QUERY_INTENT_RE.search(q):
-        return sql, rules
-    if _DIAG_PROC_QUERY_INTENT_RE.search(q):
-        return sql, rules
-    if not (_MORTALITY_QUERY_INTENT_RE.search(q) or _RATIO_INTENT_RE.search(q)):
-        return sql, rules
+        return sql, _NO_RULES
+    if not _question_has_intent(_SERVICE_STRATIFY_INTENT_RE, q):
+        return sql, _NO_RULES
+    if _question_has_intent(_ADMISSION_TYPE_QUERY_INTENT_RE, q):
+        return sql, _NO_RULES
+    if _question_has_intent(_DIAG_PROC_QUERY_INTENT_RE, q):
+        return sql, _NO_RULES
+    if not (_question_has_intent(_MORTALITY_QUERY_INTENT_RE, q) or _question_has_intent(_RATIO_INTENT_RE, q)):
+        return sql, _NO_RULES
 
     # Skip when SQL already references service columns correctly.
-    if re.search(r"\b(SERVICES|CURR_SERVICE|PREV_SERVICE)\b", text, re.IGNORECASE):
-        return sql, rules
+    if _sql_mentions_any(text, ("SERVICES", "CURR_SERVICE", "PREV_SERVICE")):
+        return sql, _NO_RULES
 
     # Rewrite only when explicit semantic drift is visible in SQL.
     # Avoid broad canonical rewrites for merely incomplete drafts.
-    has_admission_type_ref = bool(re.search(r"\bADMISSION_TYPE\b", text, re.IGNORECASE))
-    has_diag_proc_ref = bool(re.search(r"\b(DIAGNOSES_ICD|PROCEDURES_ICD)\b", text, re.IGNORECASE))
+    has_admission_type_ref = _sql_mentions(text, "ADMISSION_TYPE")
+    has_diag_proc_ref = _sql_mentions_any(text, ("DIAGNOSES_ICD", "PROCEDURES_ICD"))
     if not (has_admission_type_ref or has_diag_proc_ref):
-        return sql, rules
+        return sql, _NO_RULES
 
-    prev_service_requested = bool(
-        re.search(r"(prev(?:ious)?\s*service|prior\s*service|prev_service|이전\s*진료과|직전\s*진료과|과거\s*진료과)", q, re.IGNORECASE)
-    )
+    prev_service_requested = bool(_PREV_SERVICE_QUESTION_RE.search(q))
     service_col = "PREV_SERVICE" if prev_service_requested else "CURR_SERVICE"
-    icu_intent = bool(_ICU_QUERY_INTENT_RE.search(q))
+    icu_intent = _question_has_intent(_ICU_QUERY_INTENT_RE, q)
 
+    rules: list[str] = []
     if icu_intent:
-        rewritten = (
-            f"SELECT s.{service_col} AS service_group, "
-            "COUNT(DISTINCT a.HADM_ID) AS total_admissions, "
-            "COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
-            "AND i.INTIME IS NOT NULL AND i.OUTTIME IS NOT NULL "
-            "AND a.DEATHTIME BETWEEN i.INTIME AND i.OUTTIME THEN a.HADM_ID END) AS icu_deaths, "
-            f"ROUND(100 * COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
-            "AND i.INTIME IS NOT NULL AND i.OUTTIME IS NOT NULL "
-            "AND a.DEATHTIME BETWEEN i.INTIME AND i.OUTTIME THEN a.HADM_ID END) "
-            "/ NULLIF(COUNT(DISTINCT a.HADM_ID), 0), 2) AS icu_mortality_rate_pct "
-            "FROM SERVICES s "
-            "JOIN ADMISSIONS a ON a.HADM_ID = s.HADM_ID "
-            "JOIN ICUSTAYS i ON i.HADM_ID = a.HADM_ID AND i.SUBJECT_ID = a.SUBJECT_ID "
-            f"WHERE s.{service_col} IS NOT NULL "
-            f"GROUP BY s.{service_col} "
-            "ORDER BY icu_mortality_rate_pct DESC"
-        )
+        rewritten = _SERVICE_MORTALITY_ICU_TMPL.format(svc=service_col)
         rules.append(f"service_mortality_rewrite:{service_col.lower()}:icu")
         return rewritten, rules
 
-    rewritten = (
-        f"SELECT s.{service_col} AS service_group, "
-        "COUNT(DISTINCT a.HADM_ID) AS total_admissions, "
-        "COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
-        "AND (a.DISCHTIME IS NULL OR a.DEATHTIME <= a.DISCHTIME) THEN a.HADM_ID END) AS deaths, "
-        f"ROUND(100 * COUNT(DISTINCT CASE WHEN a.DEATHTIME IS NOT NULL "
-        "AND (a.DISCHTIME IS NULL OR a.DEATHTIME <= a.DISCHTIME) THEN a.HADM_ID END) "
-        "/ NULLIF(COUNT(DISTINCT a.HADM_ID), 0), 2) AS hospital_mortality_rate_pct "
-        "FROM SERVICES s "
-        "JOIN ADMISSIONS a ON a.HADM_ID = s.HADM_ID "
-        f"WHERE s.{service_col} IS NOT NULL "
-        f"GROUP BY s.{service_col} "
-        "ORDER BY hospital_mortality_rate_pct DESC"
-    )
+    rewritten = _SERVICE_MORTALITY_HOSPITAL_TMPL.format(svc=service_col)
     rules.append(f"service_mortality_rewrite:{service_col.lower()}:hospital")
     return rewritten, rules
 
 
-def _rewrite_icu_mortality_outcome_alignment(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip().lower()
-    text = str(sql or "").strip()
+def _find_column_ref(fragment: str, column: str) -> str | None:
+    aliased = re.search(rf"\b([A-Za-z0-9_]+)\.{column}\b", fragment, re.IGNORECASE)
+    if aliased:
+        return f"{aliased.group(1)}.{column.upper()}"
+    if re.search(rf"\b{column}\b", fragment, re.IGNORECASE):
+        return column.upper()
+    return None
+
+
+_HOSPITAL_EXPIRE_FLAG_EQ_ONE_RE = re.compile(r"(?:[A-Za-z0-9_]+\.)?HOSPITAL_EXPIRE_FLAG\s*=\s*1", re.IGNORECASE)
+
+
+def _rewrite_icu_mortality_outcome_alignment(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = _lower_question(question).strip()
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    if not (_ICU_QUERY_INTENT_RE.search(q) and _MORTALITY_QUERY_INTENT_RE.search(q)):
-        return sql, rules
-    upper = text.upper()
-    if "ADMISSIONS" not in upper:
-        return sql, rules
+        return sql, _NO_RULES
+    upper = _upper_sql(text)
+    if "ADMISSIONS" not in upper or "HOSPITAL_EXPIRE_FLAG" not in upper:
+        return sql, _NO_RULES
+    if not (_question_has_intent(_ICU_QUERY_INTENT_RE, q) and _question_has_intent(_MORTALITY_QUERY_INTENT_RE, q)):
+        return sql, _NO_RULES
     span = _find_final_select_from_span(text)
     if not span:
-        return sql, rules
+        return sql, _NO_RULES
     core, select_idx, _ = span
     final_query = core[select_idx:]
-    final_upper = final_query.upper()
+    final_upper = _upper_sql(final_query)
     if "HOSPITAL_EXPIRE_FLAG" not in final_upper:
-        return sql, rules
+        return sql, _NO_RULES
     if "DEATHTIME" in final_upper and "INTIME" in final_upper and "OUTTIME" in final_upper:
-        return sql, rules
-
-    def _find_column_ref(fragment: str, column: str) -> str | None:
-        aliased = re.search(rf"\b([A-Za-z0-9_]+)\.{column}\b", fragment, re.IGNORECASE)
-        if aliased:
-            return f"{aliased.group(1)}.{column.upper()}"
-        if re.search(rf"\b{column}\b", fragment, re.IGNORECASE):
-            return column.upper()
-        return None
+        return sql, _NO_RULES
 
     intime_ref = _find_column_ref(final_query, "INTIME")
     outtime_ref = _find_column_ref(final_query, "OUTTIME")
@@ -3139,7 +3534,7 @@ def _rewrite_icu_mortality_outcome_alignment(question: str, sql: str) -> tuple[s
         else:
             # Avoid introducing invalid aliases when ICU timing columns are not available
             # in the final query scope (e.g., hidden inside a CTE).
-            return sql, rules
+            return sql, _NO_RULES
 
     adm_alias = _find_table_alias(final_query, "ADMISSIONS")
     death_ref = f"{adm_alias}.DEATHTIME" if adm_alias else "DEATHTIME"
@@ -3155,159 +3550,169 @@ def _rewrite_icu_mortality_outcome_alignment(question: str, sql: str) -> tuple[s
         re.IGNORECASE,
     )
     rewritten = case_pattern.sub(f"CASE WHEN {aligned_pred} THEN 1 ELSE 0 END", text)
-    rewritten = re.sub(
-        r"(?:[A-Za-z0-9_]+\.)?HOSPITAL_EXPIRE_FLAG\s*=\s*1",
-        aligned_pred,
-        rewritten,
-        flags=re.IGNORECASE,
-    )
+    rewritten = _HOSPITAL_EXPIRE_FLAG_EQ_ONE_RE.sub(aligned_pred, rewritten)
+    rules: list[str] = []
     if rewritten != text:
         rules.append("icu_mortality_hospital_expire_to_deathtime_alignment")
         return rewritten, rules
     return text, rules
 
 
-def _rewrite_unrequested_first_icu_window(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip().lower()
-    text = str(sql or "").strip()
-    if not text:
-        return sql, rules
-    if _FIRST_ICU_INTENT_RE.search(q):
-        return sql, rules
-
-    if not re.search(r"\bICUSTAYS\b", text, re.IGNORECASE):
-        return sql, rules
-    if not re.search(r"\bROW_NUMBER\s*\(", text, re.IGNORECASE):
-        return sql, rules
-    if not re.search(
-        r"ROW_NUMBER\s*\(\s*\)\s*OVER\s*\(\s*PARTITION\s+BY\s+[^)]*SUBJECT_ID[^)]*ORDER\s+BY\s+[A-Za-z0-9_\.]*INTIME",
-        text,
-        re.IGNORECASE,
-    ):
-        return sql, rules
-    if not re.search(r"\b(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\b", text, re.IGNORECASE):
-        return sql, rules
-
-    rewritten = text
-    rewritten = re.sub(
-        r"\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s+AND\s+",
-        "WHERE ",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(
-        r"\bAND\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*",
-        "",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(
-        r"\bWHERE\s+\(*\s*(?:[A-Za-z0-9_]+\.)?(?:RN_FIRST_ICU|RN)\s*=\s*1\s*\)*\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)",
-        "",
-        rewritten,
-        flags=re.IGNORECASE,
-    )
-    rewritten = re.sub(r"\bWHERE\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)", "", rewritten, flags=re.IGNORECASE)
-    rewritten = re.sub(r"\s{2,}", " ", rewritten).strip()
+_ROW_NUMBER_CALL_RE = re.compile(r"\bROW_NUMBER\s*\(", re.IGNORECASE)
+_ROW_NUMBER_OVER_INTIME_RE = re.compile(
+    r"ROW_NUMBER\s*\(\s*\)\s*OVER\s*\(\s*PARTITION\s+BY\s+[^)]*SUBJECT_ID[^)]*ORDER\s+BY\s+[A-Za-z0-9_\.]*INTIME",
+    re.IGNORECASE,
+)
 
+
+def _rewrite_unrequested_first_icu_window(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = _lower_question(question).strip()
+    text = (sql or "").strip()
+    if not text:
+        return sql, _NO_RULES
+    if _question_has_intent(_FIRST_ICU_INTENT_RE, q):
+        return sql, _NO_RULES
+
+    if not _sql_mentions(text, "ICUSTAYS"):
+        return sql, _NO_RULES
+    if not _ROW_NUMBER_CALL_RE.search(text):
+        return sql, _NO_RULES
+    if not _ROW_NUMBER_OVER_INTIME_RE.search(text):
+        return sql, _NO_RULES
+    if not _RN_FIRST_EQ_ONE_RE.search(text):
+        return sql, _NO_RULES
+
+    rewritten = _strip_rn_first_filters(text)
+
+    rules: list[str] = []
     if rewritten != text:
         rules.append("remove_unrequested_first_icu_filter")
         return rewritten, rules
     return text, rules
 
 
-def _rewrite_admissions_icd_count_grain(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").lower()
+_COUNT_CALL_WITH_ALIAS_RE = re.compile(
+    r"\bCOUNT\s*\(\s*(?:\*|[A-Za-z0-9_\.]+)\s*\)\s*(?:AS\s+[A-Za-z0-9_]+)?",
+    re.IGNORECASE,
+)
+_ICD_CODE_NOT_NULL_RE = re.compile(r"\bICD_CODE\s+IS\s+NOT\s+NULL\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _hadm_join_eq_re(left_alias: str, right_alias: str) -> re.Pattern[str]:
+    left = re.escape(left_alias)
+    right = re.escape(right_alias)
+    return re.compile(
+        rf"\b{left}\s*\.\s*HADM_ID\s*=\s*{right}\s*\.\s*HADM_ID\b"
+        rf"|\b{right}\s*\.\s*HADM_ID\s*=\s*{left}\s*\.\s*HADM_ID\b",
+        re.IGNORECASE,
+    )
+
+
+def _rewrite_admissions_icd_count_grain(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = _lower_question(question)
     if "count" not in q or "admission" not in q:
-        return sql, rules
+        return sql, _NO_RULES
     if "code" not in q or ("diagnos" not in q and "진단" not in q and "procedur" not in q and "시술" not in q):
-        return sql, rules
+        return sql, _NO_RULES
 
-    text = str(sql or "").strip()
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    upper = text.upper()
+        return sql, _NO_RULES
+    upper = _upper_sql(text)
     if "GROUP BY" in upper:
-        return sql, rules
+        return sql, _NO_RULES
     if "ADMISSIONS" not in upper:
-        return sql, rules
+        return sql, _NO_RULES
 
     target_table = "DIAGNOSES_ICD" if ("diagnos" in q or "진단" in q) else "PROCEDURES_ICD"
     if target_table not in upper:
-        return sql, rules
+        return sql, _NO_RULES
 
     adm_alias = _find_table_alias(text, "ADMISSIONS") or "ADMISSIONS"
     icd_alias = _find_table_alias(text, target_table) or target_table
 
-    count_rewritten = re.sub(
-        r"\bCOUNT\s*\(\s*(?:\*|[A-Za-z0-9_\.]+)\s*\)\s*(?:AS\s+[A-Za-z0-9_]+)?",
-        f"COUNT(DISTINCT {adm_alias}.HADM_ID) AS CNT ",
-        text,
-        count=1,
-        flags=re.IGNORECASE,
-    )
+    count_rewritten = _COUNT_CALL_WITH_ALIAS_RE.sub(f"COUNT(DISTINCT {adm_alias}.HADM_ID) AS CNT ", text, count=1)
+    rules: list[str] = []
     if count_rewritten != text:
         text = count_rewritten
         rules.append("admissions_icd_count_distinct_hadm")
 
-    hadm_join_re = re.compile(
-        rf"\b{re.escape(adm_alias)}\s*\.\s*HADM_ID\s*=\s*{re.escape(icd_alias)}\s*\.\s*HADM_ID\b"
-        rf"|\b{re.escape(icd_alias)}\s*\.\s*HADM_ID\s*=\s*{re.escape(adm_alias)}\s*\.\s*HADM_ID\b",
-        re.IGNORECASE,
-    )
-    if not hadm_join_re.search(text):
+    if not _hadm_join_eq_re(adm_alias, icd_alias).search(text):
         text = _append_where_predicate(text, f"{adm_alias}.HADM_ID = {icd_alias}.HADM_ID")
         rules.append("admissions_icd_join_add_hadm_id")
 
-    if not re.search(r"\bICD_CODE\s+IS\s+NOT\s+NULL\b", text, re.IGNORECASE):
+    if not _ICD_CODE_NOT_NULL_RE.search(text):
         text = _append_where_predicate(text, f"{icd_alias}.ICD_CODE IS NOT NULL")
         rules.append("admissions_icd_require_code_not_null")
 
-    text = re.sub(r"\s{2,}", " ", text).strip()
+    text = _MULTI_SPACE_RE.sub(" ", text).strip()
     return text, rules
 
 
+_GENDER_TOKEN_LOOKUP: dict[str, tuple[str, str]] = {
+    "diagnos": ("DIAGNOSES_ICD", "dx"),
+    "진단": ("DIAGNOSES_ICD", "dx"),
+    "procedur": ("PROCEDURES_ICD", "pr"),
+    "시술": ("PROCEDURES_ICD", "pr"),
+    "수술": ("PROCEDURES_ICD", "pr"),
+    "transfer": ("TRANSFERS", "t"),
+    "이동": ("TRANSFERS", "t"),
+    "service": ("SERVICES", "s"),
+    "서비스": ("SERVICES", "s"),
+    "prescription": ("PRESCRIPTIONS", "r"),
+    "약물": ("PRESCRIPTIONS", "r"),
+    "처방": ("PRESCRIPTIONS", "r"),
+    "drug": ("PRESCRIPTIONS", "r"),
+    "medication": ("PRESCRIPTIONS", "r"),
+    "chart event": ("CHARTEVENTS", "c"),
+    "chart": ("CHARTEVENTS", "c"),
+    "차트": ("CHARTEVENTS", "c"),
+    "lab event": ("LABEVENTS", "l"),
+    "lab": ("LABEVENTS", "l"),
+    "검사": ("LABEVENTS", "l"),
+    "icu": ("ICUSTAYS", "i"),
+    "admission": ("ADMISSIONS", "a"),
+    "입원": ("ADMISSIONS", "a"),
+}
+
+_GENDER_COUNT_TMPL = (
+    "SELECT p.GENDER, COUNT(*) AS CNT "
+    "FROM {table} {alias} "
+    "JOIN PATIENTS p ON {alias}.SUBJECT_ID = p.SUBJECT_ID "
+    "WHERE p.GENDER IS NOT NULL "
+    "GROUP BY p.GENDER "
+    "ORDER BY CNT DESC"
+)
+
+
 def _infer_gender_count_target(question: str) -> tuple[str, str] | None:
-    q = str(question or "").lower()
-    mapping: list[tuple[tuple[str, ...], tuple[str, str]]] = [
-        (("diagnos", "진단"), ("DIAGNOSES_ICD", "dx")),
-        (("procedur", "시술", "수술"), ("PROCEDURES_ICD", "pr")),
-        (("transfer", "이동"), ("TRANSFERS", "t")),
-        (("service", "서비스"), ("SERVICES", "s")),
-        (("prescription", "약물", "처방", "drug", "medication"), ("PRESCRIPTIONS", "r")),
-        (("chart event", "chart", "차트"), ("CHARTEVENTS", "c")),
-        (("lab event", "lab", "검사"), ("LABEVENTS", "l")),
-        (("icu",), ("ICUSTAYS", "i")),
-        (("admission", "입원"), ("ADMISSIONS", "a")),
-    ]
-    for tokens, target in mapping:
-        if any(token in q for token in tokens):
+    q = _lower_question(question)
+    for token, target in _GENDER_TOKEN_LOOKUP.items():
+        if token in q:
             return target
     return None
 
 
-def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip()
+def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = (question or "").strip()
     if not q:
-        return sql, rules
-    q_lower = q.lower()
+        return sql, _NO_RULES
+    q_lower = _lower_question(q)
     by_gender_intent = bool(_COUNT_BY_GENDER_EN_RE.search(q_lower) or _COUNT_BY_GENDER_KO_RE.search(q))
     if not by_gender_intent:
-        return sql, rules
-    if any(token in q_lower for token in ("rate", "ratio", "평균", "비율", "median", "중앙", "중위")):
-        return sql, rules
+        return sql, _NO_RULES
+    if _RATE_LIKE_HINT_RE.search(q_lower):
+        return sql, _NO_RULES
 
-    text = str(sql or "").strip()
-    upper = text.upper()
+    text = (sql or "").strip()
+    upper = _upper_sql(text)
     if "COUNT(" not in upper or "GENDER" not in upper:
-        return sql, rules
+        return sql, _NO_RULES
 
     target = _infer_gender_count_target(q)
     if not target:
-        return sql, rules
+        return sql, _NO_RULES
     target_table, target_alias = target
     suspicious = (
         "CUSTOMER" in upper
@@ -3318,93 +3723,85 @@ def _rewrite_count_by_gender_template(question: str, sql: str) -> tuple[str, lis
         or "PATIENTS" not in upper
     )
     if not suspicious:
-        return sql, rules
+        return sql, _NO_RULES
 
-    rewritten = (
-        f"SELECT p.GENDER, COUNT(*) AS CNT "
-        f"FROM {target_table} {target_alias} "
-        f"JOIN PATIENTS p ON {target_alias}.SUBJECT_ID = p.SUBJECT_ID "
-        f"WHERE p.GENDER IS NOT NULL "
-        f"GROUP BY p.GENDER "
-        f"ORDER BY CNT DESC"
-    )
+    rewritten = _GENDER_COUNT_TMPL.format(table=target_table, alias=target_alias)
+    rules: list[str] = []
     rules.append(f"count_by_gender_template:{target_table}")
     return rewritten, rules
 
 
-def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip()
+_PARTITION_BY_AGE_GROUP_RE = re.compile(r"\bPARTITION\s+BY\b[^\n;]*\bAGE_GROUP\b")
+_MAX_MIN_METRIC_RE = re.compile(r"\b(?P<agg>MAX|MIN)\s*\(\s*(?P<metric>[A-Za-z_][A-Za-z0-9_$#\.]*)\s*\)", re.IGNORECASE)
+_GROUP_BY_LIST_RE = re.compile(r"\bGROUP\s+BY\b\s+(.+?)(?:\bORDER\s+BY\b|$)", re.IGNORECASE | re.DOTALL)
+_AS_AGE_GROUP_RE = re.compile(r"\bAS\s+AGE_GROUP\b", re.IGNORECASE)
+_GENDER_WORD_RE = re.compile(r"\bGENDER\b", re.IGNORECASE)
+_AGE_GROUP_OR_ANCHOR_AGE_RE = re.compile(r"\bAGE_GROUP\b|\bANCHOR_AGE\b", re.IGNORECASE)
+
+
+def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = (question or "").strip()
     if not q:
-        return sql, rules
+        return sql, _NO_RULES
     if not (
-        _AGE_GROUP_INTENT_RE.search(q)
-        and _GENDER_INTENT_RE.search(q)
-        and _EXTREMA_INTENT_RE.search(q)
-        and _DIAGNOSIS_INTENT_RE.search(q)
+        _question_has_intent(_AGE_GROUP_INTENT_RE, q)
+        and _question_has_intent(_GENDER_INTENT_RE, q)
+        and _question_has_intent(_EXTREMA_INTENT_RE, q)
+        and _question_has_intent(_DIAGNOSIS_INTENT_RE, q)
     ):
-        return sql, rules
+        return sql, _NO_RULES
 
-    text = str(sql or "").strip().rstrip(";")
-    upper = text.upper()
+    text = (sql or "").strip().rstrip(";")
+    upper = _upper_sql(text)
     if "PATIENTS" not in upper or "DIAGNOSES_ICD" not in upper or "COUNT(" not in upper:
-        return sql, rules
-    if re.search(r"\bPARTITION\s+BY\b[^\n;]*\bAGE_GROUP\b", upper, re.IGNORECASE):
-        return sql, rules
+        return sql, _NO_RULES
+    # The rewrite needs an inner AS AGE_GROUP / GENDER projection under an outer MAX/MIN.
+    if "AGE_GROUP" not in upper or "GENDER" not in upper or ("MAX" not in upper and "MIN" not in upper):
+        return sql, _NO_RULES
+    if _PARTITION_BY_AGE_GROUP_RE.search(upper):
+        return sql, _NO_RULES
 
     span = _find_final_select_from_span(text)
     if not span:
-        return sql, rules
+        return sql, _NO_RULES
     core, select_idx, from_idx = span
     select_clause = core[select_idx + len("SELECT"):from_idx].strip()
 
-    agg_match = re.search(
-        r"\b(?P<agg>MAX|MIN)\s*\(\s*(?P<metric>[A-Za-z_][A-Za-z0-9_$#\.]*)\s*\)",
-        select_clause,
-        re.IGNORECASE,
-    )
+    agg_match = _MAX_MIN_METRIC_RE.search(select_clause)
     if not agg_match:
-        return sql, rules
+        return sql, _NO_RULES
 
     metric = str(agg_match.group("metric") or "").split(".")[-1].strip()
     if not _IDENT_RE.fullmatch(metric):
-        return sql, rules
+        return sql, _NO_RULES
 
     source_start = from_idx + len("FROM")
     while source_start < len(core) and core[source_start].isspace():
         source_start += 1
     if source_start >= len(core) or core[source_start] != "(":
-        return sql, rules
+        return sql, _NO_RULES
     source_end = _find_matching_paren_index(core, source_start)
     if source_end is None:
-        return sql, rules
+        return sql, _NO_RULES
 
     inner_sql = core[source_start + 1:source_end].strip().rstrip(";")
-    if not inner_sql.upper().startswith("SELECT"):
-        return sql, rules
-    if not re.search(r"\bAS\s+AGE_GROUP\b", inner_sql, re.IGNORECASE):
-        return sql, rules
-    if not re.search(r"\bGENDER\b", inner_sql, re.IGNORECASE):
-        return sql, rules
-    if not re.search(
-        rf"\bAS\s+{re.escape(metric)}\b|\b{re.escape(metric)}\b",
-        inner_sql,
-        re.IGNORECASE,
-    ):
-        return sql, rules
+    if inner_sql[:6].upper() != "SELECT":
+        return sql, _NO_RULES
+    if not _AS_AGE_GROUP_RE.search(inner_sql):
+        return sql, _NO_RULES
+    if not _GENDER_WORD_RE.search(inner_sql):
+        return sql, _NO_RULES
+    if not _mentions_word(inner_sql, metric):
+        return sql, _NO_RULES
 
     outer_tail = core[source_end + 1:]
-    group_match = re.search(
-        r"\bGROUP\s+BY\b\s+(.+?)(?:\bORDER\s+BY\b|$)",
-        outer_tail,
-        re.IGNORECASE | re.DOTALL,
-    )
+    group_match = _GROUP_BY_LIST_RE.search(outer_tail)
     if group_match:
         group_clause = group_match.group(1)
-        if not re.search(r"\bGENDER\b", group_clause, re.IGNORECASE):
-            return sql, rules
-        if re.search(r"\bAGE_GROUP\b|\bANCHOR_AGE\b", group_clause, re.IGNORECASE):
-            return sql, rules
+        if not _GENDER_WORD_RE.search(group_clause):
+            return sql, _NO_RULES
+        if _AGE_GROUP_OR_ANCHOR_AGE_RE.search(group_clause):
+            return sql, _NO_RULES
 
     order_dir = "ASC" if agg_match.group("agg").upper() == "MIN" else "DESC"
     rewritten = (
@@ -3419,6 +3816,7 @@ def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> t
         "WHERE age_group_rank = 1 "
         f"ORDER BY age_group, {metric} {order_dir}"
     )
+    rules: list[str] = []
     rules.append(f"age_group_diagnosis_extrema_by_gender:{order_dir.lower()}")
     return rewritten, rules
 
@@ -3426,94 +3824,104 @@ def _rewrite_age_group_diagnosis_extrema_by_gender(question: str, sql: str) -> t
 def _strip_for_update(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    if _FOR_UPDATE_RE.search(text):
+    if "UPDATE" in _scan_sql_tokens(text) and _FOR_UPDATE_RE.search(text):
         text = _FOR_UPDATE_RE.sub("", text)
         rules.append("strip_for_update")
     return text, rules
 
 
-def _wrap_top_n(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _wrap_top_n(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bROWNUM\b", text, re.IGNORECASE) or _LIMIT_RE.search(text) or _FETCH_RE.search(text):
-        return text, rules
-
-    q = question.lower()
-    match = re.search(r"\btop\s+(\d+)\b", q)
-    if not match and not any(k in q for k in ("top", "most", "highest")):
-        return text, rules
+    q = _lower_question(question)
+    match = _TOP_N_EN_RE.search(q) if "top" in q else None
+    if not match and not _question_has_keyword(q, _TOP_RANK_HINT_KEYWORDS):
+        return text, _NO_RULES
+    if _sql_mentions(text, "ROWNUM") or _has_limit_or_fetch(text):
+        return text, _NO_RULES
     n = int(match.group(1)) if match else 10
     if n <= 0:
-        return text, rules
+        return text, _NO_RULES
 
     text = _wrap_with_rownum(text, n)
+    rules: list[str] = []
     rules.append(f"wrap_top_{n}_rownum")
     return text, rules
 
 
-def _reorder_count_select(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_COUNT_FIRST_SELECT_RE = re.compile(
+    r"^\s*SELECT\s+COUNT\(\*\)\s+AS\s+CNT\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
+    re.IGNORECASE,
+)
+
+
+def _reorder_count_select(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    pattern = re.compile(
-        r"^\s*SELECT\s+COUNT\(\*\)\s+AS\s+CNT\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
-        re.IGNORECASE,
-    )
-    match = pattern.search(text)
+    match = _COUNT_FIRST_SELECT_RE.search(text)
     if not match:
-        return text, rules
+        return text, _NO_RULES
     col = match.group(1)
-    text = pattern.sub(f"SELECT {col}, COUNT(*) AS CNT FROM", text, count=1)
+    text = _COUNT_FIRST_SELECT_RE.sub(f"SELECT {col}, COUNT(*) AS CNT FROM", text, count=1)
+    rules: list[str] = []
     rules.append("reorder_count_select")
     return text, rules
 
 
-def _reorder_avg_select(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_AVG_FIRST_SELECT_RE = re.compile(
+    r"^\s*SELECT\s+AVG\(\s*([A-Za-z0-9_\.]+)\s*\)\s+AS\s+([A-Za-z0-9_]+)\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
+    re.IGNORECASE,
+)
+
+
+def _reorder_avg_select(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    pattern = re.compile(
-        r"^\s*SELECT\s+AVG\(\s*([A-Za-z0-9_\.]+)\s*\)\s+AS\s+([A-Za-z0-9_]+)\s*,\s*([A-Za-z0-9_\.]+)\s+FROM",
-        re.IGNORECASE,
-    )
-    match = pattern.search(text)
+    match = _AVG_FIRST_SELECT_RE.search(text)
     if not match:
-        return text, rules
+        return text, _NO_RULES
     avg_expr = match.group(1)
     avg_alias = match.group(2)
     col = match.group(3)
-    text = pattern.sub(f"SELECT {col}, AVG({avg_expr}) AS {avg_alias} FROM", text, count=1)
+    text = _AVG_FIRST_SELECT_RE.sub(f"SELECT {col}, AVG({avg_expr}) AS {avg_alias} FROM", text, count=1)
+    rules: list[str] = []
     rules.append("reorder_avg_select")
     return text, rules
 
 
-def _ensure_avg_not_null(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_AVG_CALL_RE = re.compile(r"AVG\s*\(\s*([A-Za-z0-9_\.]+)\s*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _is_not_null_re(ref: str, unqualified: bool = False) -> re.Pattern[str]:
+    prefix = r"(?<!\.)" if unqualified else ""
+    return re.compile(rf"{prefix}\b{re.escape(ref)}\b\s+IS\s+NOT\s+NULL", re.IGNORECASE)
+
+
+def _ensure_avg_not_null(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if re.search(r"\bFROM\s*\(\s*SELECT\b", text, re.IGNORECASE):
+    if "AVG" not in _upper_sql(text):
+        return text, _NO_RULES
+    if _FROM_SUBQUERY_RE.search(text):
         # Avoid injecting predicates into inner GROUP BY blocks of derived tables.
-        return text, rules
-    avg_exprs: list[str] = []
-
-    for match in re.finditer(r"AVG\s*\(\s*([A-Za-z0-9_\.]+)\s*\)", text, re.IGNORECASE):
-        expr = match.group(1)
-        avg_exprs.append(expr)
+        return text, _NO_RULES
+    avg_exprs = _AVG_CALL_RE.findall(text)
 
     if not avg_exprs:
-        return text, rules
+        return text, _NO_RULES
 
+    rules: list[str] = []
     for expr in avg_exprs:
         col = expr.split(".")[-1]
-        if re.search(rf"\b{re.escape(expr)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
+        if _is_not_null_re(expr).search(text):
             continue
-        if re.search(rf"(?<!\.)\b{re.escape(col)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
+        if _is_not_null_re(col, unqualified=True).search(text):
             continue
 
         predicate = f"{expr} IS NOT NULL"
-        if re.search(r"\bwhere\b", text, re.IGNORECASE):
-            text = re.sub(r"\bwhere\b", f"WHERE {predicate} AND", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\bgroup\s+by\b", f"WHERE {predicate} GROUP BY", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\border\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\border\s+by\b", f"WHERE {predicate} ORDER BY", text, count=1, flags=re.IGNORECASE)
+        if _WHERE_KW_RE.search(text):
+            text = _WHERE_KW_RE.sub(f"WHERE {predicate} AND", text, count=1)
+        elif _GROUP_BY_KW_RE.search(text):
+            text = _GROUP_BY_KW_RE.sub(f"WHERE {predicate} GROUP BY", text, count=1)
+        elif _ORDER_BY_KW_RE.search(text):
+            text = _ORDER_BY_KW_RE.sub(f"WHERE {predicate} ORDER BY", text, count=1)
         else:
             text = text.rstrip(";") + f" WHERE {predicate}"
         rules.append(f"avg_not_null_{col.lower()}")
@@ -3521,193 +3929,186 @@ def _ensure_avg_not_null(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
-def _strip_transfers_eventtype_filter(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not re.search(r"\bTRANSFERS\b", text, re.IGNORECASE):
-        return text, rules
-
-    q = question.lower()
-    explicit_eventtype_intent = any(
-        token in q
-        for token in (
-            "event type",
-            "eventtype",
-            "이벤트 유형",
-            "이벤트 타입",
-            "이벤트 종류",
-            "전입/전출 유형",
-            "전입",
-            "전출",
-            "전원",
-            "admit",
-            "discharge",
+_EVENTTYPE_QUESTION_INTENT_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            (
+                "event type",
+                "eventtype",
+                "이벤트 유형",
+                "이벤트 타입",
+                "이벤트 종류",
+                "전입/전출 유형",
+                "전입",
+                "전출",
+                "전원",
+                "admit",
+                "discharge",
+            ),
         )
     )
-    if explicit_eventtype_intent:
-        return text, rules
+)
 
-    column_pattern = r"(?:UPPER\s*\(\s*)?(?:[A-Za-z0-9_]+\.)?EVENTTYPE(?:\s*\))?"
-    value_pattern = r"'TRANSFERS'"
-    predicate_pattern = rf"{column_pattern}\s*=\s*{value_pattern}"
 
-    text = re.sub(
-        rf"\bWHERE\s+{predicate_pattern}\s+AND\s+",
-        "WHERE ",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\s+AND\s+{predicate_pattern}",
-        "",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\bWHERE\s+{predicate_pattern}\s+(GROUP\s+BY|ORDER\s+BY|HAVING)\b",
-        r" \1",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\bWHERE\s+{predicate_pattern}\s*(;)?\s*$",
-        r"\1",
-        text,
-        flags=re.IGNORECASE,
+def _predicate_strip_re(predicate: str) -> re.Pattern[str]:
+    # One pass over the text: a WHERE-led run of predicates keeps only what its
+    # tail needs (WHERE / clause keyword / semicolon); "AND <predicate>" is dropped.
+    return re.compile(
+        rf"\bWHERE\s+(?:{predicate}\s+AND\s+)*{predicate}"
+        rf"(?:(?P<and>\s+AND\s+)|\s+(?P<clause>GROUP\s+BY|ORDER\s+BY|HAVING)\b|\s*(?P<semi>;)?\s*$)"
+        rf"|\s+AND\s+{predicate}",
+        re.IGNORECASE,
     )
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s{2,}", " ", text).strip()
+
+
+def _predicate_strip_repl(match: re.Match) -> str:
+    if match.group("and"):
+        return "WHERE "
+    if match.group("clause"):
+        return f" {match.group('clause')}"
+    return match.group("semi") or ""
+
+
+_WHERE_CONNECTIVE_REPLACEMENTS = {"wd": "", "wa": "WHERE", "aa": "AND", "ws": " "}
+
+
+@lru_cache(maxsize=32)
+def _where_connective_cleanup_re(dangling_where: bool, double_and: bool, squash_spaces: bool) -> re.Pattern[str]:
+    branches = []
+    if dangling_where:
+        branches.append(r"(?P<wd>\bWHERE(?:\s+AND\b)*\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$))")
+    branches.append(r"(?P<wa>\bWHERE\s+AND\b)")
+    if double_and:
+        branches.append(r"(?P<aa>\bAND\s+AND\b)")
+    if squash_spaces:
+        branches.append(r"(?P<ws>\s{2,})")
+    return re.compile("|".join(branches), re.IGNORECASE)
+
+
+def _where_connective_repl(match: re.Match[str]) -> str:
+    return _WHERE_CONNECTIVE_REPLACEMENTS[match.lastgroup or ""]
+
+
+def _cleanup_where_connectives(
+    text: str,
+    *,
+    dangling_where: bool = True,
+    double_and: bool = True,
+    squash_spaces: bool = True,
+) -> str:
+    """Collapse WHERE AND / AND AND / dangling WHERE / runs of whitespace in a single pass."""
+    pattern = _where_connective_cleanup_re(dangling_where, double_and, squash_spaces)
+    return pattern.sub(_where_connective_repl, text)
+
+
+_TRANSFERS_EVENTTYPE_STRIP_RE = _predicate_strip_re(
+    r"(?:UPPER\s*\(\s*)?(?:[A-Za-z0-9_]+\.)?EVENTTYPE(?:\s*\))?\s*=\s*'TRANSFERS'"
+)
+_EVENTTYPE_STRIP_RE = _predicate_strip_re(r"(?:[A-Za-z0-9_]+\.)?EVENTTYPE\s*=\s*'[^']*'")
+
+
+def _strip_transfers_eventtype_filter(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    text = sql
+    if not _sql_mentions(text, "TRANSFERS"):
+        return text, _NO_RULES
+
+    q = _lower_question(question)
+    explicit_eventtype_intent = _question_has_intent(_EVENTTYPE_QUESTION_INTENT_RE, q)
+    if explicit_eventtype_intent:
+        return text, _NO_RULES
+
+    text = _TRANSFERS_EVENTTYPE_STRIP_RE.sub(_predicate_strip_repl, text)
+    text = _cleanup_where_connectives(text, dangling_where=False, double_and=False).strip()
+    rules: list[str] = []
     if text != sql:
         rules.append("strip_transfers_eventtype_filter")
     return text, rules
 
 
-def _strip_invalid_eventtype_filter_for_non_transfers(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = str(sql or "").strip()
+def _strip_invalid_eventtype_filter_for_non_transfers(sql: str) -> tuple[str, Sequence[str]]:
+    text = (sql or "").strip()
     if not text:
-        return sql, rules
-    if "EVENTTYPE" not in text.upper():
-        return text, rules
-    if re.search(r"\bTRANSFERS\b", text, re.IGNORECASE):
-        return text, rules
-
-    column_pattern = r"(?:[A-Za-z0-9_]+\.)?EVENTTYPE"
-    value_pattern = r"'[^']*'"
-
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s+AND\s+",
-        "WHERE ",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\s+AND\s+{column_pattern}\s*=\s*{value_pattern}",
-        "",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s+(GROUP\s+BY|ORDER\s+BY|HAVING)\b",
-        r" \1",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s*(;)?\s*$",
-        r"\1",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bAND\s+AND\b", "AND", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bWHERE\s*(?=\bGROUP\b|\bORDER\b|\bHAVING\b|$)", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s{2,}", " ", text).strip()
+        return sql, _NO_RULES
+    if "EVENTTYPE" not in _upper_sql(text):
+        return text, _NO_RULES
+    if _sql_mentions(text, "TRANSFERS"):
+        return text, _NO_RULES
+
+    text = _EVENTTYPE_STRIP_RE.sub(_predicate_strip_repl, text)
+    text = _cleanup_where_connectives(text).strip()
+    rules: list[str] = []
     if text != sql:
         rules.append("strip_nontransfers_eventtype_filter")
     return text, rules
 
 
-def _strip_inpatient_admission_type_filter(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not re.search(r"\bADMISSION_TYPE\b\s*=\s*'INPATIENT'", text, re.IGNORECASE):
-        return text, rules
+_ADMISSION_TYPE_INPATIENT_RE = re.compile(r"\bADMISSION_TYPE\b\s*=\s*'INPATIENT'", re.IGNORECASE)
+_INPATIENT_ADMISSION_TYPE_STRIP_RE = _predicate_strip_re(
+    r"(?:[A-Za-z0-9_]+\.)?ADMISSION_TYPE\s*=\s*'INPATIENT'"
+)
+
 
-    q = question.lower()
-    explicit_admission_type_intent = any(
-        token in q
-        for token in (
-            "admission type",
-            "admission_type",
-            "encounter class",
-            "admit type",
-            "입원 유형",
-            "입원 타입",
-            "입원 형태",
-            "입원 종류",
+_ADMISSION_TYPE_QUESTION_INTENT_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            (
+                "admission type",
+                "admission_type",
+                "encounter class",
+                "admit type",
+                "입원 유형",
+                "입원 타입",
+                "입원 형태",
+                "입원 종류",
+            ),
         )
     )
-    if explicit_admission_type_intent:
-        return text, rules
+)
 
-    column_pattern = r"(?:[A-Za-z0-9_]+\.)?ADMISSION_TYPE"
-    value_pattern = r"'INPATIENT'"
 
-    # WHERE admission_type='INPATIENT' AND ...
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s+AND\s+",
-        "WHERE ",
-        text,
-        flags=re.IGNORECASE,
-    )
-    # ... AND admission_type='INPATIENT'
-    text = re.sub(
-        rf"\s+AND\s+{column_pattern}\s*=\s*{value_pattern}",
-        "",
-        text,
-        flags=re.IGNORECASE,
-    )
-    # WHERE admission_type='INPATIENT' GROUP/ORDER/HAVING ...
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s+(GROUP\s+BY|ORDER\s+BY|HAVING)\b",
-        r" \1",
-        text,
-        flags=re.IGNORECASE,
-    )
-    # WHERE admission_type='INPATIENT' (end)
-    text = re.sub(
-        rf"\bWHERE\s+{column_pattern}\s*=\s*{value_pattern}\s*(;)?\s*$",
-        r"\1",
-        text,
-        flags=re.IGNORECASE,
-    )
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s{2,}", " ", text).strip()
+def _strip_inpatient_admission_type_filter(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    text = sql
+    if not _sql_mentions(text, "ADMISSION_TYPE"):
+        return text, _NO_RULES
+    if not _ADMISSION_TYPE_INPATIENT_RE.search(text):
+        return text, _NO_RULES
+
+    q = _lower_question(question)
+    explicit_admission_type_intent = _question_has_intent(_ADMISSION_TYPE_QUESTION_INTENT_RE, q)
+    if explicit_admission_type_intent:
+        return text, _NO_RULES
+
+    text = _INPATIENT_ADMISSION_TYPE_STRIP_RE.sub(_predicate_strip_repl, text)
+    text = _cleanup_where_connectives(text, dangling_where=False, double_and=False).strip()
+    rules: list[str] = []
     if text != sql:
         rules.append("strip_inpatient_admission_type_filter")
     return text, rules
 
 
-def _strip_time_window_if_absent(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+
+
+def _strip_time_window_if_absent(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
-    if _QUESTION_TIME_INTENT_RE.search(q):
-        return text, rules
+    q = _lower_question(question)
+    if _question_has_intent(_QUESTION_TIME_INTENT_RE, q):
+        return text, _NO_RULES
 
     if not _TIME_WINDOW_RE.search(text):
-        return text, rules
+        return text, _NO_RULES
 
     text = _TIME_WINDOW_RE.sub("", text)
-    text = re.sub(r"\bWHERE\s+AND\b", "WHERE", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bAND\s+AND\b", "AND", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bWHERE\s*(GROUP|ORDER)\b", r"\1", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bWHERE\s*$", "", text, flags=re.IGNORECASE)
+    text = _cleanup_where_connectives(text, squash_spaces=False)
+    rules: list[str] = []
     rules.append("strip_time_window")
     return text, rules
 
 
+_GROUP_BY_COLUMN_REF_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$#\\.]*")
+
+
 def _ensure_group_by_not_null(question: str, sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
@@ -3721,27 +4122,27 @@ def _ensure_group_by_not_null(question: str, sql: str) -> tuple[str, list[str]]:
             rules.append("group_by_not_null_inner")
             return f"SELECT * FROM ({inner_fixed}) WHERE ROWNUM <= {limit}", rules
         return text, rules
-    if "GROUP BY" not in text.upper():
+    if "GROUP BY" not in _upper_sql(text):
         return text, rules
-    q = question.lower()
+    q = _lower_question(question)
     if "by" not in q and "count" not in q:
         return text, rules
 
-    match = re.search(r"\bgroup\s+by\b\s+(.+?)(?:\border\s+by\b|$)", text, re.IGNORECASE | re.DOTALL)
+    match = _GROUP_BY_LIST_RE.search(text)
     if not match:
         return text, rules
     group_clause = match.group(1)
     cols = [c.strip() for c in group_clause.split(",") if c.strip()]
     simple_cols = []
     for col in cols:
-        if _IDENT_RE.fullmatch(col) or re.fullmatch(r"[A-Za-z_][A-Za-z0-9_$#\\.]*", col):
+        if _IDENT_RE.fullmatch(col) or _GROUP_BY_COLUMN_REF_RE.fullmatch(col):
             simple_cols.append(col)
     if not simple_cols:
         return text, rules
 
     filters = []
     for col in simple_cols:
-        if re.search(rf"\b{re.escape(col)}\b\s+IS\s+NOT\s+NULL", text, re.IGNORECASE):
+        if _is_not_null_re(col).search(text):
             continue
         filters.append(f"{col} IS NOT NULL")
 
@@ -3749,44 +4150,48 @@ def _ensure_group_by_not_null(question: str, sql: str) -> tuple[str, list[str]]:
         return text, rules
 
     predicate = " AND ".join(filters)
-    if re.search(r"\bwhere\b", text, re.IGNORECASE):
-        text = re.sub(r"\bwhere\b", f"WHERE {predicate} AND", text, count=1, flags=re.IGNORECASE)
+    if _WHERE_KW_RE.search(text):
+        text = _WHERE_KW_RE.sub(f"WHERE {predicate} AND", text, count=1)
     else:
-        if re.search(r"\bgroup\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\bgroup\s+by\b", f"WHERE {predicate} GROUP BY", text, count=1, flags=re.IGNORECASE)
-        elif re.search(r"\border\s+by\b", text, re.IGNORECASE):
-            text = re.sub(r"\border\s+by\b", f"WHERE {predicate} ORDER BY", text, count=1, flags=re.IGNORECASE)
+        if _GROUP_BY_KW_RE.search(text):
+            text = _GROUP_BY_KW_RE.sub(f"WHERE {predicate} GROUP BY", text, count=1)
+        elif _ORDER_BY_KW_RE.search(text):
+            text = _ORDER_BY_KW_RE.sub(f"WHERE {predicate} ORDER BY", text, count=1)
         else:
             text = text.rstrip(";") + f" WHERE {predicate}"
     rules.append("group_by_not_null")
     return text, rules
 
 
-def _ensure_order_by_count(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_order_by_count(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if "GROUP BY" not in text.upper() or "COUNT(" not in text.upper():
-        return text, rules
-    if re.search(r"\border\s+by\b", text, re.IGNORECASE):
-        return text, rules
-    q = question.lower()
+    upper = _upper_sql(text)
+    if "GROUP BY" not in upper or "COUNT(" not in upper:
+        return text, _NO_RULES
+    if _ORDER_BY_KW_RE.search(text):
+        return text, _NO_RULES
+    q = _lower_question(question)
     if "by" not in q and "top" not in q and "count" not in q and "most" not in q and "highest" not in q:
-        return text, rules
+        return text, _NO_RULES
 
     order_expr = "CNT"
-    if not re.search(r"\bCNT\b", text, re.IGNORECASE):
+    if not _sql_mentions(text, "CNT"):
         order_expr = "COUNT(*)"
 
     text = text.rstrip(";") + f" ORDER BY {order_expr} DESC"
+    rules: list[str] = []
     rules.append("order_by_count_desc")
     return text, rules
 
 
+_DUPLICATE_TABLE_ALIAS_RE = re.compile(r"\b(from|join)\s+([A-Za-z0-9_]+)\s+\2\b", re.IGNORECASE)
+
+
 def _dedupe_table_alias(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    text2 = re.sub(r"\b(from|join)\s+([A-Za-z0-9_]+)\s+\2\b", r"\1 \2", text, flags=re.IGNORECASE)
-    if text2 != text:
+    text2, count = _DUPLICATE_TABLE_ALIAS_RE.subn(r"\1 \2", text)
+    if count:
         rules.append("dedupe_table_alias")
     return text2, rules
 
@@ -3795,123 +4200,94 @@ def _rewrite_timestampdiff(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
 
-    def repl(match: re.Match) -> str:
-        start = match.group(1)
-        end = match.group(2)
-        return f"CAST({end} AS DATE) - CAST({start} AS DATE)"
-
-    new_text = _TS_DIFF_RE.sub(repl, text)
-    if new_text != text:
+    new_text, count = _TS_DIFF_RE.subn(r"CAST(\2 AS DATE) - CAST(\1 AS DATE)", text)
+    if count:
         rules.append("timestampdiff_day_to_date_diff")
     return new_text, rules
 
 
+def _unwrap_extract_anchor_year(match: re.Match) -> str:
+    expr = match.group(1)
+    col = expr.split(".")[-1].upper()
+    if col in {"ANCHOR_YEAR", "ANCHOR_YEAR_GROUP"}:
+        return expr
+    return match.group(0)
+
+
 def _rewrite_extract_year(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-
-    def repl(match: re.Match) -> str:
-        expr = match.group(1)
-        col = expr.split(".")[-1].upper()
-        if col in {"ANCHOR_YEAR", "ANCHOR_YEAR_GROUP"}:
-            return expr
-        return match.group(0)
-
-    new_text = _EXTRACT_YEAR_RE.sub(repl, text)
+    new_text = _EXTRACT_YEAR_RE.sub(_unwrap_extract_anchor_year, text)
     if new_text != text:
         rules.append("extract_year_on_anchor_year")
     return new_text, rules
 
 
-def _rewrite_icu_stay(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _ICU_STAY_RE.search(text):
-        return text, rules
-
-    alias = _find_table_alias(text, "ADMISSIONS")
-    if alias is None:
-        return text, rules
-
-    replacement = (
-        f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-        f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-    )
-    text = _ICU_STAY_RE.sub(replacement, text)
-    rules.append("icu_stay_to_icustays")
-    return text, rules
+_ICUSTAYS_EXISTS_TMPL = (
+    "EXISTS (SELECT 1 FROM ICUSTAYS i "
+    "WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
+)
 
 
-def _rewrite_icustays_flag(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_icu_existence(
+    sql: str,
+    detector: re.Pattern[str],
+    rule_name: str,
+    *,
+    hadm_table_fallback: bool = False,
+) -> tuple[str, Sequence[str]]:
     text = sql
-    if not _ICUSTAYS_FLAG_RE.search(text):
-        return text, rules
+    if not detector.search(text):
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, "ADMISSIONS")
-    if alias is None:
-        m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
+    if alias is not None:
+        replacement = _ICUSTAYS_EXISTS_TMPL.format(alias=alias)
+    elif not hadm_table_fallback:
+        return text, _NO_RULES
+    else:
+        replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
+        m = _first_from_table(text)
         if m:
             base_table = m.group(1)
             base_alias = m.group(2) or base_table
             if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
                 base_alias = base_table
             if base_table.upper() in _tables_with_hadm_id():
-                alias = base_alias
-
-    replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    if alias and _find_table_alias(text, "ADMISSIONS"):
-        replacement = (
-            f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-            f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-        )
-    elif alias:
-        replacement = f"{alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    text = _ICUSTAYS_FLAG_RE.sub(replacement, text)
-    rules.append("icustays_flag_to_icustays")
+                replacement = f"{base_alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
+    text = detector.sub(replacement, text)
+    rules: list[str] = []
+    rules.append(rule_name)
     return text, rules
 
 
-def _rewrite_icustays_not_null(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _ICUSTAYS_NOT_NULL_RE.search(text):
-        return text, rules
+def _rewrite_icu_stay(sql: str) -> tuple[str, Sequence[str]]:
+    return _rewrite_icu_existence(sql, _ICU_STAY_RE, "icu_stay_to_icustays")
 
-    alias = _find_table_alias(text, "ADMISSIONS")
-    if alias is None:
-        m = re.search(r"\bfrom\s+([A-Za-z0-9_]+)(?:\s+([A-Za-z0-9_]+))?", text, re.IGNORECASE)
-        if m:
-            base_table = m.group(1)
-            base_alias = m.group(2) or base_table
-            if base_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER"}:
-                base_alias = base_table
-            if base_table.upper() in _tables_with_hadm_id():
-                alias = base_alias
 
-    replacement = "HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    if alias and _find_table_alias(text, "ADMISSIONS"):
-        replacement = (
-            f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-            f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
-        )
-    elif alias:
-        replacement = f"{alias}.HADM_ID IN (SELECT HADM_ID FROM ICUSTAYS)"
-    text = _ICUSTAYS_NOT_NULL_RE.sub(replacement, text)
-    rules.append("icustays_not_null_to_icustays")
-    return text, rules
+def _rewrite_has_icu_stay(sql: str) -> tuple[str, Sequence[str]]:
+    return _rewrite_icu_existence(sql, _HAS_ICU_RE, "has_icu_stay_to_icustays")
 
 
-def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_icustays_flag(sql: str) -> tuple[str, Sequence[str]]:
+    return _rewrite_icu_existence(sql, _ICUSTAYS_FLAG_RE, "icustays_flag_to_icustays", hadm_table_fallback=True)
+
+
+def _rewrite_icustays_not_null(sql: str) -> tuple[str, Sequence[str]]:
+    return _rewrite_icu_existence(
+        sql, _ICUSTAYS_NOT_NULL_RE, "icustays_not_null_to_icustays", hadm_table_fallback=True
+    )
+
+
+def _ensure_label_join(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
 
-    if not re.search(r"(?<!\.)\bLABEL\b", text, re.IGNORECASE):
-        return text, rules
+    if not _has_unqualified(text, "LABEL"):
+        return text, _NO_RULES
 
     # If label is already available via D_ITEMS or D_LABITEMS, skip
-    if re.search(r"\bD_ITEMS\b", text, re.IGNORECASE) or re.search(r"\bD_LABITEMS\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "D_ITEMS") or _sql_mentions(text, "D_LABITEMS"):
+        return text, _NO_RULES
 
     injected, inject_rules = _inject_join_in_outer(
         text,
@@ -3920,16 +4296,17 @@ def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
         r"(?<!\.)\bLABEL\b",
         "d.LABEL",
     )
+    rules: list[str] = []
     if injected:
         rules.extend(inject_rules)
         rules.append("join_d_items_for_label")
         return injected, rules
 
-    if re.search(r"\bCHARTEVENTS\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "CHARTEVENTS"):
         alias = _find_table_alias(text, "CHARTEVENTS") or "CHARTEVENTS"
         join_clause = f" JOIN D_ITEMS d ON {alias}.ITEMID = d.ITEMID"
         text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLABEL\b", "d.LABEL", text, flags=re.IGNORECASE)
+        text, _ = _sub_unqualified(text, "LABEL", "d.LABEL")
         rules.append("join_d_items_for_label")
         return text, rules
 
@@ -3945,26 +4322,25 @@ def _ensure_label_join(sql: str) -> tuple[str, list[str]]:
         rules.append("join_d_labitems_for_label")
         return injected, rules
 
-    if re.search(r"\bLABEVENTS\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "LABEVENTS"):
         alias = _find_table_alias(text, "LABEVENTS") or "LABEVENTS"
         join_clause = f" JOIN D_LABITEMS d ON {alias}.ITEMID = d.ITEMID"
         text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLABEL\b", "d.LABEL", text, flags=re.IGNORECASE)
+        text, _ = _sub_unqualified(text, "LABEL", "d.LABEL")
         rules.append("join_d_labitems_for_label")
         return text, rules
 
     return text, rules
 
 
-def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _ensure_long_title_join(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
 
-    if not re.search(r"(?<!\.)\bLONG_TITLE\b", text, re.IGNORECASE):
-        return text, rules
+    if not _has_unqualified(text, "LONG_TITLE"):
+        return text, _NO_RULES
 
-    if re.search(r"\bD_ICD_DIAGNOSES\b", text, re.IGNORECASE) or re.search(r"\bD_ICD_PROCEDURES\b", text, re.IGNORECASE):
-        return text, rules
+    if _sql_mentions(text, "D_ICD_DIAGNOSES") or _sql_mentions(text, "D_ICD_PROCEDURES"):
+        return text, _NO_RULES
 
     injected, inject_rules = _inject_join_in_outer(
         text,
@@ -3973,16 +4349,17 @@ def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
         r"(?<!\.)\bLONG_TITLE\b",
         "d.LONG_TITLE",
     )
+    rules: list[str] = []
     if injected:
         rules.extend(inject_rules)
         rules.append("join_d_icd_diagnoses_for_long_title")
         return injected, rules
 
-    if re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "DIAGNOSES_ICD"):
         alias = _find_table_alias(text, "DIAGNOSES_ICD") or "DIAGNOSES_ICD"
         join_clause = f" JOIN D_ICD_DIAGNOSES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
         text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+        text, _ = _sub_unqualified(text, "LONG_TITLE", "d.LONG_TITLE")
         rules.append("join_d_icd_diagnoses_for_long_title")
         return text, rules
 
@@ -3998,66 +4375,81 @@ def _ensure_long_title_join(sql: str) -> tuple[str, list[str]]:
         rules.append("join_d_icd_procedures_for_long_title")
         return injected, rules
 
-    if re.search(r"\bPROCEDURES_ICD\b", text, re.IGNORECASE):
+    if _sql_mentions(text, "PROCEDURES_ICD"):
         alias = _find_table_alias(text, "PROCEDURES_ICD") or "PROCEDURES_ICD"
         join_clause = f" JOIN D_ICD_PROCEDURES d ON {alias}.ICD_CODE = d.ICD_CODE AND {alias}.ICD_VERSION = d.ICD_VERSION"
         text = _insert_join(text, join_clause)
-        text = re.sub(r"(?<!\.)\bLONG_TITLE\b", "d.LONG_TITLE", text, flags=re.IGNORECASE)
+        text, _ = _sub_unqualified(text, "LONG_TITLE", "d.LONG_TITLE")
         rules.append("join_d_icd_procedures_for_long_title")
         return text, rules
 
     return text, rules
 
 
-def _rewrite_has_icu_stay(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    if not _HAS_ICU_RE.search(text):
-        return text, rules
+_T = TypeVar("_T")
+_RULES_SNAPSHOTS: dict[str, tuple[dict[str, Any], Any]] = {}
 
-    alias = _find_table_alias(text, "ADMISSIONS")
 
-    if alias is None:
-        return text, rules
+def _rules_snapshot(key: str, build: Callable[[dict[str, Any]], _T]) -> _T:
+    """Resolve a config view once per loaded rules object instead of on every call."""
+    rules = load_sql_postprocess_rules()
+    cached = _RULES_SNAPSHOTS.get(key)
+    if cached is not None and cached[0] is rules:
+        return cached[1]
+    snapshot = build(rules)
+    _RULES_SNAPSHOTS[key] = (rules, snapshot)
+    return snapshot
 
-    replacement = (
-        f"EXISTS (SELECT 1 FROM ICUSTAYS i "
-        f"WHERE {alias}.HADM_ID = i.HADM_ID AND {alias}.SUBJECT_ID = i.SUBJECT_ID)"
+
+@dataclass(frozen=True)
+class _AdmissionsIcuAlignmentConfig:
+    enabled: bool
+    admissions_table: str
+    icu_table: str
+
+
+def _build_admissions_icu_alignment_config(rules: dict[str, Any]) -> _AdmissionsIcuAlignmentConfig:
+    cfg = rules.get("admissions_icu_alignment", {})
+    return _AdmissionsIcuAlignmentConfig(
+        enabled=bool(cfg.get("enabled", True)),
+        admissions_table=str(cfg.get("admissions_table") or "ADMISSIONS").strip().upper() or "ADMISSIONS",
+        icu_table=str(cfg.get("icustays_table") or "ICUSTAYS").strip().upper() or "ICUSTAYS",
     )
-    text = _HAS_ICU_RE.sub(replacement, text)
-    rules.append("has_icu_stay_to_icustays")
-    return text, rules
 
 
-def _align_admissions_icu_match_keys(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+@lru_cache(maxsize=32)
+def _alias_key_eq_res(left_alias: str, right_alias: str, column: str) -> tuple[re.Pattern[str], re.Pattern[str]]:
+    left = re.escape(left_alias)
+    right = re.escape(right_alias)
+    return (
+        re.compile(rf"\b{left}\.{column}\s*=\s*{right}\.{column}\b", re.IGNORECASE),
+        re.compile(rf"\b{right}\.{column}\s*=\s*{left}\.{column}\b", re.IGNORECASE),
+    )
+
+
+def _align_admissions_icu_match_keys(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    cfg = load_sql_postprocess_rules().get("admissions_icu_alignment", {})
-    if not bool(cfg.get("enabled", True)):
-        return text, rules
+    cfg = _rules_snapshot("admissions_icu_alignment", _build_admissions_icu_alignment_config)
+    if not cfg.enabled:
+        return text, _NO_RULES
 
-    admissions_table = str(cfg.get("admissions_table") or "ADMISSIONS").strip().upper() or "ADMISSIONS"
-    icu_table = str(cfg.get("icustays_table") or "ICUSTAYS").strip().upper() or "ICUSTAYS"
-    if not re.search(rf"\b{re.escape(admissions_table)}\b", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(rf"\b{re.escape(icu_table)}\b", text, re.IGNORECASE):
-        return text, rules
+    admissions_table = cfg.admissions_table
+    icu_table = cfg.icu_table
+    if not _mentions_word(text, admissions_table):
+        return text, _NO_RULES
+    if not _mentions_word(text, icu_table):
+        return text, _NO_RULES
 
     adm_alias = _find_table_alias(text, admissions_table) or admissions_table
     icu_alias = _find_table_alias(text, icu_table) or icu_table
 
-    hadm_patterns = [
-        re.compile(rf"\b{re.escape(adm_alias)}\.HADM_ID\s*=\s*{re.escape(icu_alias)}\.HADM_ID\b", re.IGNORECASE),
-        re.compile(rf"\b{re.escape(icu_alias)}\.HADM_ID\s*=\s*{re.escape(adm_alias)}\.HADM_ID\b", re.IGNORECASE),
-    ]
-    subj_patterns = [
-        re.compile(rf"\b{re.escape(adm_alias)}\.SUBJECT_ID\s*=\s*{re.escape(icu_alias)}\.SUBJECT_ID\b", re.IGNORECASE),
-        re.compile(rf"\b{re.escape(icu_alias)}\.SUBJECT_ID\s*=\s*{re.escape(adm_alias)}\.SUBJECT_ID\b", re.IGNORECASE),
-    ]
+    hadm_patterns = _alias_key_eq_res(adm_alias, icu_alias, "HADM_ID")
+    subj_patterns = _alias_key_eq_res(adm_alias, icu_alias, "SUBJECT_ID")
 
     has_hadm = any(p.search(text) for p in hadm_patterns)
     has_subj = any(p.search(text) for p in subj_patterns)
 
+    rules: list[str] = []
     if has_hadm and not has_subj:
         replaced = False
         for p in hadm_patterns:
@@ -4105,23 +4497,64 @@ def _align_admissions_icu_match_keys(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
+def _cast_timestamp_diff(match: re.Match) -> str:
+    a = match.group(1)
+    b = match.group(2)
+    a_col = a.split(".")[-1].upper()
+    b_col = b.split(".")[-1].upper()
+    timestamp_cols = _timestamp_cols()
+    if a_col in timestamp_cols and b_col in timestamp_cols:
+        return f"CAST({a} AS DATE) - CAST({b} AS DATE)"
+    return match.group(0)
+
+
 def _normalize_timestamp_diffs(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
+    new_text = _DIFF_RE.sub(_cast_timestamp_diff, text)
+    if new_text != text:
+        rules.append("timestamp_diff_cast_to_date")
+    return new_text, rules
+
+
+_DEFAULT_ICD_LIKE_TEMPLATE = "{alias}.ICD_CODE LIKE '{prefix}%'"
+
+
+def _default_icd_like_predicate(alias: str, prefix: str) -> str:
+    return f"{alias}.ICD_CODE LIKE '{prefix}%'"
+
+
+def _icd_like_predicate_builder(template: str) -> Callable[[str, str], str]:
+    if template == _DEFAULT_ICD_LIKE_TEMPLATE:
+        return _default_icd_like_predicate
+
+    def build(alias: str, prefix: str) -> str:
+        try:
+            return template.format(alias=alias, prefix=prefix)
+        except Exception:
+            return _default_icd_like_predicate(alias, prefix)
+
+    return build
+
 
-    def repl(match: re.Match) -> str:
-        a = match.group(1)
-        b = match.group(2)
-        a_col = a.split(".")[-1].upper()
-        b_col = b.split(".")[-1].upper()
-        if a_col in _timestamp_cols() and b_col in _timestamp_cols():
-            return f"CAST({a} AS DATE) - CAST({b} AS DATE)"
-        return match.group(0)
+@dataclass(frozen=True)
+class _TitleFilterRewriteConfig:
+    enabled: bool
+    table_name: str
+    like_predicate: Callable[[str, str], str]
+    join_operator: str
 
-    new_text = _DIFF_RE.sub(repl, text)
-    if new_text != text:
-        rules.append("timestamp_diff_cast_to_date")
-    return new_text, rules
+
+def _build_title_filter_rewrite_config(
+    rules: dict[str, Any], cfg_key: str, default_table_name: str
+) -> _TitleFilterRewriteConfig:
+    cfg = rules.get(cfg_key, {})
+    return _TitleFilterRewriteConfig(
+        enabled=bool(cfg.get("enabled", True)),
+        table_name=str(cfg.get("table_name") or default_table_name).strip().upper() or default_table_name,
+        like_predicate=_icd_like_predicate_builder(str(cfg.get("icd_like_template") or _DEFAULT_ICD_LIKE_TEMPLATE)),
+        join_operator=str(cfg.get("join_operator") or " OR "),
+    )
 
 
 def _rewrite_title_filter_with_icd_map(
@@ -4132,103 +4565,151 @@ def _rewrite_title_filter_with_icd_map(
     default_table_name: str,
     matcher: Any,
     rule_name: str,
-) -> tuple[str, list[str]]:
-    rules: list[str] = []
+) -> tuple[str, Sequence[str]]:
     text = sql
-    cfg = load_sql_postprocess_rules().get(cfg_key, {})
-    if not bool(cfg.get("enabled", True)):
-        return text, rules
+    cfg = _rules_snapshot(
+        f"{cfg_key}:{default_table_name}",
+        lambda rules: _build_title_filter_rewrite_config(rules, cfg_key, default_table_name),
+    )
+    if not cfg.enabled:
+        return text, _NO_RULES
 
-    table_name = str(cfg.get("table_name") or default_table_name).strip().upper() or default_table_name
-    if not re.search(rf"\b{re.escape(table_name)}\b", text, re.IGNORECASE):
-        return text, rules
+    table_name = cfg.table_name
+    if not _mentions_word(text, table_name):
+        return text, _NO_RULES
     if not _DIAGNOSIS_TITLE_FILTER_RE.search(text):
-        return text, rules
+        return text, _NO_RULES
 
     matched = matcher(question)
     if not matched:
-        return text, rules
-
-    prefixes: list[str] = []
-    for item in matched:
-        for prefix in item.get("icd_prefixes", []):
-            value = str(prefix).strip().upper()
-            if not value or value in prefixes:
-                continue
-            prefixes.append(value)
+        return text, _NO_RULES
+
+    # dict keys dedupe while keeping first-seen order.
+    prefixes = list(
+        dict.fromkeys(
+            value
+            for item in matched
+            for value in (str(prefix).strip().upper() for prefix in item.get("icd_prefixes", []))
+            if value
+        )
+    )
     if not prefixes:
-        return text, rules
+        return text, _NO_RULES
 
     alias = _find_table_alias(text, table_name) or table_name
-    like_template = str(cfg.get("icd_like_template") or "{alias}.ICD_CODE LIKE '{prefix}%'")
-    join_operator = str(cfg.get("join_operator") or " OR ")
-    predicates: list[str] = []
-    for prefix in prefixes:
-        try:
-            predicates.append(like_template.format(alias=alias, prefix=prefix))
-        except Exception:
-            predicates.append(f"{alias}.ICD_CODE LIKE '{prefix}%'")
-    icd_filter = "(" + join_operator.join(predicates) + ")"
+    like_predicate = cfg.like_predicate
+    icd_filter = "(" + cfg.join_operator.join(like_predicate(alias, prefix) for prefix in prefixes) + ")"
     rewritten = _DIAGNOSIS_TITLE_FILTER_RE.sub(icd_filter, text)
+    rules: list[str] = []
     if rewritten != text:
         rules.append(rule_name)
     return rewritten, rules
 
 
-def _rewrite_diagnosis_title_filter_with_icd_map(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_diagnosis_title_filter_with_icd_map(question: str, sql: str) -> tuple[str, Sequence[str]]:
     return _rewrite_title_filter_with_icd_map(
         question=question,
         sql=sql,
         cfg_key="diagnosis_rewrite",
         default_table_name="DIAGNOSES_ICD",
-        matcher=match_diagnosis_mappings,
+        matcher=_match_diagnosis_mappings,
         rule_name="diagnosis_title_filter_to_icd_prefix",
     )
 
 
-def _rewrite_procedure_title_filter_with_icd_map(question: str, sql: str) -> tuple[str, list[str]]:
+def _rewrite_procedure_title_filter_with_icd_map(question: str, sql: str) -> tuple[str, Sequence[str]]:
     return _rewrite_title_filter_with_icd_map(
         question=question,
         sql=sql,
         cfg_key="procedure_rewrite",
         default_table_name="PROCEDURES_ICD",
-        matcher=match_procedure_mappings,
+        matcher=_match_procedure_mappings,
         rule_name="procedure_title_filter_to_icd_prefix",
     )
 
 
-def _rewrite_mortality_avg_under_icd_join(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    text = sql
-    mortality_cfg = load_sql_postprocess_rules().get("mortality_rewrite", {})
-    if not bool(mortality_cfg.get("enabled", True)):
-        return text, rules
+_AVG_OPEN_RE = re.compile(r"\bAVG\s*\(", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class _MortalityRewriteConfig:
+    enabled: bool
+    join_tables: tuple[str, ...]
+    admissions_table: str
+    outcome_column: str
+    key_column: str
+    numerator_template: str
+    denominator_template: str
+
+
+@lru_cache(maxsize=32)
+def _join_tables_re(tables: tuple[str, ...]) -> re.Pattern[str]:
+    alternation = "|".join(re.escape(table) for table in tables)
+    return re.compile(rf"\bJOIN\s+(?:{alternation})\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _mortality_avg_res(expire_ref: str) -> tuple[re.Pattern[str], re.Pattern[str]]:
+    expire_ref_pattern = re.escape(expire_ref)
+    return (
+        re.compile(rf"AVG\s*\(\s*{expire_ref_pattern}\s*\)", re.IGNORECASE),
+        re.compile(
+            rf"AVG\s*\(\s*CASE\s+WHEN\s+{expire_ref_pattern}\s*=\s*1\s+THEN\s+1\s+ELSE\s+0\s+END\s*\)",
+            re.IGNORECASE,
+        ),
+    )
 
+
+def _build_mortality_rewrite_config(rules: dict[str, Any]) -> _MortalityRewriteConfig:
+    mortality_cfg = rules.get("mortality_rewrite", {})
     join_tables_cfg = mortality_cfg.get("join_tables")
     if isinstance(join_tables_cfg, list):
-        join_tables = [str(item).strip().upper() for item in join_tables_cfg if str(item).strip()]
+        join_tables = tuple(str(item).strip().upper() for item in join_tables_cfg if str(item).strip())
     else:
         single = str(mortality_cfg.get("join_table") or "DIAGNOSES_ICD").strip().upper()
-        join_tables = [single] if single else ["DIAGNOSES_ICD"]
+        join_tables = (single,) if single else ("DIAGNOSES_ICD",)
     admissions_table = str(mortality_cfg.get("admissions_table") or "ADMISSIONS").strip().upper() or "ADMISSIONS"
     outcome_column = str(mortality_cfg.get("outcome_column") or "HOSPITAL_EXPIRE_FLAG").strip().upper() or "HOSPITAL_EXPIRE_FLAG"
     key_column = str(mortality_cfg.get("key_column") or "HADM_ID").strip().upper() or "HADM_ID"
-    numerator_template = str(
-        mortality_cfg.get("numerator_template")
-        or "COUNT(DISTINCT CASE WHEN {expire_ref} = 1 THEN {key_ref} END)"
-    )
-    denominator_template = str(
-        mortality_cfg.get("denominator_template")
-        or "NULLIF(COUNT(DISTINCT {key_ref}), 0)"
+    return _MortalityRewriteConfig(
+        enabled=bool(mortality_cfg.get("enabled", True)),
+        join_tables=join_tables,
+        admissions_table=admissions_table,
+        outcome_column=outcome_column,
+        key_column=key_column,
+        numerator_template=str(
+            mortality_cfg.get("numerator_template")
+            or "COUNT(DISTINCT CASE WHEN {expire_ref} = 1 THEN {key_ref} END)"
+        ),
+        denominator_template=str(
+            mortality_cfg.get("denominator_template")
+            or "NULLIF(COUNT(DISTINCT {key_ref}), 0)"
+        ),
     )
 
-    has_target_join = any(re.search(rf"\bJOIN\s+{re.escape(table)}\b", text, re.IGNORECASE) for table in join_tables)
+
+def _rewrite_mortality_avg_under_icd_join(sql: str) -> tuple[str, Sequence[str]]:
+    text = sql
+    cfg = _rules_snapshot("mortality_rewrite", _build_mortality_rewrite_config)
+    if not cfg.enabled:
+        return text, _NO_RULES
+    if "AVG" not in _upper_sql(text):
+        return text, _NO_RULES
+
+    join_tables = cfg.join_tables
+    admissions_table = cfg.admissions_table
+    outcome_column = cfg.outcome_column
+    key_column = cfg.key_column
+    numerator_template = cfg.numerator_template
+    denominator_template = cfg.denominator_template
+
+    if not _mentions_word(text, outcome_column):
+        return text, _NO_RULES
+    if not _AVG_OPEN_RE.search(text):
+        return text, _NO_RULES
+    has_target_join = bool(join_tables) and _join_tables_re(join_tables).search(text) is not None
     if not has_target_join:
-        return text, rules
-    if not re.search(r"\bAVG\s*\(", text, re.IGNORECASE):
-        return text, rules
-    if not re.search(rf"\b{re.escape(outcome_column)}\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
 
     adm_alias = _find_table_alias(text, admissions_table)
     key_ref = f"{adm_alias}.{key_column}" if adm_alias else key_column
@@ -4243,24 +4724,14 @@ def _rewrite_mortality_avg_under_icd_join(sql: str) -> tuple[str, list[str]]:
         denominator_expr = f"NULLIF(COUNT(DISTINCT {key_ref}), 0)"
     ratio_expr = f"{numerator_expr} / {denominator_expr}"
 
-    expire_ref_pattern = re.escape(expire_ref)
     changed = False
+    for avg_re in _mortality_avg_res(expire_ref):
+        rewritten = avg_re.sub(ratio_expr, text)
+        if rewritten != text:
+            changed = True
+            text = rewritten
 
-    direct_avg_re = re.compile(rf"AVG\s*\(\s*{expire_ref_pattern}\s*\)", re.IGNORECASE)
-    rewritten = direct_avg_re.sub(ratio_expr, text)
-    if rewritten != text:
-        changed = True
-        text = rewritten
-
-    case_avg_re = re.compile(
-        rf"AVG\s*\(\s*CASE\s+WHEN\s+{expire_ref_pattern}\s*=\s*1\s+THEN\s+1\s+ELSE\s+0\s+END\s*\)",
-        re.IGNORECASE,
-    )
-    rewritten = case_avg_re.sub(ratio_expr, text)
-    if rewritten != text:
-        changed = True
-        text = rewritten
-
+    rules: list[str] = []
     if changed:
         rules.append("mortality_avg_to_distinct_hadm_ratio")
     return text, rules
@@ -4270,9 +4741,9 @@ def _rewrite_ratio_denominator_distinct_under_icd_join(sql: str) -> tuple[str, l
     """Avoid diagnosis/procedure join fan-out in ratio denominators."""
     rules: list[str] = []
     text = sql
-    if not _JOIN_ICD_TABLE_RE.search(text):
+    if "/" not in text or "COUNT(" not in _upper_sql(text):
         return text, rules
-    if "/" not in text or "COUNT(" not in text.upper():
+    if not _JOIN_ICD_TABLE_RE.search(text):
         return text, rules
 
     admissions_alias = _find_table_alias(text, "ADMISSIONS")
@@ -4304,6 +4775,26 @@ def _rewrite_ratio_denominator_distinct_under_icd_join(sql: str) -> tuple[str, l
     return text, rules
 
 
+_JOIN_ICUSTAYS_RE = re.compile(r"\bJOIN\s+ICUSTAYS\b")
+_AVG_HOSPITAL_EXPIRE_FLAG_RE = re.compile(r"\bAVG\s*\(\s*(?:[A-Za-z0-9_]+\.)?HOSPITAL_EXPIRE_FLAG\s*\)")
+_JOIN_ICUSTAYS_ON_RE = re.compile(
+    r"\bJOIN\s+ICUSTAYS\b[\s\S]*?\bON\b([\s\S]*?)(?:\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b|$)",
+    re.IGNORECASE,
+)
+_FIRST_LAST_CAREUNIT_QUESTION_RE = re.compile(
+    r"(first|last)\s*care\s*unit|(first|last)\s*careunit|첫\s*careunit|마지막\s*careunit",
+    re.IGNORECASE,
+)
+_WORD_RUN_RE = re.compile(r"\w+")
+_DEATH_ALIGNMENT_WORDS = frozenset({"DEATHTIME", "INTIME", "OUTTIME"})
+
+
+@lru_cache(maxsize=256)
+def _sql_words(sql_upper: str) -> frozenset[str]:
+    # "\bWORD\b" matches exactly when WORD is one of the maximal \w runs.
+    return frozenset(_WORD_RUN_RE.findall(sql_upper))
+
+
 def recommend_postprocess_profile(
     question: str,
     sql: str,
@@ -4314,42 +4805,38 @@ def recommend_postprocess_profile(
     if profile not in {"relaxed", "aggressive", "auto"}:
         profile = "relaxed"
 
-    q = str(question or "")
-    text = str(sql or "")
-    upper = text.upper()
+    q = question or ""
+    text = sql or ""
+    upper = _upper_sql(text)
     reasons: list[str] = []
 
-    if _RATIO_INTENT_RE.search(q) and _JOIN_ICD_TABLE_RE.search(upper):
+    if _question_has_intent(_RATIO_INTENT_RE, q) and _JOIN_ICD_TABLE_RE.search(upper):
         if _COUNT_DENOM_NULLIF_RE.search(upper) or _COUNT_DENOM_RE.search(upper):
             reasons.append("ratio_denominator_not_distinct_under_icd_join")
-        if re.search(r"\bAVG\s*\(\s*(?:[A-Za-z0-9_]+\.)?HOSPITAL_EXPIRE_FLAG\s*\)", upper, re.IGNORECASE):
+        if _AVG_HOSPITAL_EXPIRE_FLAG_RE.search(upper):
             reasons.append("mortality_avg_under_icd_join")
 
-    if _ICU_QUERY_INTENT_RE.search(q) and _MORTALITY_QUERY_INTENT_RE.search(q):
-        has_hospital_expire = bool(re.search(r"\bHOSPITAL_EXPIRE_FLAG\b", upper, re.IGNORECASE))
-        has_death_alignment = bool(
-            re.search(r"\bDEATHTIME\b", upper, re.IGNORECASE)
-            and re.search(r"\bINTIME\b", upper, re.IGNORECASE)
-            and re.search(r"\bOUTTIME\b", upper, re.IGNORECASE)
-        )
+    if _question_has_intent(_ICU_QUERY_INTENT_RE, q) and _question_has_intent(_MORTALITY_QUERY_INTENT_RE, q):
+        words = _sql_words(upper)
+        has_hospital_expire = "HOSPITAL_EXPIRE_FLAG" in words
+        has_death_alignment = _DEATH_ALIGNMENT_WORDS <= words
         if has_hospital_expire and not has_death_alignment:
             reasons.append("icu_mortality_outcome_misaligned")
 
-    if re.search(r"\bJOIN\s+ICUSTAYS\b", upper):
-        on_clause = re.search(r"\bJOIN\s+ICUSTAYS\b[\s\S]*?\bON\b([\s\S]*?)(?:\bJOIN\b|\bWHERE\b|\bGROUP\b|\bORDER\b|$)", text, re.IGNORECASE)
+    if "ICUSTAYS" in upper and _JOIN_ICUSTAYS_RE.search(upper):
+        on_clause = _JOIN_ICUSTAYS_ON_RE.search(text)
         if on_clause:
             join_cond = on_clause.group(1).upper()
             if "HADM_ID" in join_cond and "SUBJECT_ID" not in join_cond:
                 reasons.append("admissions_icu_partial_join_key")
 
-    first_last_careunit_intent = bool(
-        re.search(r"(first|last)\s*care\s*unit|(first|last)\s*careunit|첫\s*careunit|마지막\s*careunit", q, re.IGNORECASE)
-    )
+    first_last_careunit_intent = bool(_FIRST_LAST_CAREUNIT_QUESTION_RE.search(q))
     if first_last_careunit_intent:
-        has_transfers = bool(re.search(r"\bTRANSFERS\b", upper))
-        has_icustays = bool(re.search(r"\bICUSTAYS\b", upper))
-        has_bare_careunit = bool(re.search(r"\bCAREUNIT\b", upper))
-        has_first_last_col = bool(re.search(r"\b(FIRST_CAREUNIT|LAST_CAREUNIT)\b", upper))
+        words = _sql_words(upper)
+        has_transfers = "TRANSFERS" in words
+        has_icustays = "ICUSTAYS" in words
+        has_bare_careunit = "CAREUNIT" in words
+        has_first_last_col = "FIRST_CAREUNIT" in words or "LAST_CAREUNIT" in words
         if has_transfers and has_bare_careunit and not has_icustays:
             reasons.append("first_last_careunit_intent_on_transfers")
         elif has_icustays and has_bare_careunit and not has_first_last_col:
@@ -4360,41 +4847,44 @@ def recommend_postprocess_profile(
     return ("relaxed" if profile == "auto" else profile), reasons
 
 
-def _rewrite_count_columns_to_ratio_by_intent(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_NULLIF_DIVISOR_RE = re.compile(r"/\s*NULLIF\s*\(", re.IGNORECASE)
+
+
+def _rewrite_count_columns_to_ratio_by_intent(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql.strip()
     if not text:
-        return sql, rules
-    if not _RATIO_INTENT_RE.search(question):
-        return sql, rules
+        return sql, _NO_RULES
+    if not _question_has_intent(_RATIO_INTENT_RE, question):
+        return sql, _NO_RULES
 
     select_span = _find_final_select_from_span(text)
     if not select_span:
-        return sql, rules
+        return sql, _NO_RULES
     core, select_idx, from_idx = select_span
-    if re.match(r"^\s*WITH\b", core, re.IGNORECASE):
-        return sql, rules
+    if _LEADING_WITH_RE.match(core):
+        return sql, _NO_RULES
     select_clause = core[select_idx + len("SELECT"):from_idx]
     if not select_clause.strip():
-        return sql, rules
+        return sql, _NO_RULES
 
     items = _split_top_level_csv(select_clause)
     if not items:
-        return sql, rules
+        return sql, _NO_RULES
 
-    if re.search(r"/\s*NULLIF\s*\(", select_clause, re.IGNORECASE):
-        return sql, rules
+    if _NULLIF_DIVISOR_RE.search(select_clause):
+        return sql, _NO_RULES
+    rules: list[str] = []
     for item in items:
         alias = _extract_select_alias(item) or ""
         if alias and _RATIO_ALIAS_RE.search(alias):
             return sql, rules
-        upper_item = item.upper()
+        upper_item = _upper_sql(item)
         if "AVG(" in upper_item and "COUNT(" in upper_item:
             return sql, rules
 
     count_aliases: list[str] = []
     for item in items:
-        if "COUNT(" not in item.upper():
+        if "COUNT(" not in _upper_sql(item):
             continue
         alias = _extract_select_alias(item)
         if not alias or not _COUNT_ALIAS_NAME_RE.match(alias):
@@ -4403,15 +4893,15 @@ def _rewrite_count_columns_to_ratio_by_intent(question: str, sql: str) -> tuple[
             count_aliases.append(alias)
 
     if len(count_aliases) < 2:
-        return sql, rules
+        return sql, _NO_RULES
 
     denominator = next((name for name in count_aliases if _DENOM_ALIAS_HINT_RE.search(name)), None)
     if not denominator:
-        has_explicit_denominator_intent = bool(_RATIO_DENOM_INTENT_RE.search(question))
+        has_explicit_denominator_intent = _question_has_intent(_RATIO_DENOM_INTENT_RE, question)
         if has_explicit_denominator_intent and len(count_aliases) == 2:
             denominator = count_aliases[1]
     if not denominator:
-        return sql, rules
+        return sql, _NO_RULES
 
     numerator = next(
         (name for name in count_aliases if name != denominator and not _DENOM_ALIAS_HINT_RE.search(name)),
@@ -4420,7 +4910,7 @@ def _rewrite_count_columns_to_ratio_by_intent(question: str, sql: str) -> tuple[
     if not numerator:
         numerator = next((name for name in count_aliases if name != denominator), None)
     if not numerator or numerator == denominator:
-        return sql, rules
+        return sql, _NO_RULES
 
     wrapped = (
         f"SELECT t.*, ROUND(100 * t.{numerator} / NULLIF(t.{denominator}, 0), 2) AS RATIO_PCT "
@@ -4430,14 +4920,13 @@ def _rewrite_count_columns_to_ratio_by_intent(question: str, sql: str) -> tuple[
     return wrapped, rules
 
 
-def _rewrite_unknown_categorical_equals(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_unknown_categorical_equals(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not _CATEGORICAL_REWRITE_INTENT_RE.search(str(question or "")):
-        return text, rules
+    if not _question_has_intent(_CATEGORICAL_REWRITE_INTENT_RE, question or ""):
+        return text, _NO_RULES
     value_index = _column_value_index()
     if not value_index:
-        return text, rules
+        return text, _NO_RULES
 
     alias_map = _table_alias_map(text)
     question_tokens = _tokenize_text(question)
@@ -4530,43 +5019,61 @@ def _rewrite_unknown_categorical_equals(question: str, sql: str) -> tuple[str, l
         return f"{target_ref} IN ({joined})"
 
     rewritten = _CATEGORICAL_EQ_LITERAL_RE.sub(repl, text)
+    rules: list[str] = []
     if changed and rewritten != text:
         rules.append("unknown_categorical_equals_to_known_values")
         return rewritten, rules
     return text, rules
 
 
-def _rewrite_d_items_long_title_to_label(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_D_ICD_TABLE_RE = re.compile(r"\bD_ICD_DIAGNOSES\b|\bD_ICD_PROCEDURES\b", re.IGNORECASE)
+
+
+def _rewrite_d_items_long_title_to_label(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.search(r"\bD_ITEMS\b", text, re.IGNORECASE):
-        return text, rules
+    if not _sql_mentions(text, "D_ITEMS"):
+        return text, _NO_RULES
 
     changed = False
     alias_map = _table_alias_map(text)
     d_items_aliases = [alias for alias, table in alias_map.items() if table == "D_ITEMS"]
     for alias in d_items_aliases:
-        pattern = re.compile(rf"\b{re.escape(alias)}\.LONG_TITLE\b", re.IGNORECASE)
-        rewritten = pattern.sub(f"{alias}.LABEL", text)
-        if rewritten != text:
+        rewritten, count = _alias_column_re(alias, "LONG_TITLE").subn(f"{alias}.LABEL", text)
+        if count:
             changed = True
             text = rewritten
 
-    if not re.search(r"\bD_ICD_DIAGNOSES\b|\bD_ICD_PROCEDURES\b", text, re.IGNORECASE):
-        rewritten = re.sub(r"(?<!\.)\bLONG_TITLE\b", "LABEL", text, flags=re.IGNORECASE)
-        if rewritten != text:
+    if not _D_ICD_TABLE_RE.search(text):
+        rewritten, count = _UNQUALIFIED_LONG_TITLE_RE.subn("LABEL", text)
+        if count:
             changed = True
             text = rewritten
 
+    rules: list[str] = []
     if changed:
         rules.append("d_items_long_title_to_label")
     return text, rules
 
 
+_SELECT_ITEMID_PREFIX_RE = re.compile(
+    r"^(\s*SELECT\s+)(?P<sel>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?ITEMID)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+_QUALIFIED_LONG_TITLE_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_$#]*)\.LONG_TITLE\b", re.IGNORECASE)
+_ITEMID_SUBQUERY_SELECT_RE = re.compile(
+    r"^\s*SELECT\s+(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?ITEMID\s+FROM\s+(D_ITEMS|D_LABITEMS)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
 def _rewrite_itemid_scalar_subquery_to_safe_in(sql: str) -> tuple[str, list[str]]:
     rules: list[str] = []
     text = sql
-    changed = False
+    if "ITEMID" not in _scan_sql_tokens(text):
+        return text, rules
+    # Scan the original text once and splice replacements at the end.
+    parts: list[str] = []
+    last = 0
     pos = 0
 
     while True:
@@ -4578,51 +5085,48 @@ def _rewrite_itemid_scalar_subquery_to_safe_in(sql: str) -> tuple[str, list[str]
         if close_idx is None:
             break
 
+        pos = close_idx + 1
         subquery = text[open_idx + 1 : close_idx].strip()
-        if not re.match(
-            r"^\s*SELECT\s+(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?ITEMID\s+FROM\s+(D_ITEMS|D_LABITEMS)\b",
-            subquery,
-            re.IGNORECASE | re.DOTALL,
-        ):
-            pos = close_idx + 1
+        if not _ITEMID_SUBQUERY_SELECT_RE.match(subquery):
             continue
 
         repaired_subquery = subquery
-        repaired_subquery = re.sub(
-            r"^(\s*SELECT\s+)(?P<sel>(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?ITEMID)\b",
+        repaired_subquery = _SELECT_ITEMID_PREFIX_RE.sub(
             lambda m: f"{m.group(1)}TO_CHAR({m.group('sel')})",
             repaired_subquery,
             count=1,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        repaired_subquery = re.sub(
-            r"\b([A-Za-z_][A-Za-z0-9_$#]*)\.LONG_TITLE\b",
-            r"\1.LABEL",
-            repaired_subquery,
-            flags=re.IGNORECASE,
-        )
-        repaired_subquery = re.sub(
-            r"(?<!\.)\bLONG_TITLE\b",
-            "LABEL",
-            repaired_subquery,
-            flags=re.IGNORECASE,
         )
-        replacement = f"TO_CHAR({match.group('lhs')}) IN ({repaired_subquery})"
-        text = text[: match.start()] + replacement + text[close_idx + 1 :]
-        changed = True
-        pos = match.start() + len(replacement)
-
-    if changed:
+        repaired_subquery = _QUALIFIED_LONG_TITLE_RE.sub(r"\1.LABEL", repaired_subquery)
+        repaired_subquery = _UNQUALIFIED_LONG_TITLE_RE.sub("LABEL", repaired_subquery)
+        parts.append(text[last : match.start()])
+        parts.append(f"TO_CHAR({match.group('lhs')}) IN ({repaired_subquery})")
+        last = pos
+
+    if parts:
+        parts.append(text[last:])
+        text = "".join(parts)
         rules.append("itemid_scalar_subquery_to_safe_in")
     return text, rules
 
 
-def _rewrite_itemid_icd_join_mismatch(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+@lru_cache(maxsize=32)
+def _icd_dim_alias_res(alias: str) -> tuple[re.Pattern[str], re.Pattern[str], re.Pattern[str]]:
+    escaped = re.escape(alias)
+    return (
+        re.compile(rf"\bJOIN\s+(?:D_ICD_DIAGNOSES|D_ICD_PROCEDURES)\s+{escaped}\b", re.IGNORECASE),
+        re.compile(rf"\b{escaped}\.ICD_VERSION\s*=\s*(?:9|10)\s+AND\s*", re.IGNORECASE),
+        re.compile(rf"\s+(?:AND|OR)\s+{escaped}\.ICD_VERSION\s*=\s*(?:9|10)\b", re.IGNORECASE),
+    )
+
+
+def _rewrite_itemid_icd_join_mismatch(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    tokens = _scan_sql_tokens(text)
+    if "ITEMID" not in tokens or "ICD_CODE" not in tokens:
+        return text, _NO_RULES
     alias_map = _table_alias_map(text)
     if not alias_map:
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
     planned_dim_tables: dict[str, str] = {}
@@ -4672,53 +5176,28 @@ def _rewrite_itemid_icd_join_mismatch(sql: str) -> tuple[str, list[str]]:
         changed = True
 
     for icd_alias, dim_table in planned_dim_tables.items():
-        text = re.sub(
-            rf"\bJOIN\s+D_ICD_DIAGNOSES\s+{re.escape(icd_alias)}\b",
-            f"JOIN {dim_table} {icd_alias}",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            rf"\bJOIN\s+D_ICD_PROCEDURES\s+{re.escape(icd_alias)}\b",
-            f"JOIN {dim_table} {icd_alias}",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            rf"\b{re.escape(icd_alias)}\.ICD_CODE\b",
-            f"{icd_alias}.ITEMID",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            rf"\b{re.escape(icd_alias)}\.LONG_TITLE\b",
-            f"{icd_alias}.LABEL",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            rf"\b{re.escape(icd_alias)}\.ICD_VERSION\s*=\s*(?:9|10)\s+AND\s*",
-            "",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            rf"\s+(?:AND|OR)\s+{re.escape(icd_alias)}\.ICD_VERSION\s*=\s*(?:9|10)\b",
-            "",
-            text,
-            flags=re.IGNORECASE,
-        )
+        join_re, version_and_re, and_version_re = _icd_dim_alias_res(icd_alias)
+        text = join_re.sub(f"JOIN {dim_table} {icd_alias}", text)
+        text = _alias_column_re(icd_alias, "ICD_CODE").sub(f"{icd_alias}.ITEMID", text)
+        text = _alias_column_re(icd_alias, "LONG_TITLE").sub(f"{icd_alias}.LABEL", text)
+        text = version_and_re.sub("", text)
+        text = and_version_re.sub("", text)
 
+    rules: list[str] = []
     if changed:
         rules.append("rewrite_itemid_icd_join_mismatch")
     return text, rules
 
 
+@lru_cache(maxsize=32)
+def _cte_definition_re(cte_name: str) -> re.Pattern[str]:
+    return re.compile(rf"\b{re.escape(cte_name)}\s+AS\s*\(", re.IGNORECASE)
+
+
 def _extract_cte_projection_aliases(sql: str, cte_name: str) -> set[str]:
     if not cte_name:
         return set()
-    pattern = re.compile(rf"\b{re.escape(cte_name)}\s+AS\s*\(", re.IGNORECASE)
-    match = pattern.search(sql)
+    match = _cte_definition_re(cte_name).search(sql)
     if not match:
         return set()
 
@@ -4749,36 +5228,37 @@ def _extract_cte_projection_aliases(sql: str, cte_name: str) -> set[str]:
     return aliases
 
 
-def _fix_cte_projection_alias_mismatch(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_LEADING_FROM_ALIAS_RE = re.compile(
+    r"^\s*FROM\s+([A-Za-z_][A-Za-z0-9_$#]*)"
+        r"(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_$#]*))?",
+    re.IGNORECASE,
+)
+
+
+def _fix_cte_projection_alias_mismatch(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if not re.match(r"^\s*WITH\b", text, re.IGNORECASE):
-        return text, rules
+    if not _LEADING_WITH_RE.match(text):
+        return text, _NO_RULES
 
     select_span = _find_final_select_from_span(text)
     if not select_span:
-        return text, rules
+        return text, _NO_RULES
     core, select_idx, from_idx = select_span
 
     from_clause = core[from_idx:]
-    from_match = re.match(
-        r"^\s*FROM\s+([A-Za-z_][A-Za-z0-9_$#]*)"
-        r"(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_$#]*))?",
-        from_clause,
-        re.IGNORECASE,
-    )
+    from_match = _LEADING_FROM_ALIAS_RE.match(from_clause)
     if not from_match:
-        return text, rules
+        return text, _NO_RULES
     source_name = str(from_match.group(1) or "").strip()
     source_alias = str(from_match.group(2) or "").strip()
     if source_alias.upper() in {"WHERE", "JOIN", "GROUP", "ORDER", "HAVING"}:
         source_alias = ""
     if not source_name:
-        return text, rules
+        return text, _NO_RULES
 
     cte_aliases = _extract_cte_projection_aliases(core, source_name)
     if not cte_aliases:
-        return text, rules
+        return text, _NO_RULES
 
     measure_alias = "CNT" if "CNT" in cte_aliases else ""
     if not measure_alias:
@@ -4786,12 +5266,12 @@ def _fix_cte_projection_alias_mismatch(sql: str) -> tuple[str, list[str]]:
         if len(countlike) == 1:
             measure_alias = countlike[0]
     if not measure_alias:
-        return text, rules
+        return text, _NO_RULES
 
     select_clause = core[select_idx + len("SELECT") : from_idx]
     items = _split_top_level_csv(select_clause)
     if not items:
-        return text, rules
+        return text, _NO_RULES
 
     new_items: list[str] = []
     unknown_cols: list[str] = []
@@ -4823,24 +5303,32 @@ def _fix_cte_projection_alias_mismatch(sql: str) -> tuple[str, list[str]]:
         changed = True
 
     if not changed:
-        return text, rules
+        return text, _NO_RULES
     if len(set(unknown_cols)) != 1:
-        return text, rules
+        return text, _NO_RULES
 
     rebuilt = core[: select_idx + len("SELECT")] + " " + ", ".join(new_items) + " " + core[from_idx:]
+    rules: list[str] = []
     if rebuilt != text:
         rules.append(f"cte_projection_alias_mismatch_to_{measure_alias.lower()}")
         return rebuilt, rules
     return text, rules
 
 
-def _rewrite_label_like_case_insensitive(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+_ASCII_LETTER_RE = re.compile(r"[A-Za-z]")
+
+
+def _rewrite_label_like_case_insensitive(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
+    tokens = _scan_sql_tokens(text)
+    if "LABEL" not in tokens or ("D_ITEMS" not in tokens and "D_LABITEMS" not in tokens):
+        return text, _NO_RULES
+    if "LIKE" not in _upper_sql(text):
+        return text, _NO_RULES
     alias_map = _table_alias_map(text)
     tables = set(alias_map.values())
     if "D_ITEMS" not in tables and "D_LABITEMS" not in tables:
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
 
@@ -4852,7 +5340,7 @@ def _rewrite_label_like_case_insensitive(sql: str) -> tuple[str, list[str]]:
         if not ref:
             return match.group(0)
         # Skip literals without alphabetic characters.
-        if not re.search(r"[A-Za-z]", literal):
+        if not _ASCII_LETTER_RE.search(literal):
             return match.group(0)
 
         table_ok = False
@@ -4873,6 +5361,7 @@ def _rewrite_label_like_case_insensitive(sql: str) -> tuple[str, list[str]]:
         return f"UPPER({ref}) {op} '{upper_lit}'"
 
     rewritten = _RAW_LABEL_LIKE_RE.sub(repl, text)
+    rules: list[str] = []
     if changed and rewritten != text:
         rules.append("label_like_case_insensitive")
         return rewritten, rules
@@ -4882,18 +5371,16 @@ def _rewrite_label_like_case_insensitive(sql: str) -> tuple[str, list[str]]:
 def _upper_tokens(values: Any) -> list[str]:
     if not isinstance(values, list):
         return []
-    tokens: list[str] = []
-    for raw in values:
-        token = str(raw or "").strip().upper()
-        if token and token not in tokens:
-            tokens.append(token)
-    return tokens
+    return list(dict.fromkeys(token for token in (str(raw or "").strip().upper() for raw in values) if token))
+
+
+_WHITESPACE_RUN_RE = re.compile(r"\s+")
 
 
 def _question_has_any_token(question_lower: str, tokens: list[str]) -> bool:
     if not tokens:
         return True
-    compact = re.sub(r"\s+", "", question_lower)
+    compact = _WHITESPACE_RUN_RE.sub("", question_lower)
     for token in tokens:
         t = token.lower()
         if t in question_lower or t in compact:
@@ -4902,7 +5389,7 @@ def _question_has_any_token(question_lower: str, tokens: list[str]) -> bool:
 
 
 def _is_placeholder_question(question: str) -> bool:
-    text = re.sub(r"\s+", " ", str(question or "").strip().lower())
+    text = _WHITESPACE_RUN_RE.sub(" ", (question or "").strip().lower())
     if not text:
         return True
     placeholders = {
@@ -4968,7 +5455,8 @@ def _load_active_label_intent_profiles(question: str, cfg: dict[str, Any]) -> li
     return deduped
 
 
-def _build_label_anchor_verb_block_re(anchor_terms: list[str], verb_terms: list[str]) -> re.Pattern | None:
+@lru_cache(maxsize=64)
+def _build_label_anchor_verb_block_re(anchor_terms: tuple[str, ...], verb_terms: tuple[str, ...]) -> re.Pattern | None:
     if not anchor_terms or not verb_terms:
         return None
     label_expr = (
@@ -4984,7 +5472,8 @@ def _build_label_anchor_verb_block_re(anchor_terms: list[str], verb_terms: list[
     )
 
 
-def _build_label_anchor_verb_inline_re(anchor_terms: list[str], verb_terms: list[str]) -> re.Pattern | None:
+@lru_cache(maxsize=64)
+def _build_label_anchor_verb_inline_re(anchor_terms: tuple[str, ...], verb_terms: tuple[str, ...]) -> re.Pattern | None:
     if not anchor_terms or not verb_terms:
         return None
     label_expr = (
@@ -5000,7 +5489,8 @@ def _build_label_anchor_verb_inline_re(anchor_terms: list[str], verb_terms: list
     )
 
 
-def _build_label_anchor_expr_re(anchor_terms: list[str]) -> re.Pattern | None:
+@lru_cache(maxsize=64)
+def _build_label_anchor_expr_re(anchor_terms: tuple[str, ...]) -> re.Pattern | None:
     if not anchor_terms:
         return None
     label_expr = (
@@ -5014,17 +5504,29 @@ def _build_label_anchor_expr_re(anchor_terms: list[str]) -> re.Pattern | None:
     )
 
 
-def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+@lru_cache(maxsize=128)
+def _like_term_re(term: str, negated: bool = False) -> re.Pattern[str]:
+    prefix = r"NOT\s+" if negated else ""
+    return re.compile(rf"{prefix}LIKE\s+'%{re.escape(term)}%'", re.IGNORECASE)
+
+
+_LABEL_LIKE_OR_PAIR_RE = re.compile(
+    r"\(\s*(?P<ref>(?:UPPER\(\s*(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL\s*\)|(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL))\s+LIKE\s+'%(?P<t1>[^']+)%'\s+OR\s+"
+                    r"(?P=ref)\s+LIKE\s+'%(?P<t2>[^']+)%'\s*\)",
+    re.IGNORECASE,
+)
+
+
+def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    q = question.lower()
+    q = _lower_question(question)
     question_placeholder = _is_placeholder_question(question)
     cfg = load_sql_postprocess_rules().get("label_intent_rewrite", {})
     if not bool(cfg.get("enabled", True)):
-        return text, rules
+        return text, _NO_RULES
     profiles = _load_active_label_intent_profiles(question, cfg if isinstance(cfg, dict) else {})
     if not profiles:
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
     for profile in profiles:
@@ -5032,9 +5534,9 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
             continue
         table_name = str(profile.get("table") or "D_ITEMS").strip().upper() or "D_ITEMS"
         event_table = str(profile.get("event_table") or "PROCEDUREEVENTS").strip().upper() or "PROCEDUREEVENTS"
-        if not re.search(rf"\b{re.escape(table_name)}\b", text, re.IGNORECASE):
+        if not _mentions_word(text, table_name):
             continue
-        if event_table and not re.search(rf"\b{re.escape(event_table)}\b", text, re.IGNORECASE):
+        if event_table and not _mentions_word(text, event_table):
             continue
 
         allow_sql_pattern_only = bool(profile.get("allow_sql_pattern_only", False))
@@ -5042,7 +5544,7 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
         verb_terms = _upper_tokens(profile.get("co_terms")) or _upper_tokens(profile.get("insert_verb_terms"))
         required_terms = _upper_tokens(profile.get("required_terms_with_anchor"))
         exclude_terms = _upper_tokens(profile.get("exclude_terms_with_anchor"))
-        block_re = _build_label_anchor_verb_block_re(anchor_terms, verb_terms)
+        block_re = _build_label_anchor_verb_block_re(tuple(anchor_terms), tuple(verb_terms))
         has_anchor_verb_block = bool(block_re.search(text)) if block_re else False
 
         question_any = [str(item).strip() for item in (profile.get("question_any") or []) if str(item).strip()]
@@ -5065,7 +5567,7 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
             if rewritten != text:
                 changed = True
                 text = rewritten
-        inline_re = _build_label_anchor_verb_inline_re(anchor_terms, verb_terms)
+        inline_re = _build_label_anchor_verb_inline_re(tuple(anchor_terms), tuple(verb_terms))
         if inline_re:
             rewritten = inline_re.sub(lambda m: f"{str(m.group('anchor') or '').strip()}", text)
             if rewritten != text:
@@ -5092,11 +5594,7 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
                         return f"({ref} LIKE '%{target}%')"
                     return match.group(0)
 
-                or_re = re.compile(
-                    r"\(\s*(?P<ref>(?:UPPER\(\s*(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL\s*\)|(?:[A-Za-z_][A-Za-z0-9_$#]*\.)?LABEL))\s+LIKE\s+'%(?P<t1>[^']+)%'\s+OR\s+"
-                    r"(?P=ref)\s+LIKE\s+'%(?P<t2>[^']+)%'\s*\)",
-                    re.IGNORECASE,
-                )
+                or_re = _LABEL_LIKE_OR_PAIR_RE
                 rewritten = or_re.sub(_norm_or, text)
                 if rewritten != text:
                     changed = True
@@ -5112,11 +5610,11 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
             should_require = True
         if question_placeholder:
             should_require = True
-        anchor_expr_re = _build_label_anchor_expr_re(anchor_terms)
+        anchor_expr_re = _build_label_anchor_expr_re(tuple(anchor_terms))
         if should_require and required_terms:
             if anchor_expr_re:
                 for required in required_terms:
-                    if re.search(rf"LIKE\s+'%{re.escape(required)}%'", text, re.IGNORECASE):
+                    if _like_term_re(required).search(text):
                         continue
 
                     def _add_required(match: re.Match) -> str:
@@ -5134,7 +5632,7 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
 
         if exclude_terms and anchor_expr_re:
             for excluded in exclude_terms:
-                if re.search(rf"NOT\s+LIKE\s+'%{re.escape(excluded)}%'", text, re.IGNORECASE):
+                if _like_term_re(excluded, negated=True).search(text):
                     continue
 
                 def _add_excluded(match: re.Match) -> str:
@@ -5150,18 +5648,24 @@ def _rewrite_label_filter_by_intent_profile(question: str, sql: str) -> tuple[st
                     text = rewritten
                     break
 
+    rules: list[str] = []
     if changed:
         rules.append("rewrite_label_filter_by_intent_profile")
         return text, rules
     return text, rules
 
 
-def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+@lru_cache(maxsize=32)
+def _icd_version_pred_re(version_column: str, alias: str = "") -> re.Pattern[str]:
+    qualifier = rf"{re.escape(alias)}\." if alias else r"(?:[A-Za-z0-9_]+\.)?"
+    return re.compile(rf"{qualifier}{re.escape(version_column)}\s*=\s*(?:9|10)", re.IGNORECASE)
+
+
+def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
     version_cfg = load_sql_postprocess_rules().get("icd_version_inference", {})
     if not bool(version_cfg.get("enabled", True)):
-        return text, rules
+        return text, _NO_RULES
 
     table_names_cfg = version_cfg.get("table_names")
     if isinstance(table_names_cfg, list):
@@ -5209,11 +5713,11 @@ def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
             return digit_version
         return None
 
-    has_target_table = any(re.search(rf"\b{re.escape(table)}\b", text, re.IGNORECASE) for table in table_names)
+    has_target_table = any(_mentions_word(text, table) for table in table_names)
     if not has_target_table:
-        return text, rules
+        return text, _NO_RULES
     if not _ICD_CODE_LIKE_RE.search(text):
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
 
@@ -5225,16 +5729,8 @@ def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
             return match.group(0)
         alias = lhs.rsplit(".", 1)[0] if "." in lhs else ""
         nearby = text[max(0, match.start() - 80): min(len(text), match.end() + 80)]
-        version_pred_re = re.compile(
-            rf"(?:[A-Za-z0-9_]+\.)?{re.escape(version_column)}\s*=\s*(?:9|10)",
-            re.IGNORECASE,
-        )
-        alias_version_pred_re = re.compile(
-            rf"{re.escape(alias)}\.{re.escape(version_column)}\s*=\s*(?:9|10)",
-            re.IGNORECASE,
-        ) if alias else None
-        if version_pred_re.search(nearby):
-            if not alias or (alias_version_pred_re is not None and alias_version_pred_re.search(nearby)):
+        if _icd_version_pred_re(version_column).search(nearby):
+            if not alias or _icd_version_pred_re(version_column, alias).search(nearby):
                 return match.group(0)
         version = resolve_expected_version(prefix)
         if version is None:
@@ -5252,17 +5748,18 @@ def _add_icd_version_for_prefix_filters(sql: str) -> tuple[str, list[str]]:
             return f"({version_col} = {version} AND {lhs} LIKE '{prefix}%')"
 
     rewritten = _ICD_CODE_LIKE_RE.sub(repl, text)
+    rules: list[str] = []
     if changed and rewritten != text:
         rules.append("add_icd_version_to_prefix_filters")
         return rewritten, rules
     return text, rules
 
 
-def _fix_icd_version_prefix_mismatch(sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _fix_icd_version_prefix_mismatch(sql: str) -> tuple[str, Sequence[str]]:
     text = sql
-    if "ICD_VERSION" not in text.upper() or "ICD_CODE" not in text.upper():
-        return text, rules
+    upper = _upper_sql(text)
+    if "ICD_VERSION" not in upper or "ICD_CODE" not in upper:
+        return text, _NO_RULES
 
     changed = False
     version_cfg = load_sql_postprocess_rules().get("icd_version_inference", {})
@@ -5327,30 +5824,30 @@ def _fix_icd_version_prefix_mismatch(sql: str) -> tuple[str, list[str]]:
 
     rewritten = _ICD_VERSION_CODE_AND_RE.sub(repl_vc, text)
     rewritten2 = _ICD_CODE_VERSION_AND_RE.sub(repl_cv, rewritten)
+    rules: list[str] = []
     if changed and rewritten2 != text:
         rules.append("fix_icd_version_prefix_mismatch")
         return rewritten2, rules
     return text, rules
 
 
-def _expand_diagnosis_prefixes_from_question(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
-    q = str(question or "").strip()
-    text = str(sql or "")
+def _expand_diagnosis_prefixes_from_question(question: str, sql: str) -> tuple[str, Sequence[str]]:
+    q = (question or "").strip()
+    text = sql or ""
     if not q or not text:
-        return text, rules
-    if not re.search(r"\bDIAGNOSES_ICD\b", text, re.IGNORECASE):
-        return text, rules
+        return text, _NO_RULES
+    if not _sql_mentions(text, "DIAGNOSES_ICD"):
+        return text, _NO_RULES
 
     # Respect explicit user-specified code queries (e.g., "I50 코드").
     if _ICD_CODE_HINT_RE.search(q) and _EXPLICIT_ICD_PREFIX_RE.search(q):
-        return text, rules
+        return text, _NO_RULES
 
-    mapped = match_diagnosis_mappings(q)
+    mapped = _match_diagnosis_mappings(q)
     if not mapped:
-        return text, rules
+        return text, _NO_RULES
     if len(mapped) < 2 and not _COMORBIDITY_HINT_RE.search(q):
-        return text, rules
+        return text, _NO_RULES
 
     version_cfg = load_sql_postprocess_rules().get("icd_version_inference", {})
     try:
@@ -5404,7 +5901,7 @@ def _expand_diagnosis_prefixes_from_question(question: str, sql: str) -> tuple[s
         for prefix in deduped:
             prefix_to_entry.setdefault(prefix, {"term": entry.get("term"), "prefixes": deduped})
     if not prefix_to_entry:
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
     expanded_terms: list[str] = []
@@ -5447,6 +5944,7 @@ def _expand_diagnosis_prefixes_from_question(question: str, sql: str) -> tuple[s
 
     rewritten = _ICD_VERSION_CODE_AND_RE.sub(repl_vc, text)
     rewritten2 = _ICD_CODE_VERSION_AND_RE.sub(repl_cv, rewritten)
+    rules: list[str] = []
     if changed and rewritten2 != text:
         suffix = ""
         if expanded_terms:
@@ -5468,34 +5966,34 @@ def _extract_post_window_days(question: str) -> int | None:
     return None
 
 
-def _rewrite_post_window_deathtime_anchor(question: str, sql: str) -> tuple[str, list[str]]:
-    rules: list[str] = []
+def _rewrite_post_window_deathtime_anchor(question: str, sql: str) -> tuple[str, Sequence[str]]:
     text = sql
     cfg = load_sql_postprocess_rules().get("time_window_rewrite", {})
     if not bool(cfg.get("enabled", True)):
-        return text, rules
+        return text, _NO_RULES
 
     requested_days = _extract_post_window_days(question)
     if requested_days is None:
-        return text, rules
+        return text, _NO_RULES
 
     exclude_keywords_cfg = cfg.get("exclude_question_keywords")
     if isinstance(exclude_keywords_cfg, list):
-        exclude_keywords = [str(item).lower() for item in exclude_keywords_cfg if str(item).strip()]
+        exclude_keywords = tuple(str(item).lower() for item in exclude_keywords_cfg if str(item).strip())
     else:
-        exclude_keywords = ["퇴원 후", "퇴원후", "after discharge", "post-discharge"]
-    lower_question = question.lower()
-    if any(keyword in lower_question for keyword in exclude_keywords):
-        return text, rules
+        exclude_keywords = ("퇴원 후", "퇴원후", "after discharge", "post-discharge")
+    lower_question = _lower_question(question)
+    if _question_has_keyword(lower_question, exclude_keywords):
+        return text, _NO_RULES
 
     death_anchor_column = str(cfg.get("death_anchor_column") or "DEATHTIME").strip().upper() or "DEATHTIME"
     from_column = str(cfg.get("from_column") or "DISCHTIME").strip().upper() or "DISCHTIME"
     to_column = str(cfg.get("to_column") or "ADMITTIME").strip().upper() or "ADMITTIME"
     if death_anchor_column != "DEATHTIME" or from_column != "DISCHTIME":
         # Current pattern targets deathtime-from-dischtime anchor rewrites.
-        return text, rules
+        return text, _NO_RULES
 
     changed = False
+    from_column_re = re.compile(rf"{from_column}\b", re.IGNORECASE)
 
     def repl(match: re.Match) -> str:
         nonlocal changed
@@ -5504,10 +6002,11 @@ def _rewrite_post_window_deathtime_anchor(question: str, sql: str) -> tuple[str,
         if days != requested_days:
             return match.group(0)
         changed = True
-        target_expr = re.sub(rf"{from_column}\b", to_column, dis_expr, flags=re.IGNORECASE)
+        target_expr = from_column_re.sub(to_column, dis_expr)
         return f"{match.group('death')} <= ({target_expr} + INTERVAL '{days}' DAY)"
 
     rewritten = _DEATHTIME_FROM_DISCHTIME_RE.sub(repl, text)
+    rules: list[str] = []
     if changed and rewritten != text:
         rules.append("rewrite_post_window_anchor_to_admittime")
         return rewritten, rules
@@ -5527,6 +6026,29 @@ def _quote_to_char_format_literals(sql: str) -> tuple[str, list[str]]:
     return text, rules
 
 
+# Flag, duration and date-expression rewriters in pipeline order, dispatched like _SQL_FIELD_REWRITERS.
+_SQL_FLAG_REWRITERS: tuple[tuple[int, Callable[[str], tuple[str, Sequence[str]]]], ...] = (
+    (_sql_word_mask("ICU_STAY"), _rewrite_has_icu_stay),
+    (_sql_word_mask("ICU_STAY"), _rewrite_icu_stay),
+    (_sql_word_mask("ICUSTAYS"), _rewrite_icustays_flag),
+    (_sql_word_mask("ICUSTAYS"), _rewrite_icustays_not_null),
+    (_sql_word_mask(*_ADMISSION_LENGTH_COLUMNS), _rewrite_admission_length),
+    (_sql_word_mask(*_DURATION_COLUMNS), _rewrite_duration),
+)
+_SQL_DATE_REWRITERS: tuple[tuple[int, Callable[[str], tuple[str, Sequence[str]]]], ...] = (
+    (_sql_word_mask("TO_DATE"), _rewrite_to_date_cast),
+    (_sql_word_mask("EXTRACT"), _rewrite_extract_day_diff),
+    (_sql_word_mask("TIMESTAMPDIFF"), _rewrite_timestampdiff),
+    (_sql_word_mask("EXTRACT"), _rewrite_extract_year),
+)
+_SQL_AGE_REWRITERS: tuple[tuple[int, Callable[[str], tuple[str, Sequence[str]]]], ...] = (
+    (_sql_word_mask("HOSPITAL_EXPIRE_FLAG"), _rewrite_hospital_expire_flag),
+    (_sql_word_mask("EXTRACT"), _rewrite_age_from_extract),
+    (_sql_word_mask("EXTRACT"), _rewrite_birthdate_to_anchor_age),
+    (_sql_word_mask("YEAR"), _rewrite_birth_year_age),
+)
+
+
 def _postprocess_sql_relaxed(question: str, sql: str) -> tuple[str, list[str]]:
     """Apply low-risk SQL fixes only.
 
@@ -5547,17 +6069,12 @@ def _postprocess_sql_relaxed(question: str, sql: str) -> tuple[str, list[str]]:
     first_icu_fixed, first_icu_rules = _rewrite_unrequested_first_icu_window(q, icu_mortality_fixed)
     rules.extend(first_icu_rules)
 
-    rewritten_date_cast, date_cast_rules = _rewrite_to_date_cast(first_icu_fixed)
-    rules.extend(date_cast_rules)
-
-    rewritten_extract_day, extract_day_rules = _rewrite_extract_day_diff(rewritten_date_cast)
-    rules.extend(extract_day_rules)
-
-    rewritten_ts, ts_rules = _rewrite_timestampdiff(rewritten_extract_day)
-    rules.extend(ts_rules)
-
-    rewritten_ext, ext_rules = _rewrite_extract_year(rewritten_ts)
-    rules.extend(ext_rules)
+    rewritten_ext = first_icu_fixed
+    for required_mask, rewrite_dates in _SQL_DATE_REWRITERS:
+        if not _scan_sql_token_mask(rewritten_ext) & required_mask:
+            continue
+        rewritten_ext, date_rules = rewrite_dates(rewritten_ext)
+        rules.extend(date_rules)
 
     timed, time_rules = _normalize_timestamp_diffs(rewritten_ext)
     rules.extend(time_rules)
@@ -5706,6 +6223,78 @@ def _postprocess_sql_conservative(question: str, sql: str) -> tuple[str, list[st
     return careunit_capped, rules
 
 
+_PIPELINE_CACHE_MAXSIZE = 1024
+_PIPELINE_CACHE: dict[tuple[int, str, str, str], tuple[str, tuple[str, ...]]] = {}
+_PIPELINE_CACHE_LOCK = threading.Lock()
+_PIPELINE_INPUTS: tuple[float, ...] = ()
+_PIPELINE_INPUTS_GENERATION = 0
+_PIPELINE_RUN = threading.local()
+
+
+def _match_diagnosis_mappings(question: str) -> list[dict[str, Any]]:
+    # The diagnosis map refreshes from the database on a TTL, so results that
+    # depend on it are never memoized.
+    _PIPELINE_RUN.uncacheable = True
+    return match_diagnosis_mappings(question)
+
+
+def _match_procedure_mappings(question: str) -> list[dict[str, Any]]:
+    _PIPELINE_RUN.uncacheable = True
+    return match_procedure_mappings(question)
+
+
+def _pipeline_inputs_generation() -> int:
+    """Bump a generation counter whenever a store the pipelines read is reloaded."""
+    global _PIPELINE_INPUTS
+    global _PIPELINE_INPUTS_GENERATION
+
+    # Loading refreshes each store from disk; its source mtime then identifies the content.
+    load_sql_postprocess_rules()
+    load_sql_schema_hints()
+    load_column_value_rows()
+    load_label_intent_profiles()
+    current = (
+        sql_postprocess_rules_mtime(),
+        sql_schema_hints_mtime(),
+        column_value_rows_mtime(),
+        label_intent_profiles_mtime(),
+    )
+    with _PIPELINE_CACHE_LOCK:
+        if current != _PIPELINE_INPUTS:
+            _PIPELINE_INPUTS = current
+            _PIPELINE_INPUTS_GENERATION += 1
+            # Entries keyed on older generations can never hit again.
+            _PIPELINE_CACHE.clear()
+        return _PIPELINE_INPUTS_GENERATION
+
+
+def _run_postprocess_pipeline(
+    pipeline: Callable[[str, str], tuple[str, list[str]]],
+    question: str,
+    sql: str,
+) -> tuple[str, list[str]]:
+    key = (_pipeline_inputs_generation(), pipeline.__name__, question, sql)
+    cached = _PIPELINE_CACHE.get(key)
+    if cached is not None:
+        with _PIPELINE_CACHE_LOCK:
+            # Re-insert on hit so eviction drops the least recently used entry.
+            if _PIPELINE_CACHE.pop(key, None) is not None:
+                _PIPELINE_CACHE[key] = cached
+        return cached[0], list(cached[1])
+
+    _PIPELINE_RUN.uncacheable = False
+    result_sql, result_rules = pipeline(question, sql)
+    if not result_rules and result_sql == sql:
+        # Pass-through: hand back (and cache) the caller's own string rather than an equal copy.
+        result_sql = sql
+    if not _PIPELINE_RUN.uncacheable:
+        with _PIPELINE_CACHE_LOCK:
+            if len(_PIPELINE_CACHE) >= _PIPELINE_CACHE_MAXSIZE:
+                _PIPELINE_CACHE.pop(next(iter(_PIPELINE_CACHE)), None)
+            _PIPELINE_CACHE[key] = (result_sql, tuple(result_rules))
+    return result_sql, result_rules
+
+
 def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tuple[str, list[str]]:
     rules: list[str] = []
     q = question.strip()
@@ -5762,15 +6351,24 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
         mode = "conservative"
 
     if profile_mode == "relaxed":
-        relaxed_sql, relaxed_rules = _postprocess_sql_relaxed(q, sql)
+        relaxed_sql, relaxed_rules = _run_postprocess_pipeline(_postprocess_sql_relaxed, q, sql)
         rules.extend(relaxed_rules)
         return relaxed_sql, rules
 
     if profile_mode != "aggressive" and mode == "conservative":
-        conservative_sql, conservative_rules = _postprocess_sql_conservative(q, sql)
+        conservative_sql, conservative_rules = _run_postprocess_pipeline(_postprocess_sql_conservative, q, sql)
         rules.extend(conservative_rules)
         return conservative_sql, rules
 
+    aggressive_sql, aggressive_rules = _run_postprocess_pipeline(_postprocess_sql_aggressive, q, sql)
+    rules.extend(aggressive_rules)
+    return aggressive_sql, rules
+
+
+def _postprocess_sql_aggressive(question: str, sql: str) -> tuple[str, list[str]]:
+    rules: list[str] = []
+    q = question.strip()
+
     mapped, map_rules = _apply_schema_mappings(sql)
     rules.extend(map_rules)
 
@@ -5786,55 +6384,22 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
     micro_fixed, micro_rules = _ensure_microbiology_table(first_icu_fixed)
     rules.extend(micro_rules)
 
-    micro_by_q, micro_q_rules = _ensure_microbiology_by_question(q, micro_fixed)
-    rules.extend(micro_q_rules)
-
-    icu_forced, icu_force_rules = _ensure_icustays_table(q, micro_by_q)
-    rules.extend(icu_force_rules)
-
-    chart_forced, chart_rules = _ensure_chartevents_table(q, icu_forced)
-    rules.extend(chart_rules)
-
-    lab_forced, lab_rules = _ensure_labevents_table(q, chart_forced)
-    rules.extend(lab_rules)
-
-    services_forced, services_rules = _ensure_services_table(q, lab_forced)
-    rules.extend(services_rules)
-
-    prescriptions_forced, prescriptions_rules = _ensure_prescriptions_table(q, services_forced)
-    rules.extend(prescriptions_rules)
-
-    input_forced, input_rules = _ensure_inputevents_table(q, prescriptions_forced)
-    rules.extend(input_rules)
-
-    output_forced, output_rules = _ensure_outputevents_table(q, input_forced)
-    rules.extend(output_rules)
-
-    emar_forced, emar_rules = _ensure_emar_table(q, output_forced)
-    rules.extend(emar_rules)
-
-    diagnoses_forced, diagnoses_rules = _ensure_diagnoses_icd_table(q, emar_forced)
-    rules.extend(diagnoses_rules)
-
-    procedures_forced, procedures_rules = _ensure_procedures_icd_table(q, diagnoses_forced)
-    rules.extend(procedures_rules)
-
-    prescriptions_field_fixed, prescriptions_field_rules = _rewrite_prescriptions_drug_field(q, procedures_forced)
-    rules.extend(prescriptions_field_rules)
-
-    prescriptions_col_fixed, prescriptions_col_rules = _rewrite_prescriptions_columns(prescriptions_field_fixed)
-    rules.extend(prescriptions_col_rules)
-
-    icd_code_fixed, icd_code_rules = _rewrite_icd_code_field(q, prescriptions_col_fixed)
-    rules.extend(icd_code_rules)
-
-    icd_itemid_fixed, icd_itemid_rules = _rewrite_itemid_in_icd_tables(icd_code_fixed)
-    rules.extend(icd_itemid_rules)
+    table_triggers = _question_table_triggers(q)
+    table_forced = micro_fixed
+    for trigger, ensure_table in _QUESTION_TABLE_REWRITERS:
+        if trigger is not None and trigger not in table_triggers:
+            continue
+        table_forced, forced_rules = ensure_table(q, table_forced)
+        rules.extend(forced_rules)
 
-    emar_field_fixed, emar_field_rules = _rewrite_emar_medication_field(q, icd_itemid_fixed)
-    rules.extend(emar_field_rules)
+    field_fixed = table_forced
+    for required_mask, rewrite_fields in _SQL_FIELD_REWRITERS:
+        if not _scan_sql_token_mask(field_fixed) & required_mask:
+            continue
+        field_fixed, field_rules = rewrite_fields(q, field_fixed)
+        rules.extend(field_rules)
 
-    transfers_fixed, transfers_rules = _ensure_transfers_eventtype(q, emar_field_fixed)
+    transfers_fixed, transfers_rules = _ensure_transfers_eventtype(q, field_fixed)
     rules.extend(transfers_rules)
 
     transfers_careunit_fixed, transfers_careunit_rules = _rewrite_transfers_careunit_fields(transfers_fixed)
@@ -5846,35 +6411,19 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
     transfers_eventtype_fixed, transfers_eventtype_rules = _strip_transfers_eventtype_filter(q, services_order_fixed)
     rules.extend(transfers_eventtype_rules)
 
-    rewritten_icu, icu_rules = _rewrite_has_icu_stay(transfers_eventtype_fixed)
-    rules.extend(icu_rules)
-
-    rewritten_icu2, icu2_rules = _rewrite_icu_stay(rewritten_icu)
-    rules.extend(icu2_rules)
-
-    rewritten_icu3, icu3_rules = _rewrite_icustays_flag(rewritten_icu2)
-    rules.extend(icu3_rules)
-
-    rewritten_icu4, icu4_rules = _rewrite_icustays_not_null(rewritten_icu3)
-    rules.extend(icu4_rules)
-
-    rewritten_adm_len, adm_len_rules = _rewrite_admission_length(rewritten_icu4)
-    rules.extend(adm_len_rules)
-
-    rewritten_dur, dur_rules = _rewrite_duration(rewritten_adm_len)
-    rules.extend(dur_rules)
-
-    rewritten_date_cast, date_cast_rules = _rewrite_to_date_cast(rewritten_dur)
-    rules.extend(date_cast_rules)
-
-    rewritten_extract_day, extract_day_rules = _rewrite_extract_day_diff(rewritten_date_cast)
-    rules.extend(extract_day_rules)
-
-    rewritten_ts, ts_rules = _rewrite_timestampdiff(rewritten_extract_day)
-    rules.extend(ts_rules)
+    rewritten_dur = transfers_eventtype_fixed
+    for required_mask, rewrite_flags in _SQL_FLAG_REWRITERS:
+        if not _scan_sql_token_mask(rewritten_dur) & required_mask:
+            continue
+        rewritten_dur, flag_rules = rewrite_flags(rewritten_dur)
+        rules.extend(flag_rules)
 
-    rewritten_ext, ext_rules = _rewrite_extract_year(rewritten_ts)
-    rules.extend(ext_rules)
+    rewritten_ext = rewritten_dur
+    for required_mask, rewrite_dates in _SQL_DATE_REWRITERS:
+        if not _scan_sql_token_mask(rewritten_ext) & required_mask:
+            continue
+        rewritten_ext, date_rules = rewrite_dates(rewritten_ext)
+        rules.extend(date_rules)
 
     joined_adm, adm_rules = _ensure_admissions_join(rewritten_ext)
     rules.extend(adm_rules)
@@ -5891,7 +6440,7 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
     rewritten_patients_id, patient_id_rules = _rewrite_patients_id(joined_patients)
     rules.extend(patient_id_rules)
 
-    joined_icd, icd_rules = _ensure_icd_join(question, rewritten_patients_id)
+    joined_icd, icd_rules = _ensure_icd_join(q, rewritten_patients_id)
     rules.extend(icd_rules)
 
     labeled, label_rules = _ensure_label_join(joined_icd)
@@ -5957,20 +6506,12 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
     gender_template_fixed, gender_template_rules = _rewrite_count_by_gender_template(q, admissions_icd_grain_fixed)
     rules.extend(gender_template_rules)
 
-    expire_fixed, expire_rules = _rewrite_hospital_expire_flag(gender_template_fixed)
-    rules.extend(expire_rules)
-
-    age_fixed, age_rules = _rewrite_age_from_anchor(expire_fixed)
-    rules.extend(age_rules)
-
-    birth_fixed, birth_rules = _rewrite_age_from_birthdate(age_fixed)
-    rules.extend(birth_rules)
-
-    birth_col_fixed, birth_col_rules = _rewrite_birthdate_to_anchor_age(birth_fixed)
-    rules.extend(birth_col_rules)
-
-    birth_year_fixed, birth_year_rules = _rewrite_birth_year_age(birth_col_fixed)
-    rules.extend(birth_year_rules)
+    birth_year_fixed = gender_template_fixed
+    for required_mask, rewrite_age in _SQL_AGE_REWRITERS:
+        if not _scan_sql_token_mask(birth_year_fixed) & required_mask:
+            continue
+        birth_year_fixed, age_rules = rewrite_age(birth_year_fixed)
+        rules.extend(age_rules)
 
     age_gender_extrema_fixed, age_gender_extrema_rules = _rewrite_age_group_diagnosis_extrema_by_gender(
         q,
@@ -5978,29 +6519,12 @@ def postprocess_sql(question: str, sql: str, profile: str | None = None) -> tupl
     )
     rules.extend(age_gender_extrema_rules)
 
-    icu_careunit_fixed, icu_careunit_rules = _rewrite_icustays_careunit(q, age_gender_extrema_fixed)
-    rules.extend(icu_careunit_rules)
-
-    icu_los_fixed, icu_los_rules = _rewrite_icustays_los(icu_careunit_fixed)
-    rules.extend(icu_los_rules)
-
-    warning_fixed, warning_rules = _rewrite_warning_flag(q, icu_los_fixed)
-    rules.extend(warning_rules)
-
-    lab_priority_fixed, lab_priority_rules = _rewrite_lab_priority(q, warning_fixed)
-    rules.extend(lab_priority_rules)
-
-    micro_field_fixed, micro_field_rules = _rewrite_micro_count_field(q, lab_priority_fixed)
-    rules.extend(micro_field_rules)
-
-    chart_label_fixed, chart_label_rules = _ensure_chart_label(q, micro_field_fixed)
-    rules.extend(chart_label_rules)
-
-    lab_label_fixed, lab_label_rules = _ensure_lab_label(q, chart_label_fixed)
-    rules.extend(lab_label_rules)
-
-    label_field_fixed, label_field_rules = _rewrite_label_field(q, lab_label_fixed)
-    rules.extend(label_field_rules)
+    label_field_fixed = age_gender_extrema_fixed
+    for required_mask, rewrite_columns in _SQL_COLUMN_REWRITERS:
+        if not _scan_sql_token_mask(label_field_fixed) & required_mask:
+            continue
+        label_field_fixed, column_rules = rewrite_columns(q, label_field_fixed)
+        rules.extend(column_rules)
 
     count_fixed, count_rules = _normalize_count_aliases(label_field_fixed)
     rules.extend(count_rules)
@@ -298,6 +298,11 @@ def load_column_value_rows() -> list[dict[str, Any]]:
     return deduped
 
 
+def column_value_rows_mtime() -> float:
+    """Source mtime of the last loaded column value rows; -1.0 when the source is missing."""
+    return _COLUMN_VALUE_CACHE_MTIME
+
+
 def match_column_value_rows(question: str, rows: list[dict[str, Any]] | None = None, k: int = 8) -> list[dict[str, Any]]:
     normalized_question = _normalize(question)
     if not normalized_question:
@@ -107,6 +107,11 @@ def load_label_intent_profiles() -> list[dict[str, Any]]:
     return profiles
 
 
+def label_intent_profiles_mtime() -> float:
+    """Source mtime of the last loaded label intent profiles; -1.0 when the source is missing."""
+    return _LABEL_INTENT_CACHE_MTIME
+
+
 def _token_hits(normalized_question: str, tokens: list[str]) -> int:
     if not tokens:
         return 0
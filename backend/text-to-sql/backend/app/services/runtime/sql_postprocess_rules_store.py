@@ -105,8 +105,10 @@ def load_sql_postprocess_rules() -> dict[str, Any]:
     global _RULES_CACHE
 
     if not _RULES_PATH.exists():
-        _RULES_CACHE_MTIME = -1.0
-        _RULES_CACHE = dict(_DEFAULT_RULES)
+        # Keep handing back the same defaults object so callers can cache on identity.
+        if not _RULES_CACHE or _RULES_CACHE_MTIME != -1.0:
+            _RULES_CACHE_MTIME = -1.0
+            _RULES_CACHE = dict(_DEFAULT_RULES)
         return _RULES_CACHE
 
     mtime = _RULES_PATH.stat().st_mtime
@@ -117,3 +119,8 @@ def load_sql_postprocess_rules() -> dict[str, Any]:
     _RULES_CACHE = _deep_merge(_DEFAULT_RULES, override)
     _RULES_CACHE_MTIME = mtime
     return _RULES_CACHE
+
+
+def sql_postprocess_rules_mtime() -> float:
+    """Source mtime of the last loaded rules; -1.0 when the source is missing."""
+    return _RULES_CACHE_MTIME
@@ -79,8 +79,10 @@ def load_sql_schema_hints() -> dict[str, Any]:
     global _SCHEMA_HINTS_CACHE
 
     if not _SCHEMA_HINTS_PATH.exists():
-        _SCHEMA_HINTS_CACHE_MTIME = -1.0
-        _SCHEMA_HINTS_CACHE = dict(_DEFAULT_HINTS)
+        # Keep handing back the same defaults object so callers can cache on identity.
+        if not _SCHEMA_HINTS_CACHE or _SCHEMA_HINTS_CACHE_MTIME != -1.0:
+            _SCHEMA_HINTS_CACHE_MTIME = -1.0
+            _SCHEMA_HINTS_CACHE = dict(_DEFAULT_HINTS)
         return _SCHEMA_HINTS_CACHE
 
     mtime = _SCHEMA_HINTS_PATH.stat().st_mtime
@@ -94,3 +96,8 @@ def load_sql_schema_hints() -> dict[str, Any]:
     _SCHEMA_HINTS_CACHE = built
     _SCHEMA_HINTS_CACHE_MTIME = mtime
     return _SCHEMA_HINTS_CACHE
+
+
+def sql_schema_hints_mtime() -> float:
+    """Source mtime of the last loaded schema hints; -1.0 when the source is missing."""
+    return _SCHEMA_HINTS_CACHE_MTIME
@@ -0,0 +1,88 @@
+"""Golden outputs for the SQL postprocess pipelines.
+
+Expected values were produced by the pre-optimization implementation; the
+regex/dispatch rewrites in sql_postprocess.py must keep them unchanged.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.services.agents import sql_postprocess as sp
+
+
+_GOLDEN_PATH = Path(__file__).with_name("data") / "sql_postprocess_golden.json"
+_GOLDEN_CASES = json.loads(_GOLDEN_PATH.read_text(encoding="utf-8"))
+
+_DIAGNOSIS_MAP = [
+    {"term": "심부전", "aliases": ["heart failure"], "icd_prefixes": ["I50", "428"]},
+    {"term": "당뇨", "aliases": ["diabetes"], "icd_prefixes": ["E11", "250"]},
+    {"term": "패혈증", "aliases": ["sepsis"], "icd_prefixes": ["A41", "038"]},
+]
+_PROCEDURE_MAP = [
+    {"term": "기계환기", "aliases": ["mechanical ventilation"], "icd_prefixes": ["5A19", "967"]},
+]
+
+
+def _static_matcher(entries):
+    def match(question, *args, **kwargs):
+        q = (question or "").lower()
+        matched = []
+        for entry in entries:
+            hits = [term for term in [entry["term"], *entry["aliases"]] if term.lower() in q]
+            if hits:
+                matched.append({**entry, "_score": max(len(hit) for hit in hits)})
+        return matched
+
+    return match
+
+
+@pytest.fixture(autouse=True)
+def _deterministic_stores(monkeypatch):
+    # The ICD maps refresh from the database and learned fixes from runtime state.
+    monkeypatch.setattr(sp, "match_diagnosis_mappings", _static_matcher(_DIAGNOSIS_MAP))
+    monkeypatch.setattr(sp, "match_procedure_mappings", _static_matcher(_PROCEDURE_MAP))
+    monkeypatch.setattr(sp, "find_learned_sql_fix", lambda sql: None)
+    monkeypatch.setattr(sp, "mark_learned_sql_fix_used", lambda rule_id: None)
+    monkeypatch.setattr(sp, "_PIPELINE_CACHE", {})
+
+
+def _case_id(case):
+    return f"{case['question'][:24]}|{case['sql'][:40]}"
+
+
+@pytest.mark.parametrize("case", _GOLDEN_CASES, ids=_case_id)
+def test_pipelines_match_golden(case):
+    for name in ("relaxed", "conservative", "aggressive"):
+        pipeline = getattr(sp, f"_postprocess_sql_{name}")
+        fixed, rules = pipeline(case["question"], case["sql"])
+        assert [fixed, list(rules)] == case[name], name
+
+
+@pytest.mark.parametrize("case", _GOLDEN_CASES, ids=_case_id)
+def test_postprocess_sql_matches_golden(case):
+    for profile in ("auto", "relaxed", "aggressive"):
+        fixed, rules = sp.postprocess_sql(case["question"], case["sql"], None if profile == "auto" else profile)
+        assert [fixed, rules] == case[f"postprocess_sql:{profile}"], profile
+    # A second call is served from the pipeline memo and must agree.
+    assert list(sp.postprocess_sql(case["question"], case["sql"])) == case["postprocess_sql:auto"]
+
+
+@pytest.mark.parametrize("case", _GOLDEN_CASES, ids=_case_id)
+def test_recommended_profile_matches_golden(case):
+    assert list(sp.recommend_postprocess_profile(case["question"], case["sql"])) == case["recommended_profile"]
+
+
+def test_cte_projection_alias_helpers_handle_qualified_columns():
+    sql = (
+        "WITH base AS (SELECT d.ICD_CODE, COUNT(*) cnt FROM DIAGNOSES_ICD d GROUP BY d.ICD_CODE) "
+        "SELECT b.ICD_CODE, b.total FROM base b ORDER BY b.total DESC"
+    )
+    assert sp._extract_cte_projection_aliases(sql, "base") == {"ICD_CODE", "CNT"}
+    fixed, rules = sp._fix_cte_projection_alias_mismatch(sql)
+    assert fixed == (
+        "WITH base AS (SELECT d.ICD_CODE, COUNT(*) cnt FROM DIAGNOSES_ICD d GROUP BY d.ICD_CODE) "
+        "SELECT b.ICD_CODE, b.CNT FROM base b ORDER BY b.total DESC"
+    )
+    assert list(rules) == ["cte_projection_alias_mismatch_to_cnt"]
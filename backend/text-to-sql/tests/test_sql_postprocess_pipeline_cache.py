@@ -0,0 +1,118 @@
+import functools
+
+import pytest
+
+from app.services.agents import sql_postprocess as sp
+from app.services.runtime import sql_schema_hints_store
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pipeline_cache(monkeypatch):
+    monkeypatch.setattr(sp, "_PIPELINE_CACHE", {})
+    monkeypatch.setattr(sp, "match_diagnosis_mappings", lambda question: [])
+    monkeypatch.setattr(sp, "match_procedure_mappings", lambda question: [])
+
+
+def _counting_pipeline(calls):
+    def pipeline(question, sql):
+        calls.append((question, sql))
+        return sql + " -- fixed", ["counting_rule"]
+
+    return pipeline
+
+
+def test_repeated_call_hits_cache():
+    calls = []
+    pipeline = _counting_pipeline(calls)
+    first = sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    second = sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    assert first == second == ("SELECT 1 FROM dual -- fixed", ["counting_rule"])
+    assert len(calls) == 1
+
+
+def test_cached_rules_are_not_shared_with_callers():
+    pipeline = _counting_pipeline([])
+    _, rules = sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    rules.append("caller_rule")
+    _, again = sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    assert again == ["counting_rule"]
+
+
+def test_postprocess_sql_repeat_is_served_from_cache(monkeypatch):
+    question = "환자 수를 성별로 보여줘"
+    sql = "SELECT gender, COUNT(*) AS cnt FROM patients GROUP BY gender"
+    expected = sp.postprocess_sql(question, sql)
+    assert len(sp._PIPELINE_CACHE) == 1
+
+    for name in ("_postprocess_sql_relaxed", "_postprocess_sql_conservative", "_postprocess_sql_aggressive"):
+
+        @functools.wraps(getattr(sp, name))
+        def _fail(question, sql):
+            raise AssertionError("pipeline should not rerun on a cache hit")
+
+        monkeypatch.setattr(sp, name, _fail)
+    assert sp.postprocess_sql(question, sql) == expected
+
+
+def test_store_reload_invalidates_cache(monkeypatch, tmp_path):
+    hints_path = tmp_path / "sql_postprocess_schema_hints.json"
+    monkeypatch.setattr(sql_schema_hints_store, "_SCHEMA_HINTS_PATH", hints_path)
+    calls = []
+    pipeline = _counting_pipeline(calls)
+
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    assert len(calls) == 1
+
+    hints_path.write_text('{"table_aliases": {"PT": "PATIENTS"}}', encoding="utf-8")
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    assert len(calls) == 2
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT 1 FROM dual")
+    assert len(calls) == 2
+
+
+def test_missing_store_does_not_invalidate_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(sql_schema_hints_store, "_SCHEMA_HINTS_PATH", tmp_path / "missing.json")
+    generation = sp._pipeline_inputs_generation()
+    assert sp._pipeline_inputs_generation() == generation
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(sp, "_PIPELINE_CACHE_MAXSIZE", 2)
+    calls = []
+    pipeline = _counting_pipeline(calls)
+
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT a FROM t")
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT b FROM t")
+    # Touch "a" so "b" becomes the least recently used entry.
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT a FROM t")
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT c FROM t")
+    assert len(sp._PIPELINE_CACHE) == 2
+    assert len(calls) == 3
+
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT a FROM t")
+    assert len(calls) == 3
+    sp._run_postprocess_pipeline(pipeline, "q", "SELECT b FROM t")
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize("wrapper", ["_match_diagnosis_mappings", "_match_procedure_mappings"])
+def test_mapping_lookup_bypasses_cache(wrapper):
+    calls = []
+
+    def pipeline(question, sql):
+        calls.append(question)
+        getattr(sp, wrapper)(question)
+        return sql, []
+
+    sp._run_postprocess_pipeline(pipeline, "심부전 환자 수", "SELECT 1 FROM dual")
+    sp._run_postprocess_pipeline(pipeline, "심부전 환자 수", "SELECT 1 FROM dual")
+    assert len(calls) == 2
+    assert not sp._PIPELINE_CACHE
+
+
+def test_missing_schema_hints_return_stable_defaults(monkeypatch, tmp_path):
+    monkeypatch.setattr(sql_schema_hints_store, "_SCHEMA_HINTS_PATH", tmp_path / "missing.json")
+    first = sql_schema_hints_store.load_sql_schema_hints()
+    assert sql_schema_hints_store.load_sql_schema_hints() is first
+    assert sql_schema_hints_store.sql_schema_hints_mtime() == -1.0
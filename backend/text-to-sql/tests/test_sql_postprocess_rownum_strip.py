@@ -0,0 +1,39 @@
+from app.services.agents.sql_postprocess import (
+    _enforce_top_n_wrapper,
+    _strip_rownum_predicates,
+    _strip_unrequested_top_n_cap,
+)
+
+
+_STACKED_SQL = (
+    "SELECT GENDER, COUNT(*) AS cnt FROM PATIENTS "
+    "WHERE ROWNUM <= 5 AND ROWNUM <= 10 AND ANCHOR_AGE > 60 GROUP BY GENDER"
+)
+_STACKED_STRIPPED = "SELECT GENDER, COUNT(*) AS cnt FROM PATIENTS WHERE ANCHOR_AGE > 60 GROUP BY GENDER"
+
+
+def test_stacked_rownum_predicates_keep_where_keyword():
+    # The pre-alternation passes produced "FROM PATIENTS AND ANCHOR_AGE > 60".
+    assert _strip_rownum_predicates(_STACKED_SQL) == (_STACKED_STRIPPED, True)
+
+
+def test_stacked_rownum_predicates_in_unrequested_cap():
+    fixed, rules = _strip_unrequested_top_n_cap("성별 환자 수", _STACKED_SQL)
+    assert fixed == _STACKED_STRIPPED
+    assert list(rules) == ["strip_unrequested_top_n_rownum:5"]
+
+
+def test_stacked_rownum_predicates_before_top_n():
+    fixed, rules = _enforce_top_n_wrapper("top 3 성별", _STACKED_SQL)
+    assert fixed == _STACKED_STRIPPED
+    assert list(rules) == ["strip_rownum_before_top_n"]
+
+
+def test_single_rownum_predicate_before_group_by():
+    sql = "SELECT GENDER, COUNT(*) AS cnt FROM PATIENTS WHERE ROWNUM <= 5 GROUP BY GENDER"
+    assert _strip_rownum_predicates(sql) == ("SELECT GENDER, COUNT(*) AS cnt FROM PATIENTS GROUP BY GENDER", True)
+
+
+def test_rownum_free_sql_is_returned_unchanged():
+    sql = "SELECT GENDER,  COUNT(*) AS cnt FROM PATIENTS GROUP BY GENDER"
+    assert _strip_rownum_predicates(sql) == (sql, False)
@@ -0,0 +1,35 @@
+from app.services.agents.sql_postprocess import (
+    _strip_inpatient_admission_type_filter,
+    _strip_invalid_eventtype_filter_for_non_transfers,
+)
+
+
+def test_inpatient_admission_type_filter_strips_every_copy():
+    sql = (
+        "SELECT COUNT(*) FROM ADMISSIONS a "
+        "WHERE a.ADMISSION_TYPE='INPATIENT' AND a.ADMISSION_TYPE='INPATIENT' AND a.HOSPITAL_EXPIRE_FLAG = 1"
+    )
+    fixed, rules = _strip_inpatient_admission_type_filter("사망 환자 수", sql)
+    assert fixed == "SELECT COUNT(*) FROM ADMISSIONS a WHERE a.HOSPITAL_EXPIRE_FLAG = 1"
+    assert list(rules) == ["strip_inpatient_admission_type_filter"]
+
+
+def test_inpatient_admission_type_filter_kept_for_admission_type_question():
+    sql = "SELECT COUNT(*) FROM ADMISSIONS a WHERE a.ADMISSION_TYPE='INPATIENT'"
+    fixed, rules = _strip_inpatient_admission_type_filter("입원 유형별 입원 수", sql)
+    assert fixed == sql
+    assert not rules
+
+
+def test_non_transfers_eventtype_filter_strips_every_copy():
+    sql = "SELECT COUNT(*) FROM ICUSTAYS i WHERE i.EVENTTYPE = 'admit' AND i.EVENTTYPE = 'admit' AND i.LOS > 2"
+    fixed, rules = _strip_invalid_eventtype_filter_for_non_transfers(sql)
+    assert fixed == "SELECT COUNT(*) FROM ICUSTAYS i WHERE i.LOS > 2"
+    assert list(rules) == ["strip_nontransfers_eventtype_filter"]
+
+
+def test_transfers_eventtype_filter_is_kept():
+    sql = "SELECT COUNT(*) FROM TRANSFERS t WHERE t.EVENTTYPE = 'admit' AND t.EVENTTYPE = 'admit'"
+    fixed, rules = _strip_invalid_eventtype_filter_for_non_transfers(sql)
+    assert fixed == sql
+    assert not rules
@@ -0,0 +1,22 @@
+from app.services.agents.sql_postprocess import _enforce_top_n_wrapper, _extract_top_n_from_question
+
+
+def test_top_n_english_and_korean():
+    assert _extract_top_n_from_question("top 5 diagnoses") == 5
+    assert _extract_top_n_from_question("진단 상위 7개") == 7
+    assert _extract_top_n_from_question("탑 3 약물") == 3
+    assert _extract_top_n_from_question("20개만 보여줘") == 20
+    assert _extract_top_n_from_question("상위 약물") == 10
+    assert _extract_top_n_from_question("count of admissions") is None
+
+
+def test_top_n_mixed_language_prefers_english():
+    assert _extract_top_n_from_question("code 상위 10개 top 3") == 3
+    assert _extract_top_n_from_question("top 4 코드 상위 9") == 4
+
+
+def test_enforce_top_n_wrapper_uses_english_n_for_mixed_question():
+    sql = "SELECT icd_code, COUNT(*) AS cnt FROM diagnoses_icd GROUP BY icd_code ORDER BY cnt DESC"
+    fixed, rules = _enforce_top_n_wrapper("code 상위 10개 top 3", sql)
+    assert fixed.endswith("WHERE ROWNUM <= 3")
+    assert rules == ["wrap_top_n_rownum:3"]